@@ -0,0 +1,138 @@
+import io
+from concurrent.futures import ThreadPoolExecutor, wait, ALL_COMPLETED, FIRST_COMPLETED
+from typing import Optional
+
+import aws.session as session
+import config
+
+# S3 limits of a multipart upload
+MIN_PART_SIZE = 5 * 1024 * 1024
+MAX_PARTS     = 10000
+
+# Checksums of a part that have to be repeated when the upload is completed
+PART_CHECKSUMS = ('ChecksumCRC32', 'ChecksumCRC32C', 'ChecksumCRC64NVME', 'ChecksumSHA1', 'ChecksumSHA256')
+
+
+class MultipartWriter(io.RawIOBase):
+    """
+    Write-only file that streams into an S3 object: the bytes written (e.g. by the parquet encoder)
+    fill a part buffer, and every full part is uploaded in background while the next one fills.
+    At most `max_in_flight` parts are uploading, so the memory used is a few parts whatever the
+    size of the object, and there is no limit of 5 GB as with a single put.
+
+    An object smaller than a part is sent with a single put when the file is closed. A multipart
+    upload that fails is aborted, so no parts are left behind (and billed). Use it as a context
+    manager: the upload is completed on exit, or aborted when the block raises.
+
+    Args:
+        bucket (str): The target bucket.
+        key (str): The key of the object.
+        part_size (int): Bytes of a part, at least 5 MB. MULTIPART_PART_SIZE_MB by default.
+        max_in_flight (int): Maximum parts uploading at the same time. MULTIPART_CONCURRENCY by default.
+    """
+
+    def __init__(self, bucket: str, key: str, part_size: Optional[int] = None, max_in_flight: Optional[int] = None):
+        super().__init__()
+        self.bucket        = bucket
+        self.key           = key
+        self.part_size     = max(part_size or config.MULTIPART_PART_SIZE_MB * 1024 * 1024, MIN_PART_SIZE)
+        self.max_in_flight = max(1, max_in_flight or config.MULTIPART_CONCURRENCY)
+        self.client        = session.get_client('s3')
+
+        self.buffer    = bytearray()
+        self.position  = 0
+        self.upload_id = None
+        self.parts     = []
+        self.pending   = set()
+        self.executor  = None
+
+    def writable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.position
+
+    def write(self, data) -> int:
+        if self.closed:
+            raise ValueError(f'Write to the closed upload of s3://{self.bucket}/{self.key}')
+
+        view = memoryview(data).cast('B')
+        self.buffer += view
+        self.position += view.nbytes
+        while len(self.buffer) >= self.part_size:
+            part, self.buffer = self.buffer[:self.part_size], self.buffer[self.part_size:]
+            self._send_part(part)
+        return view.nbytes
+
+    def _send_part(self, part: bytearray) -> None:
+        if self.upload_id is None:
+            self.upload_id = self.client.create_multipart_upload(Bucket=self.bucket, Key=self.key)['UploadId']
+            self.executor  = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix='multipart')
+
+        number = len(self.parts) + len(self.pending) + 1
+        if number > MAX_PARTS:
+            raise ValueError(f's3://{self.bucket}/{self.key} needs more than {MAX_PARTS} parts, increase the part size')
+
+        while len(self.pending) >= self.max_in_flight:
+            self._collect(FIRST_COMPLETED)
+        self.pending.add(self.executor.submit(self._upload_part, number, part))
+
+    def _upload_part(self, number: int, part: bytearray) -> dict:
+        response = self.client.upload_part(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id, PartNumber=number, Body=part)
+        return {'PartNumber': number, 'ETag': response['ETag'], **{name: response[name] for name in PART_CHECKSUMS if name in response}}
+
+    def _collect(self, return_when) -> None:
+        done, self.pending = wait(self.pending, return_when=return_when)
+        self.parts.extend(future.result() for future in done)  # raises the error of a failed part
+
+    def complete(self) -> None:
+        """
+        Send the last bytes and complete the object.
+        """
+        if self.upload_id is None:
+            self.client.put_object(Bucket=self.bucket, Key=self.key, Body=bytes(self.buffer))
+        else:
+            if self.buffer:
+                self._send_part(self.buffer)
+            self._collect(ALL_COMPLETED)
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=self.key,
+                UploadId=self.upload_id,
+                MultipartUpload={'Parts': sorted(self.parts, key=lambda part: part['PartNumber'])},
+            )
+        self._release()
+
+    def abort(self) -> None:
+        """
+        Cancel the upload: the parts in flight are awaited and the uploaded ones deleted.
+        """
+        if self.upload_id is not None:
+            wait(self.pending)
+            try:
+                self.client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id)
+            except Exception as e:
+                print(f'[WARN] The multipart upload {self.upload_id} of s3://{self.bucket}/{self.key} could not be aborted: {e}', flush=True)
+        self._release()
+
+    def _release(self) -> None:
+        self.buffer, self.pending = bytearray(), set()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+        super().close()
+
+    def close(self) -> None:
+        if not self.closed:
+            self.complete()
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            try:
+                self.complete()
+            except BaseException:
+                self.abort()
+                raise
+        else:
+            self.abort()
+        return False
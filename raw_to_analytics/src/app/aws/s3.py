@@ -1,11 +1,21 @@
-import boto3
 import io
 import polars as pl
 
 from typing import Any, List, Dict
 
+import aws.parquet_profiles as profiles
+import aws.session as session
+from aws.multipart import MultipartWriter
 
-def __write_parquet(data: pl.DataFrame, bucket: str, filename: str) -> None:
+
+def get_client():
+    """
+    The process-wide S3 client shared by the writers, see `aws.session`.
+    """
+    return session.get_client('s3')
+
+
+def __write_parquet(data: pl.DataFrame, bucket: str, filename: str, profile: str = 'snappy') -> None:
     """
     To write parquet file into S3 bucket.
 
@@ -13,14 +23,13 @@ def __write_parquet(data: pl.DataFrame, bucket: str, filename: str) -> None:
         data (): the data in polars dataframe (not a lazyframe)
         bucket (str): the target bucket
         filename (str); The name of the object that will be put in the bucket.  
+        profile (str): The parquet writer profile, see `aws.parquet_profiles`.
     """
 
-    s3_client = boto3.client('s3')
-    buffer    = io.BytesIO()
-    
-    data.write_parquet(buffer, compression="snappy")
-    buffer.seek(0)
-    s3_client.put_object(Bucket=bucket, Key=filename, Body=buffer)
+    # The encoder output is streamed into a multipart upload, part by part, instead of being held
+    # whole in memory. A file smaller than a part is sent with a single put
+    with MultipartWriter(bucket, filename) as file:
+        profiles.write_parquet(data, file, profile)
     
 
 def __write_csv(data: pl.DataFrame, bucket: str, filename: str) -> None:
@@ -33,7 +42,7 @@ def __write_csv(data: pl.DataFrame, bucket: str, filename: str) -> None:
         filename (str); The name of the object that will be put in the bucket.  
     """
 
-    s3_client = boto3.client('s3')
+    s3_client = get_client()
     buffer    = io.BytesIO()
     
     data.write_csv(buffer, separator=",")
@@ -52,7 +61,7 @@ def get_objects(bucket: str, object_prefix: str) -> List[str]:
     Returns:
         List[str]: A list of object names extracted from the S3 keys.
     """
-    s3_client = boto3.client('s3')
+    s3_client = get_client()
     paginator = s3_client.get_paginator('list_objects_v2')
     
     files: List[str] = []
@@ -77,7 +86,7 @@ def get_objects_complete(bucket: str, object_prefix: str) -> List[str]:
     Returns:
         List[str]: A list of object names extracted from the S3 keys.
     """
-    s3_client = boto3.client('s3')
+    s3_client = get_client()
     paginator = s3_client.get_paginator('list_objects_v2')
     
     files: List[str] = []
@@ -94,7 +103,7 @@ def get_objects_complete(bucket: str, object_prefix: str) -> List[str]:
 def delete_all_objects(bucket_name, delete_objects):
     # Dividir la lista de archivos en lotes de 1000 elementos
     chunk_size = 1000
-    s3_client = boto3.client('s3')
+    s3_client = get_client()
     
     for i in range(0, len(delete_objects), chunk_size):
         chunk = delete_objects[i:i + chunk_size]
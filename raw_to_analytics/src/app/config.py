@@ -15,6 +15,25 @@ ANALYTIC_BUCKET_TABLE = os.getenv("ANALYTIC_BUCKET_TABLE")
 
 DAY_BATCH = os.getenv("DAY_BATCH")
 
+# Writer profile of the analytics files (snappy, write, archive or read). They are read far more
+# often than written, so the default is the read-optimised profile
+PARQUET_PROFILE = os.getenv("PARQUET_PROFILE", "read")
+
+# Partitions encoded and uploaded at the same time by the writers, 1 to write them one by one
+WRITE_CONCURRENCY = int(os.getenv("WRITE_CONCURRENCY", 4))
+
+# S3 clients (aws/session.py): connection pool, retries and timeouts
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", 32))  # at least WRITE_CONCURRENCY * MULTIPART_CONCURRENCY
+S3_RETRY_MODE           = os.getenv("S3_RETRY_MODE", "adaptive")          # legacy, standard or adaptive
+S3_MAX_ATTEMPTS         = int(os.getenv("S3_MAX_ATTEMPTS", 5))
+S3_CONNECT_TIMEOUT      = float(os.getenv("S3_CONNECT_TIMEOUT", 5))       # seconds
+S3_READ_TIMEOUT         = float(os.getenv("S3_READ_TIMEOUT", 60))         # seconds
+
+# Multipart uploads of the parquet files (aws/multipart.py): size of a part (at least 5 MB) and parts
+# uploading at the same time per file. A writer holds about MULTIPART_CONCURRENCY + 1 parts in memory
+MULTIPART_PART_SIZE_MB = int(os.getenv("MULTIPART_PART_SIZE_MB", 8))
+MULTIPART_CONCURRENCY  = int(os.getenv("MULTIPART_CONCURRENCY", 4))
+
 
 BET_RAW_METADATA = raw.BETS_INFORMATION_RAW
 BET_MASTER_METADATA = master.BETS_INFORMATION_MASTER
@@ -83,7 +83,7 @@ BETS_INFORMATION_MASTER = {
         "BetPage": pl.Int16,  # tinyint
         # Nuevos  - No hay datos en la tabla pero esta definido como int
         "LocationId": pl.UInt32,
-        "Tstamp": pl.String,
+        "Tstamp": pl.UInt64,
         "AcceptingStatus": pl.Int16,    # Nuevos - min 0 max 5 int
         "RejectReason": pl.Int16,     # Nuevos - min 0 max 100 int
         "CheckTime": pl.Datetime,     # Nuevos - datetime
@@ -72,7 +72,7 @@ BETS_INFORMATION_RAW = {
         "betPage": pl.Int16,  # tinyint
         # Nuevos  - No hay datos en la tabla pero esta definido como int
         "locationId": pl.Int32,
-        "tstamp": pl.String,
+        "tstamp": pl.UInt64,  # rowversion
         "acceptingStatus": pl.Int32,    # Nuevos - min 0 max 5 int
         "rejectReason": pl.Int32,     # Nuevos - min 0 max 100 int
         "checkTime": pl.String,     # Nuevos - datetime
@@ -21,8 +21,7 @@ def __convert_fields(
     fields_str_to_format: list
 ):
     def datetime_transform(field): return (
-        pl.col(field)
-          .map_elements(h.format_date, return_dtype=pl.String)
+        h.format_date_expr(field)
           .str.to_datetime(format="%Y-%m-%dT%H:%M:%S%.f")
           .alias(field)
     )
@@ -34,31 +33,35 @@ def __convert_fields(
     )
 
     def date_transform(field): return (
-        pl.col(field)
-          .map_elements(h.format_date, return_dtype=pl.String)
+        h.format_date_expr(field)
         # Convert to datetime
           .str.to_datetime(format="%Y-%m-%dT%H:%M:%S%.f")
           .dt.date()
           .alias(field)
     )
 
-    def tstamp_transform(field): return (
-        pl.col(field)
-          .map_elements(h.format_tstamp, return_dtype=pl.String)
-          .alias(field)
-    )
-
     def str_transform(field): return (
         pl.col(field)
           .str.to_uppercase()
           .alias(field)
     )
 
+    # The tstamp is already a UInt64, except in the partitions written before it was parsed at ingestion
+    for field in fields_tstamp_to_format:
+        data_df = h.normalize_tstamp(data_df, field)
+
+    # The dates of a typed zero layer are already Datetime / Date, only the strings are parsed
+    schema = data_df.collect_schema()
+    typed  = [field for field in fields_datetime_to_format + fields_date_to_format if schema.get(field) != pl.String]
+    if typed:
+        print(f"Typed input, skipping the conversion of {typed}", flush=True)
+        fields_datetime_to_format = [field for field in fields_datetime_to_format if field not in typed]
+        fields_date_to_format     = [field for field in fields_date_to_format if field not in typed]
+
     for fields, transform in [
         (fields_datetime_to_format, datetime_transform),
         (fields_special_datetime_to_format, special_datetime_transform),
         (fields_date_to_format, date_transform),
-        (fields_tstamp_to_format, tstamp_transform),
         (fields_str_to_format, str_transform)
     ]:
         if fields:
@@ -88,7 +91,13 @@ def process_bets(source_url):
     opts = {"aws_region": "us-east-2"}
 
     actual_raw_bet = (
-        pl.scan_parquet(source_url, storage_options=opts, schema=c.BET_RAW_METADATA["schema"])
+        h.scan_parquet_partition(
+            source_url,
+            c.BET_RAW_METADATA["schema"],
+            c.BET_RAW_METADATA["information"]["field_tstamp"],
+            storage_options=opts,
+            fields_typed=c.BET_RAW_METADATA["information"]["fields_datetime"] + c.BET_RAW_METADATA["information"]["fields_date"],
+        )
         .select(c.BET_RAW_METADATA["schema"].keys())
     )
 
@@ -3,6 +3,7 @@ import polars as pl
 
 import utils.dist_information as dist
 import transformation.conversion as conv
+import utils.helpers as h
 import aws.s3 as s3
 
 from datetime import datetime, timedelta
@@ -77,6 +78,8 @@ def insert_information_into_table(
             
             old_analytics_filtered = pl.read_parquet(
                 partition_uri, storage_options=opts)
+            # Partitions written before the Tstamp was a UInt64 have it as hex strings
+            old_analytics_filtered = h.normalize_tstamp(old_analytics_filtered, 'Tstamp')
             
             missing = [c for c in schema.keys() if c not in old_analytics_filtered.columns]
             if missing:
@@ -1,33 +1,115 @@
+import time
 import polars as pl
+from concurrent.futures import ThreadPoolExecutor, wait, ALL_COMPLETED, FIRST_COMPLETED
 import aws.s3 as s3
+import aws.parquet_profiles as profiles
+import config
 
+_executor, _executor_workers = None, 0
 
-def __write_information_into_partitions(data_df: pl.DataFrame, bucket: str, data_prefix:str, partition_size: int = 100000):
+
+def _write_parquet(partition: pl.DataFrame, bucket: str, object_key: str, profile: str) -> str:
+    s3.__write_parquet(partition, bucket, object_key, profile)
+    return object_key
+
+
+class PartitionWriter:
+    """
+    Encodes and uploads the partitions on a pool of `concurrency` threads, with the shared S3
+    client. The encode of polars and the upload release the GIL, so the partitions are written
+    in parallel. At most `concurrency` partitions are in flight, so the memory stays bounded.
+    With a concurrency of 1 every partition is written before `write` returns, as before.
+
+    Args:
+        bucket (str): The target bucket.
+        profile (str): The parquet writer profile.
+        concurrency (int): Maximum partitions encoded and uploaded at the same time.
+    """
+
+    def __init__(self, bucket: str, profile: str = config.PARQUET_PROFILE, concurrency: int = config.WRITE_CONCURRENCY):
+        global _executor, _executor_workers
+        self.bucket      = bucket
+        self.profile     = profile
+        self.concurrency = max(1, concurrency)
+        self.pending     = set()
+        self.written     = 0
+        self.start       = time.perf_counter()
+
+        # A larger concurrency replaces the pool once the writes already submitted to it are over,
+        # so its threads are not leaked
+        if self.concurrency > 1 and _executor_workers < self.concurrency:
+            if _executor is not None:
+                _executor.shutdown(wait=True)
+            _executor         = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='analytics-writer')
+            _executor_workers = self.concurrency
+
+    def write(self, partition: pl.DataFrame, object_key: str) -> None:
+        """
+        Write a partition, in background when the concurrency is over 1. The partition is owned by
+        the writer from then on: polars borrows it mutably while it is encoded.
+        """
+        if self.concurrency == 1:
+            _write_parquet(partition, self.bucket, object_key, self.profile)
+            self.written += 1
+            return
+
+        while len(self.pending) >= self.concurrency:
+            self._collect(FIRST_COMPLETED)
+        self.pending.add(_executor.submit(_write_parquet, partition, self.bucket, object_key, self.profile))
+
+    def _collect(self, return_when) -> None:
+        done, self.pending = wait(self.pending, return_when=return_when)
+        for future in done:
+            future.result()  # raises the error of a failed write
+            self.written += 1
+
+    def wait(self) -> int:
+        """
+        Wait for all the partitions in flight.
+
+        Returns:
+            int: The partitions written by this writer.
+        """
+        if self.pending:
+            self._collect(ALL_COMPLETED)
+        if self.concurrency > 1:
+            print(f'{self.written} partitions written in {time.perf_counter() - self.start:.2f}s by {self.concurrency} writers', flush=True)
+        return self.written
+
+
+def __write_information_into_partitions(data_df: pl.DataFrame, bucket: str, data_prefix:str, partition_size: int = 100000, profile: str = config.PARQUET_PROFILE, writer: PartitionWriter = None):
     print("Writing data into partition", data_prefix, flush=True)
+    own_writer      = writer is None
+    writer          = writer or PartitionWriter(bucket, profile)
     partition_index = 0
     for i in range(0, data_df.height, partition_size): 
         partition       = data_df.slice(i, partition_size)
-        object_key      = f'{data_prefix}part_{partition_index:012d}.snappy.parquet'
+        object_key      = f'{data_prefix}part_{partition_index:012d}{profiles.extension(profile)}'
         partition_index += 1
 
         print("Upload to", bucket, object_key)
 
-        s3.__write_parquet(partition, bucket, object_key)
+        writer.write(partition, object_key)
         del partition
 
+    if own_writer:
+        writer.wait()
     return partition_index
 
 
-def __write_information_bactches(data_df: pl.DataFrame, bucket: str, data_prefix:str, batch_size: int = 400000, partition_size: int = 100000):
+def __write_information_bactches(data_df: pl.DataFrame, bucket: str, data_prefix:str, batch_size: int = 400000, partition_size: int = 100000, profile: str = config.PARQUET_PROFILE):
 
+    # One writer for the whole day, so the batches do not wait for each other
+    writer      = PartitionWriter(bucket, profile)
     batch_index = 0
     for i in range(0, data_df.height, batch_size): 
         batch_df     = data_df.slice(i, batch_size)
         _data_prefix = f'{data_prefix}batch={batch_index:012d}/'
         batch_index  += 1
         
-        __write_information_into_partitions(batch_df, bucket, _data_prefix, partition_size)
-        print(f'Batch {batch_index} on {_data_prefix} was written successfully')
+        __write_information_into_partitions(batch_df, bucket, _data_prefix, partition_size, profile, writer)
+        print(f'Batch {batch_index} on {_data_prefix} was {"written successfully" if writer.concurrency == 1 else "queued"}')
         del batch_df
 
+    writer.wait()
     return batch_index
\ No newline at end of file
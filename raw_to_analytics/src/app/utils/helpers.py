@@ -1,10 +1,11 @@
-from typing import Optional, List, Any
+from typing import Optional, List, Any, Union
 import polars as pl
 import io
-import boto3
 from urllib.parse import urlparse
 
-s3 = boto3.client("s3")
+from aws.session import get_client
+
+s3 = get_client("s3")
 
 
 def format_date(date: Optional[str]) -> Optional[str]:
@@ -32,6 +33,51 @@ def format_tstamp(tstamp: str) -> str:
     return "0x" + tstamp.upper() if tstamp[:2] != '0x' and len(tstamp) == 16 else "0x" + tstamp[2:].upper()
 
 
+def parse_tstamp_expr(field: str) -> pl.Expr:
+    """
+    Parse a column of hex tstamps ('0x' + 16 hex digits) into UInt64, without Python calls per
+    row. The integer parser of polars is signed, so the high and low 32 bits are parsed apart.
+
+    Args:
+        field (str): The name of the column.
+
+    Returns:
+        pl.Expr: The rowversions as UInt64.
+    """
+    hexa = pl.col(field).str.strip_prefix("0x").str.strip_prefix("0X").str.zfill(16)
+    high = hexa.str.slice(0, 8).str.to_integer(base=16).cast(pl.UInt64)
+    low  = hexa.str.slice(8, 8).str.to_integer(base=16).cast(pl.UInt64)
+    return (high * pl.lit(1 << 32, dtype=pl.UInt64) + low).alias(field)
+
+
+def normalize_tstamp(data_df: Union[pl.DataFrame, pl.LazyFrame], field: str = 'tstamp') -> Union[pl.DataFrame, pl.LazyFrame]:
+    """
+    Parse the tstamp column when it is still a hex string (files written before it was UInt64).
+
+    Args:
+        data_df (pl.DataFrame | pl.LazyFrame): The data.
+        field (str): The name of the tstamp column.
+
+    Returns:
+        data_df (pl.DataFrame | pl.LazyFrame): The data with a UInt64 tstamp.
+    """
+    schema = data_df.collect_schema() if isinstance(data_df, pl.LazyFrame) else data_df.schema
+    return data_df.with_columns(parse_tstamp_expr(field)) if schema.get(field) == pl.String else data_df
+
+def format_date_expr(field: str) -> pl.Expr:
+    """
+    Vectorized version of `format_date` for a string column.
+
+    Args:
+        field (str): The name of the column.
+
+    Returns:
+        pl.Expr: The padded date strings.
+    """
+    col = pl.col(field)
+    return pl.when(col.str.len_chars() == 19).then(col + ".000").otherwise(col.str.pad_end(23, "0"))
+
+
 def remove_fields(record: dict, fields_to_keep: list) -> dict:
     """
     A function to remove useless fileds in the records
@@ -112,3 +158,43 @@ def read_csv_s3(uri: str, **kwargs) -> pl.DataFrame:
     body = s3.get_object(Bucket=bucket, Key=key)["Body"]  # StreamingBody
     # Polars acepta cualquier file-like con .read(); lo envolvemos en BytesIO por seguridad
     return pl.read_csv(io.BytesIO(body.read()), **kwargs)
+
+
+def scan_parquet_partition(
+    uri: str,
+    schema: dict,
+    tstamp_field: str = 'tstamp',
+    storage_options: Optional[dict] = None,
+    fields_typed: Optional[list] = None,
+) -> pl.LazyFrame:
+    """
+    Scan a raw partition with the schema of the table. The raw partitions are written at once
+    by zero_to_raw, so the types in their first file hold for all of them:
+
+    - the partitions written before the tstamp was a UInt64 are scanned as strings and parsed.
+    - the date columns of `fields_typed` are scanned with the type of the file, Datetime / Date
+      when they come from a typed zero layer, so the conversion skips them.
+
+    Args:
+        uri (str): The S3 URI of the partition.
+        schema (dict): The polars schema of the table.
+        tstamp_field (str): The name of the tstamp column.
+        storage_options (dict): Options of the object store.
+        fields_typed (list): The date columns that can be typed in the files.
+
+    Returns:
+        data (pl.LazyFrame): The data of the partition, with a UInt64 tstamp.
+    """
+    p      = urlparse(uri)
+    page   = s3.list_objects_v2(Bucket=p.netloc, Prefix=p.path.lstrip("/"))
+    first  = next((obj["Key"] for obj in page.get("Contents", []) if obj["Key"].endswith(".parquet")), None)
+    fields = [tstamp_field] + [field for field in (fields_typed or []) if field in schema]
+    dtypes = {field: schema[field] for field in fields}
+    if first is not None:
+        file_schema = pl.scan_parquet(f"s3://{p.netloc}/{first}", storage_options=storage_options).collect_schema()
+        dtypes      = {field: file_schema.get(field, dtype) for field, dtype in dtypes.items()}
+
+    if dtypes[tstamp_field] == pl.String:
+        print(f"[WARN] {uri} has the legacy string {tstamp_field}, it is parsed into UInt64", flush=True)
+    data_df = pl.scan_parquet(uri, storage_options=storage_options, schema={**schema, **dtypes})
+    return normalize_tstamp(data_df, tstamp_field)
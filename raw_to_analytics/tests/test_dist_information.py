@@ -0,0 +1,78 @@
+import pytest
+from unittest.mock import patch
+import sys
+import os
+
+import polars as pl
+
+# Add src/app to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
+
+import utils.dist_information as dist
+
+write_batches = getattr(dist, '__write_information_bactches')
+
+
+@pytest.fixture
+def written():
+    """The partitions sent to S3, by object key"""
+    written = {}
+
+    def write_parquet(partition, bucket, object_key, profile):
+        written[object_key] = partition
+        return object_key
+
+    with patch('utils.dist_information._write_parquet', write_parquet):
+        yield written
+
+
+class TestPartitionWriter:
+    """Unit tests for the shared pool of the partition writers"""
+
+    @pytest.fixture(autouse=True)
+    def pool(self):
+        with patch.multiple('utils.dist_information', _executor=None, _executor_workers=0):
+            yield
+            if dist._executor is not None:
+                dist._executor.shutdown(wait=True)
+
+    def test_pool_is_reused(self):
+        dist.PartitionWriter('bucket', concurrency=4)
+        executor = dist._executor
+
+        dist.PartitionWriter('bucket', concurrency=2)
+        dist.PartitionWriter('bucket', concurrency=4)
+
+        assert dist._executor is executor
+        assert dist._executor_workers == 4
+
+    def test_larger_pool_shuts_down_the_previous_one(self, written):
+        """The previous pool finishes the writes submitted to it before it is replaced"""
+        writer   = dist.PartitionWriter('bucket', concurrency=2)
+        executor = dist._executor
+        for i in range(4):
+            writer.write(pl.DataFrame({'row': [i]}), f'analytics/part_{i:012d}.snappy.parquet')
+
+        dist.PartitionWriter('bucket', concurrency=8)
+
+        assert executor._shutdown
+        assert dist._executor is not executor
+        assert dist._executor_workers == 8
+        assert writer.wait() == 4
+        assert len(written) == 4
+
+    def test_batches_and_partitions(self, written):
+        """A partition never crosses the end of a batch"""
+        data_df = pl.DataFrame({'row': list(range(57))})
+
+        assert write_batches(data_df, 'bucket', 'analytics/', batch_size=25, partition_size=10, profile='snappy') == 3
+
+        assert {key[len('analytics/'):]: written[key]['row'].to_list() for key in sorted(written)} == {
+            'batch=000000000000/part_000000000000.snappy.parquet': list(range(0, 10)),
+            'batch=000000000000/part_000000000001.snappy.parquet': list(range(10, 20)),
+            'batch=000000000000/part_000000000002.snappy.parquet': list(range(20, 25)),
+            'batch=000000000001/part_000000000000.snappy.parquet': list(range(25, 35)),
+            'batch=000000000001/part_000000000001.snappy.parquet': list(range(35, 45)),
+            'batch=000000000001/part_000000000002.snappy.parquet': list(range(45, 50)),
+            'batch=000000000002/part_000000000000.snappy.parquet': list(range(50, 57)),
+        }
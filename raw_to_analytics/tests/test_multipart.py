@@ -0,0 +1,127 @@
+import io
+import pytest
+import threading
+from unittest.mock import patch
+import sys
+import os
+
+import polars as pl
+
+# Add src/app to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
+
+import aws.parquet_profiles as profiles
+from aws.multipart import MultipartWriter, MIN_PART_SIZE
+
+
+class FakeS3:
+    """S3 client with the multipart calls, that keeps the uploaded parts"""
+
+    def __init__(self, fail_part: int = None):
+        self.fail_part = fail_part
+        self.parts     = {}
+        self.objects   = {}
+        self.aborted   = []
+        self._lock     = threading.Lock()
+
+    def create_multipart_upload(self, Bucket, Key):
+        return {'UploadId': 'upload-1'}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        if PartNumber == self.fail_part:
+            raise OSError(f'part {PartNumber} failed')
+        with self._lock:
+            self.parts[PartNumber] = bytes(Body)
+        return {'ETag': f'"etag-{PartNumber}"', 'ChecksumCRC32': f'crc-{PartNumber}'}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        numbers = [part['PartNumber'] for part in MultipartUpload['Parts']]
+        assert numbers == list(range(1, len(numbers) + 1))
+        assert all(part['ETag'] == f'"etag-{part["PartNumber"]}"' for part in MultipartUpload['Parts'])
+        self.objects[Key] = b''.join(self.parts[number] for number in numbers)
+
+    def put_object(self, Bucket, Key, Body):
+        self.objects[Key] = Body
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.aborted.append(UploadId)
+
+
+def writer(client: FakeS3, **kwargs) -> MultipartWriter:
+    with patch('aws.multipart.session.get_client', return_value=client):
+        return MultipartWriter('bucket', 'analytics/part_000000000000.snappy.parquet', **{'part_size': MIN_PART_SIZE, 'max_in_flight': 2, **kwargs})
+
+
+def payload(size: int) -> bytes:
+    return bytes(i % 251 for i in range(size))
+
+
+class TestMultipartWriter:
+    """Unit tests for the streaming multipart upload"""
+
+    def test_parts_and_complete(self):
+        """Every full part is uploaded while writing, the last one on exit, in order"""
+        client = FakeS3()
+        data   = payload(MIN_PART_SIZE * 2 + 12345)
+
+        with writer(client) as file:
+            for i in range(0, len(data), 1000003):
+                file.write(data[i:i + 1000003])
+            assert file.tell() == len(data)
+
+        assert sorted(len(part) for part in client.parts.values()) == [12345, MIN_PART_SIZE, MIN_PART_SIZE]
+        assert client.objects['analytics/part_000000000000.snappy.parquet'] == data
+        assert client.aborted == []
+        assert file.closed
+
+    def test_small_object_is_a_single_put(self):
+        client = FakeS3()
+
+        with writer(client) as file:
+            file.write(b'small')
+
+        assert client.parts == {}
+        assert client.objects['analytics/part_000000000000.snappy.parquet'] == b'small'
+
+    def test_failed_part_aborts_the_upload(self):
+        """The error of a part is raised and the upload is aborted, so no object is created"""
+        client = FakeS3(fail_part=2)
+
+        with pytest.raises(OSError, match='part 2 failed'):
+            with writer(client, max_in_flight=1) as file:
+                file.write(payload(MIN_PART_SIZE * 3))
+
+        assert client.aborted == ['upload-1']
+        assert client.objects == {}
+
+    def test_error_in_the_block_aborts_the_upload(self):
+        client = FakeS3()
+
+        with pytest.raises(ValueError):
+            with writer(client) as file:
+                file.write(payload(MIN_PART_SIZE + 1))
+                raise ValueError('encoder failed')
+
+        assert client.aborted == ['upload-1']
+        assert client.objects == {}
+
+    def test_write_after_close(self):
+        file = writer(FakeS3())
+        file.close()
+
+        with pytest.raises(ValueError):
+            file.write(b'late')
+
+    def test_part_size_lower_bound(self):
+        assert writer(FakeS3(), part_size=1024).part_size == MIN_PART_SIZE
+
+    def test_parquet_round_trip(self):
+        """A parquet file encoded into the writer is read back as it was written"""
+        client  = FakeS3()
+        data_df = pl.DataFrame({'transId': range(200000), 'payload': [os.urandom(64) for _ in range(200000)]})
+
+        with writer(client) as file:
+            profiles.write_parquet(data_df, file, 'snappy')
+
+        assert len(client.parts) > 1
+        assert pl.read_parquet(io.BytesIO(client.objects['analytics/part_000000000000.snappy.parquet'])).equals(data_df)
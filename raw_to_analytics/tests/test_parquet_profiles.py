@@ -0,0 +1,59 @@
+import pytest
+import sys
+import os
+
+import polars as pl
+import pyarrow.parquet as pq
+
+# Add src/app to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
+
+import aws.parquet_profiles as profiles
+
+# Row group size of the polars writer when a profile has none
+DEFAULT_ROW_GROUP_SIZE = 512 ** 2
+
+
+class TestParquetProfiles:
+    """Unit tests for the named parquet writer profiles"""
+
+    def test_unknown_profile(self):
+        with pytest.raises(ValueError, match="Unknown parquet profile 'fast'"):
+            profiles.get_profile('fast')
+        with pytest.raises(ValueError):
+            profiles.extension('fast')
+        with pytest.raises(ValueError):
+            profiles.write_parquet(pl.DataFrame({'transId': [1]}), 'unused.parquet', 'fast')
+
+    @pytest.mark.parametrize('name, expected', [
+        ('snappy', '.snappy.parquet'),
+        ('write', '.lz4.parquet'),
+        ('archive', '.zstd.parquet'),
+        ('read', '.zstd.parquet'),
+    ])
+    def test_extension(self, name, expected):
+        assert profiles.extension(name) == expected
+
+    @pytest.mark.parametrize('name', list(profiles.PROFILES))
+    def test_write_parquet_round_trip(self, name, tmp_path):
+        """The file is read back as written, with the codec, row groups and statistics of the profile"""
+        profile = profiles.get_profile(name)
+        path    = tmp_path / f'part{profiles.extension(name)}'
+        data_df = pl.DataFrame({
+            'transId' : range(DEFAULT_ROW_GROUP_SIZE * 2),
+            'customer': [f'c{i % 50}' for i in range(DEFAULT_ROW_GROUP_SIZE * 2)],
+        })
+
+        profiles.write_parquet(data_df, str(path), name)
+
+        assert pl.read_parquet(path).equals(data_df)
+        metadata       = pq.ParquetFile(path).metadata
+        row_group_size = profile['row_group_size'] or DEFAULT_ROW_GROUP_SIZE
+        assert metadata.num_row_groups == data_df.height // row_group_size
+        for index in range(metadata.num_row_groups):
+            row_group = metadata.row_group(index)
+            assert row_group.num_rows == row_group_size
+            for column in range(row_group.num_columns):
+                assert row_group.column(column).compression == profile['compression'].upper()
+                assert row_group.column(column).is_stats_set == bool(profile['statistics'])
+        assert metadata.row_group(1).column(0).statistics.min == row_group_size
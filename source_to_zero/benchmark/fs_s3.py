@@ -0,0 +1,126 @@
+"""
+Filesystem stand-in of the S3 client, with the calls used by the poller: put_object, get_object,
+head_object, delete_object, delete_objects and the list_objects_v2 paginator (Prefix, Delimiter, StartAfter).
+
+Objects are files under `root/<bucket>/<key>`. It is injected as the process-wide client of
+`aws.s3`, so the poller, the checkpoint and the upload executor write to disk without AWS.
+"""
+import io
+import os
+import threading
+from datetime import datetime, timezone
+
+
+class NoSuchKey(Exception):
+    pass
+
+
+class _Exceptions:
+    NoSuchKey = NoSuchKey
+
+
+class _Paginator:
+
+    def __init__(self, client, page_size: int = 1000):
+        self.client    = client
+        self.page_size = page_size
+
+    def paginate(self, Bucket: str, Prefix: str = '', Delimiter: str = '', StartAfter: str = ''):
+        keys = [key for key in self.client._keys(Bucket) if key.startswith(Prefix) and key > StartAfter]
+
+        contents, prefixes = [], []
+        for key in keys:
+            rest = key[len(Prefix):]
+            if Delimiter and Delimiter in rest:
+                common = Prefix + rest.split(Delimiter, 1)[0] + Delimiter
+                if not prefixes or prefixes[-1] != common:
+                    prefixes.append(common)
+            else:
+                contents.append(key)
+
+        entries = [('key', key) for key in contents] + [('prefix', prefix) for prefix in prefixes]
+        entries.sort(key=lambda entry: entry[1])
+        for start in range(0, max(1, len(entries)), self.page_size):
+            chunk = entries[start:start + self.page_size]
+            page  = {'KeyCount': len(chunk)}
+            if any(kind == 'key' for kind, _ in chunk):
+                page['Contents'] = [self.client._describe(Bucket, key) for kind, key in chunk if kind == 'key']
+            if any(kind == 'prefix' for kind, _ in chunk):
+                page['CommonPrefixes'] = [{'Prefix': prefix} for kind, prefix in chunk if kind == 'prefix']
+            yield page
+
+
+class FilesystemS3:
+    """
+    Args:
+        root (str): Folder holding one sub folder per bucket.
+    """
+
+    exceptions = _Exceptions
+
+    def __init__(self, root: str):
+        self.root       = root
+        self.n_puts     = 0
+        self.bytes_put  = 0
+        self._lock      = threading.Lock()
+
+    def _path(self, bucket: str, key: str) -> str:
+        return os.path.join(self.root, bucket, *key.split('/'))
+
+    def _keys(self, bucket: str) -> list:
+        base = os.path.join(self.root, bucket)
+        keys = []
+        for folder, _, files in os.walk(base):
+            for name in files:
+                if not name.endswith('.part'):
+                    keys.append(os.path.relpath(os.path.join(folder, name), base).replace(os.sep, '/'))
+        return sorted(keys)
+
+    def _describe(self, bucket: str, key: str) -> dict:
+        stat = os.stat(self._path(bucket, key))
+        return {'Key': key, 'Size': stat.st_size, 'LastModified': datetime.fromtimestamp(stat.st_mtime, timezone.utc)}
+
+    def put_object(self, Bucket: str, Key: str, Body, **kwargs) -> dict:
+        data = Body.read() if hasattr(Body, 'read') else Body
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+
+        path = self._path(Bucket, Key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(f'{path}.part', 'wb') as f:
+            f.write(data)
+        os.replace(f'{path}.part', path)
+
+        with self._lock:
+            self.n_puts    += 1
+            self.bytes_put += len(data)
+        return {}
+
+    def get_object(self, Bucket: str, Key: str, **kwargs) -> dict:
+        path = self._path(Bucket, Key)
+        if not os.path.exists(path):
+            raise NoSuchKey(Key)
+        with open(path, 'rb') as f:
+            return {'Body': io.BytesIO(f.read()), 'ContentLength': os.path.getsize(path)}
+
+    def head_object(self, Bucket: str, Key: str, **kwargs) -> dict:
+        if not os.path.exists(self._path(Bucket, Key)):
+            raise NoSuchKey(Key)
+        return self._describe(Bucket, Key)
+
+    def delete_object(self, Bucket: str, Key: str, **kwargs) -> dict:
+        try:
+            os.remove(self._path(Bucket, Key))
+        except FileNotFoundError:
+            pass
+        return {}
+
+    def delete_objects(self, Bucket: str, Delete: dict, **kwargs) -> dict:
+        for obj in Delete['Objects']:
+            self.delete_object(Bucket, obj['Key'])
+        return {}
+
+    def get_paginator(self, operation: str) -> _Paginator:
+        if operation != 'list_objects_v2':
+            raise NotImplementedError(operation)
+        return _Paginator(self)
@@ -0,0 +1,96 @@
+"""
+Benchmark of the parquet writer profiles (`aws/parquet_profiles.py`) on synthetic bets.
+
+For every profile it reports the file size, the encode time, and the time of three downstream
+scans of the file: all the columns, a projection of a few columns, and a selective filter on
+the tstamp (1% of the rows) that can skip row groups and pages with the statistics.
+
+    python benchmark/parquet_profiles.py --rows 200000 --repeat 3
+"""
+import argparse
+import io
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR       = os.path.join(BENCHMARK_DIR, '..', 'src', 'app')
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, BENCHMARK_DIR)
+
+import polars as pl
+
+import aws.parquet_profiles as profiles
+import schema.raw as raw
+import utils.helpers as h
+from replay_server import synthetic_pages
+
+PROJECTION = ['customer', 'transId', 'stake', 'winlost', 'modifyDate']
+
+
+def synthetic_bets(rows: int, page_size: int = 10000) -> pl.DataFrame:
+    schema = raw.BETS_INFORMATION_RAW['schema']
+    pages  = synthetic_pages(max(1, rows // page_size), min(rows, page_size))
+    return pl.concat([h.records_to_frame(page['bets'], schema) for page in pages], how='vertical')
+
+
+def timed(function, repeat: int) -> float:
+    """
+    Returns:
+        float: The median seconds of `repeat` calls.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def bench_profile(data: pl.DataFrame, name: str, folder: str, repeat: int) -> dict:
+    path = os.path.join(folder, f'bets{profiles.extension(name)}')
+
+    encode = timed(lambda: profiles.write_parquet(data, io.BytesIO(), name), repeat)
+    profiles.write_parquet(data, path, name)
+
+    low, high = data['tstamp'].quantile(0.50), data['tstamp'].quantile(0.51)
+    return {
+        'profile'         : name,
+        'size_mb'         : round(os.path.getsize(path) / 1024 / 1024, 2),
+        'encode_s'        : round(encode, 3),
+        'scan_all_s'      : round(timed(lambda: pl.read_parquet(path), repeat), 3),
+        'scan_columns_s'  : round(timed(lambda: pl.scan_parquet(path).select(PROJECTION).collect(), repeat), 3),
+        'scan_filter_s'   : round(timed(lambda: pl.scan_parquet(path).filter(pl.col('tstamp').is_between(low, high)).collect(), repeat), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--profiles', default=','.join(profiles.PROFILES), help='Comma separated profiles')
+    parser.add_argument('--output', help='Write the report as JSON into this file')
+    args = parser.parse_args()
+
+    print(f'Generating {args.rows} bets ...')
+    data   = synthetic_bets(args.rows)
+    folder = tempfile.mkdtemp(prefix='parquet-profiles-')
+    print(f'{data.height} bets, {data.estimated_size() / 1024 / 1024:.1f} MB in memory')
+
+    try:
+        report = [bench_profile(data, name, folder, args.repeat) for name in args.profiles.split(',')]
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    print(pl.DataFrame(report))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+"""
+Replay server of the bets API: serves `{"bets", "maxTimestamp", "maxMobiusModifiedOn"}` pages
+for `GET <path>?timestamp=0x...`, with a configurable latency.
+
+The pages are either synthetic (records generated from the schema of `schema/raw.py`) or
+recorded: a folder of JSON files (one page per file, in name order) or a JSONL file with one
+page per line. A request gets the first page whose maxTimestamp is greater than the requested
+timestamp, or an empty page when everything was served.
+
+    python replay_server.py --pages 50 --page-size 1000 --latency-ms 80 --port 8765
+"""
+import argparse
+import bisect
+import gzip
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'app'))
+
+import polars as pl
+
+import schema.raw as raw
+
+# Old enough for any DELAY_TIME, so the poller never waits for the data
+MAX_MOBIUS_MODIFIED_ON = '2000-01-01T00:00:00.000'
+
+
+def _value(dtype, rng: random.Random):
+    if dtype == pl.String:
+        return ''.join(rng.choices('abcdefghijklmnopqrstuvwxyz0123456789', k=rng.randint(4, 16)))
+    if dtype == pl.Boolean:
+        return rng.random() < 0.5
+    if dtype.is_integer():
+        return rng.randint(0, 30000)
+    if dtype.is_float():
+        return round(rng.uniform(-1000, 1000), 4)
+    if isinstance(dtype, pl.List):
+        return [_value(dtype.inner, rng) for _ in range(rng.randint(0, 3))]
+    if isinstance(dtype, pl.Struct):
+        return {field.name: _value(field.dtype, rng) for field in dtype.fields}
+    return None
+
+
+def synthetic_pages(n_pages: int, page_size: int, seed: int = 7, start: datetime = datetime(2025, 1, 1, 8), update_rate: float = 0) -> list:
+    """
+    Generate pages of bets with consecutive tstamps and a modifyDate one second apart.
+    A fraction `update_rate` of the records are new versions of a bet of the last `page_size`
+    records (same customer and transId), as the API returns the bets modified again.
+
+    Returns:
+        pages (list): The page bodies as dicts.
+    """
+    rng      = random.Random(seed)
+    schema   = raw.BETS_INFORMATION_RAW['schema']
+    template = [{field: _value(dtype, rng) for field, dtype in schema.items()} for _ in range(min(page_size, 500))]
+
+    pages = []
+    for page in range(n_pages):
+        bets = []
+        for i in range(page_size):
+            n          = page * page_size + i + 1
+            date       = (start + timedelta(seconds=n)).strftime('%Y-%m-%dT%H:%M:%S.%f')[:23]
+            bet_id     = rng.randint(max(1, n - page_size), n - 1) if n > 1 and rng.random() < update_rate else n
+            bet        = dict(template[bet_id % len(template)])
+            bet.update(refno=bet_id, transId=bet_id, transDate=date, checkTime=date, modifyDate=date, settledTime=date, winlostdate=date[:10] + 'T00:00:00', tstamp='0x%016X' % n)
+            bets.append(bet)
+        pages.append({'bets': bets, 'maxTimestamp': '%016x' % (page * page_size + page_size), 'maxMobiusModifiedOn': MAX_MOBIUS_MODIFIED_ON})
+    return pages
+
+
+def recorded_pages(path: str) -> list:
+    """
+    Read recorded pages from a folder of JSON files or from a JSONL file.
+    """
+    if os.path.isdir(path):
+        pages = []
+        for name in sorted(os.listdir(path)):
+            if name.endswith('.json'):
+                with open(os.path.join(path, name)) as f:
+                    pages.append(json.load(f))
+        return pages
+
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class ReplayServer:
+    """
+    Args:
+        pages (list): The page bodies, sorted by maxTimestamp.
+        latency (float): Seconds waited before every response.
+        port (int): Local port, 0 to pick a free one.
+        compress (bool): Gzip the responses when the client accepts it.
+    """
+
+    def __init__(self, pages: list, latency: float = 0.0, port: int = 0, compress: bool = True):
+        self.latency   = latency
+        self.compress  = compress
+        self.bodies    = [json.dumps(page).encode('utf-8') for page in pages]
+        self.max_ts    = [int(page['maxTimestamp'], 16) for page in pages]
+        self.n_records = sum(len(page['bets']) for page in pages)
+        self.requests  = []  # (perf_counter, page index or None)
+        self._lock     = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                timestamp = parse_qs(urlparse(self.path).query).get('timestamp', ['0x0'])[0]
+                body, page = server.page_after(int(timestamp, 16))
+
+                if server.latency:
+                    time.sleep(server.latency)
+
+                headers = {'Content-Type': 'application/json'}
+                if server.compress and 'gzip' in self.headers.get('Accept-Encoding', ''):
+                    body = gzip.compress(body, compresslevel=1)
+                    headers['Content-Encoding'] = 'gzip'
+
+                self.send_response(200)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+                with server._lock:
+                    server.requests.append((time.perf_counter(), page))
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd  = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.port   = self.httpd.server_address[1]
+        self.url    = f'http://127.0.0.1:{self.port}/bets'
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='replay-server', daemon=True)
+
+    def page_after(self, timestamp: int) -> tuple:
+        index = bisect.bisect_right(self.max_ts, timestamp)
+        if index < len(self.bodies):
+            return self.bodies[index], index
+
+        last = '%016x' % max([timestamp] + self.max_ts[-1:])
+        return json.dumps({'bets': [], 'maxTimestamp': last, 'maxMobiusModifiedOn': MAX_MOBIUS_MODIFIED_ON}).encode('utf-8'), None
+
+    @property
+    def last_tstamp(self) -> str:
+        return '0x%016X' % self.max_ts[-1] if self.max_ts else '0x'
+
+    def start(self) -> 'ReplayServer':
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, default=50)
+    parser.add_argument('--page-size', type=int, default=1000)
+    parser.add_argument('--update-rate', type=float, default=0, help='Fraction of synthetic records that are new versions of a recent bet')
+    parser.add_argument('--recorded', help='Folder of JSON pages or JSONL file, instead of synthetic pages')
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    pages  = recorded_pages(args.recorded) if args.recorded else synthetic_pages(args.pages, args.page_size, update_rate=args.update_rate)
+    server = ReplayServer(pages, args.latency_ms / 1000, args.port)
+    print(f'Serving {len(pages)} pages ({server.n_records} bets) on {server.url}, last tstamp {server.last_tstamp}')
+    server.httpd.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""
+End-to-end benchmark of the NRT poller without the bets API nor S3.
+
+The poller (`nrt_bets.py` or `nrt_tables.py`) runs in a child process against the replay server,
+with the filesystem S3 stand-in as its S3 client, until the checkpoint reaches the last tstamp
+served. The report has the records per second, the p50/p99 latency of an iteration (time
+between two page requests), the peak RSS of the poller and the files written.
+
+    python benchmark/run_nrt.py --pages 50 --page-size 1000 --latency-ms 50 --env PIPELINE_MODE=true
+"""
+import argparse
+import json
+import os
+import resource
+import runpy
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR       = os.path.join(BENCHMARK_DIR, '..', 'src', 'app')
+BUCKET        = 'benchmark'
+OBJECT_KEY    = 'zero/bets/'
+
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def run_child(fs_root: str, script: str) -> None:
+    """
+    Entry point of the poller process: install the filesystem S3 client and run the script.
+    """
+    sys.path.insert(0, APP_DIR)
+    sys.path.insert(0, BENCHMARK_DIR)
+
+    # The pollers set the allocator options before polars is loaded, and aws.s3 loads it first here
+    os.environ.setdefault('_RJEM_MALLOC_CONF', 'background_thread:true,dirty_decay_ms:1000,muzzy_decay_ms:0')
+
+    import aws.s3 as s3
+    from fs_s3 import FilesystemS3
+
+    s3._client = FilesystemS3(fs_root)
+    sys.argv   = [script, '0x0000000000000000']
+    runpy.run_path(os.path.join(APP_DIR, script), run_name='__main__')
+
+
+def committed_tstamp(fs_root: str, checkpoint_key: str):
+    path = os.path.join(fs_root, BUCKET, *checkpoint_key.split('/'))
+    try:
+        with open(path) as f:
+            return json.load(f)['max_tstamp']
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def written_files(fs_root: str) -> tuple:
+    import polars as pl
+
+    base  = os.path.join(fs_root, BUCKET, *OBJECT_KEY.strip('/').split('/'))
+    files = [os.path.join(folder, name) for folder, _, names in os.walk(base) for name in names if name.endswith('.parquet')]
+    rows  = sum(pl.scan_parquet(path).select(pl.len()).collect().item() for path in files)
+    size  = sum(os.path.getsize(path) for path in files)
+    return len(files), rows, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, default=50)
+    parser.add_argument('--page-size', type=int, default=1000)
+    parser.add_argument('--update-rate', type=float, default=0, help='Fraction of synthetic records that are new versions of a recent bet')
+    parser.add_argument('--recorded', help='Folder of JSON pages or JSONL file, instead of synthetic pages')
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--script', default='nrt_bets.py', help='nrt_bets.py or nrt_tables.py')
+    parser.add_argument('--env', action='append', default=[], help='KEY=VALUE passed to the poller, e.g. PIPELINE_MODE=true')
+    parser.add_argument('--timeout', type=float, default=600)
+    parser.add_argument('--output', help='Write the report as JSON into this file')
+    parser.add_argument('--keep', action='store_true', help='Keep the working folder (files, checkpoint and log)')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return run_child(args.child, args.script)
+
+    sys.path.insert(0, APP_DIR)
+    from replay_server import ReplayServer, recorded_pages, synthetic_pages
+
+    print('Preparing the pages ...')
+    pages  = recorded_pages(args.recorded) if args.recorded else synthetic_pages(args.pages, args.page_size, update_rate=args.update_rate)
+    server = ReplayServer(pages, args.latency_ms / 1000).start()
+    del pages
+
+    workdir = tempfile.mkdtemp(prefix='nrt-benchmark-')
+    fs_root = os.path.join(workdir, 's3')
+    env     = dict(
+        os.environ,
+        ROOT_API_ENDPOINT=server.url,
+        BUCKET_TARGET=BUCKET,
+        OBJECT_KEY=OBJECT_KEY,
+        CHECKPOINT_FILE=os.path.join(workdir, 'checkpoint.json'),
+        SPOOL_DIR=os.path.join(workdir, 'spool'),
+        FLUSH_MAX_AGE_SECONDS='1',
+        POLL_MAX_INTERVAL='1',
+        PYTHONUNBUFFERED='1',
+    )
+    env.update(item.split('=', 1) for item in args.env)
+    checkpoint_key = env.get('CHECKPOINT_KEY', f'{OBJECT_KEY}_checkpoint/state.json')
+
+    print(f'Running {args.script} over {len(server.bodies)} pages ({server.n_records} bets) ...')
+    log_path = os.path.join(workdir, 'poller.log')
+    with open(log_path, 'w') as log:
+        start = time.perf_counter()
+        child = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), '--child', fs_root, '--script', args.script],
+            cwd=APP_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+        )
+
+        finished = False
+        while time.perf_counter() - start < args.timeout and child.poll() is None:
+            if committed_tstamp(fs_root, checkpoint_key) == server.last_tstamp:
+                finished = True
+                break
+            time.sleep(0.05)
+        end = time.perf_counter()
+
+        child.kill()
+        child.wait()
+    server.stop()
+
+    data_requests = [at for at, page in server.requests if page is not None]
+    iterations    = [b - a for a, b in zip(data_requests, data_requests[1:])]
+    elapsed       = end - (server.requests[0][0] if server.requests else start)
+    n_files, rows, size = written_files(fs_root)
+
+    report = {
+        'script'            : args.script,
+        'env'               : args.env,
+        'finished'          : finished,
+        'pages'             : len(server.bodies),
+        'records'           : server.n_records,
+        'records_written'   : rows,
+        'files'             : n_files,
+        'bytes_written'     : size,
+        'elapsed_s'         : round(elapsed, 3),
+        'records_per_s'     : round(server.n_records / elapsed, 1) if elapsed > 0 else None,
+        'iteration_p50_ms'  : round(percentile(iterations, 0.50) * 1000, 2),
+        'iteration_p99_ms'  : round(percentile(iterations, 0.99) * 1000, 2),
+        'peak_rss_mb'       : round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+        'log'               : log_path if args.keep else None,
+    }
+    print(json.dumps(report, indent=2))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if not args.keep:
+        shutil.rmtree(workdir, ignore_errors=True)
+    if not finished:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Micro-benchmark of the S3 client layer (`aws/session.py`) against a client built on every call,
+as the helpers of the three stages did before.
+
+It reports the median time of:
+- building a client: `boto3.client('s3')` against `session.get_client('s3')` (cached).
+- a call (ListObjectsV2 of an empty prefix) with a new client every time, and with the shared
+  client, which also keeps its connections alive between the calls.
+
+The calls go to a local stub of the S3 endpoint (no AWS account needed), or to `--endpoint-url`
+(e.g. a moto server or a real bucket with `--bucket`).
+
+    python benchmark/s3_client.py --calls 200
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR       = os.path.join(BENCHMARK_DIR, '..', 'src', 'app')
+sys.path.insert(0, APP_DIR)
+
+EMPTY_LISTING = (
+    b'<?xml version="1.0" encoding="UTF-8"?>'
+    b'<ListBucketResult xmlns="http://s3.amazonaws.com/doc/2006-03-01/">'
+    b'<Name>benchmark</Name><Prefix>none/</Prefix><KeyCount>0</KeyCount><MaxKeys>1000</MaxKeys>'
+    b'<IsTruncated>false</IsTruncated></ListBucketResult>'
+)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version        = 'HTTP/1.1'
+    disable_nagle_algorithm = True   # the kept-alive connections would wait for delayed ACKs
+    wbufsize                = 65536  # headers and body in one write
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/xml')
+        self.send_header('Content-Length', str(len(EMPTY_LISTING)))
+        self.end_headers()
+        self.wfile.write(EMPTY_LISTING)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def timed(function, repeat: int) -> float:
+    """
+    Returns:
+        float: The median milliseconds of `repeat` calls.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--endpoint-url', help='S3 endpoint, a local stub when it is not set')
+    parser.add_argument('--bucket', default='benchmark')
+    parser.add_argument('--output', help='Write the report as JSON into this file')
+    args = parser.parse_args()
+
+    stub = None
+    if not args.endpoint_url:
+        stub = start_stub()
+        args.endpoint_url = f'http://127.0.0.1:{stub.server_address[1]}'
+        os.environ.setdefault('AWS_ACCESS_KEY_ID', 'benchmark')
+        os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'benchmark')
+    os.environ['AWS_ENDPOINT_URL'] = args.endpoint_url
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-2')
+
+    import boto3
+    import aws.session as session
+
+    def list_empty(client):
+        client.list_objects_v2(Bucket=args.bucket, Prefix='none/', MaxKeys=1)
+
+    session.get_client('s3')  # the first call builds it
+    try:
+        report = {
+            'endpoint'             : args.endpoint_url,
+            'calls'                : args.calls,
+            'build_new_ms'         : round(timed(lambda: boto3.client('s3'), args.calls), 3),
+            'build_shared_ms'      : round(timed(lambda: session.get_client('s3'), args.calls), 4),
+            'call_new_client_ms'   : round(timed(lambda: list_empty(boto3.client('s3')), args.calls), 3),
+            'call_shared_client_ms': round(timed(lambda: list_empty(session.get_client('s3')), args.calls), 3),
+        }
+    finally:
+        if stub is not None:
+            stub.shutdown()
+
+    report['saving_per_call_ms'] = round(report['call_new_client_ms'] - report['call_shared_client_ms'], 3)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
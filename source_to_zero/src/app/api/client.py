@@ -0,0 +1,133 @@
+import random
+import time
+from collections import deque
+from typing import Optional
+
+import urllib3
+
+
+# Status codes that are worth retrying: throttling and transient server/gateway errors
+RETRY_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+
+class ApiClient:
+    """
+    Long-lived HTTP client for the bets API.
+
+    It keeps a pool of keep-alive connections (no TCP/TLS handshake per poll), negotiates
+    gzip/deflate compression and retries transient failures with jittered exponential backoff.
+    The latency of every attempt is recorded to measure the effect of connection reuse.
+
+    Args:
+        connect_timeout (float): Seconds to wait for the connection to be established.
+        read_timeout (float): Seconds to wait between bytes of the response.
+        max_retries (int): Retries after the first attempt before giving up.
+        backoff_base (float): Base delay in seconds of the exponential backoff.
+        backoff_max (float): Upper bound in seconds of a single backoff delay.
+        pool_size (int): Number of connections kept alive per host.
+        latency_window (int): Number of recent latencies kept for the summary.
+    """
+
+    def __init__(
+        self,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 60.0,
+        max_retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        pool_size: int = 2,
+        latency_window: int = 500,
+    ):
+        self.max_retries  = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max  = backoff_max
+        self.latencies    = deque(maxlen=latency_window)
+        self.n_requests   = 0
+        self.n_retries    = 0
+
+        self.http = urllib3.PoolManager(
+            num_pools=4,
+            maxsize=pool_size,
+            timeout=urllib3.Timeout(connect=connect_timeout, read=read_timeout),
+            retries=False,
+            headers=urllib3.make_headers(keep_alive=True, accept_encoding=True),
+        )
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Full jitter exponential backoff: a random delay between 0 and base * 2^attempt (capped).
+        """
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def get(self, url: str, preload_content: bool = True) -> urllib3.HTTPResponse:
+        """
+        Send a GET request, retrying connection errors, timeouts and transient statuses.
+
+        Args:
+            url (str): The full url to request.
+            preload_content (bool): If False the body is not read, to be consumed with `response.stream()`.
+                                    The caller must call `response.release_conn()` after reading it.
+
+        Returns:
+            urllib3.HTTPResponse: A response with status 200.
+
+        Raises:
+            ConnectionError: If the request keeps failing after all the retries.
+            Exception: If the API answers with a status that cannot be retried.
+        """
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                response = self.http.request('GET', url, preload_content=preload_content)
+                error    = None
+            except urllib3.exceptions.HTTPError as e:
+                response = None
+                error    = e
+
+            latency = time.perf_counter() - start
+            self.latencies.append(latency)
+            self.n_requests += 1
+
+            if response is not None and response.status == 200:
+                print(f"API request: {latency:.3f} seconds (attempt {attempt + 1})")
+                return response
+
+            if response is not None:
+                status = response.status
+                response.drain_conn()
+                response.release_conn()
+
+                if status not in RETRY_STATUSES:
+                    raise Exception(f"Failed to fetch data: {status}")
+                error = f"status {status}"
+
+            if attempt >= self.max_retries:
+                raise ConnectionError(f"Failed to fetch data after {attempt + 1} attempts: {error}")
+
+            delay   = self.backoff(attempt)
+            attempt += 1
+            self.n_retries += 1
+            print(f"API request failed ({error}). Retry {attempt}/{self.max_retries} in {delay:.2f}s")
+            time.sleep(delay)
+
+    def latency_summary(self) -> Optional[dict]:
+        """
+        Summary of the recent request latencies in seconds.
+
+        Returns:
+            dict: count, last, mean, p50, p95 and max latencies, or None without requests.
+        """
+        if not self.latencies:
+            return None
+
+        values = sorted(self.latencies)
+        return {
+            'count'   : self.n_requests,
+            'retries' : self.n_retries,
+            'last'    : self.latencies[-1],
+            'mean'    : sum(values) / len(values),
+            'p50'     : values[len(values) // 2],
+            'p95'     : values[min(len(values) - 1, int(len(values) * 0.95))],
+            'max'     : values[-1],
+        }
@@ -0,0 +1,102 @@
+import io
+from typing import Union
+
+import polars as pl
+
+# Named parquet writer profiles:
+# - compression / compression_level: the codec ('zstd', 'lz4' or 'snappy') and its level (zstd only).
+# - row_group_size: rows per row group, None for the default of the writer.
+# - dictionary: dictionary encoding of the columns.
+# - statistics: min/max/null count per row group (True), also the distinct count ('full'), or none.
+# - page_index: column and offset indexes, so a reader skips pages and not only row groups.
+#
+# The polars writer always uses dictionary encoding and has no page index, so the profiles without
+# dictionary or with page index are written by pyarrow.
+PROFILES = {
+    # The files written until now
+    'snappy': {
+        'compression'      : 'snappy',
+        'compression_level': None,
+        'row_group_size'   : None,
+        'dictionary'       : True,
+        'statistics'       : True,
+        'page_index'       : False,
+    },
+    # Many small files, written often and read once (zero layer): the cheapest encode
+    'write': {
+        'compression'      : 'lz4',
+        'compression_level': None,
+        'row_group_size'   : None,
+        'dictionary'       : True,
+        'statistics'       : True,
+        'page_index'       : False,
+    },
+    # Large files kept for a long time and read by day (raw layer): the smallest files
+    'archive': {
+        'compression'      : 'zstd',
+        'compression_level': 9,
+        'row_group_size'   : 262144,
+        'dictionary'       : True,
+        'statistics'       : True,
+        'page_index'       : False,
+    },
+    # Files read far more often than written (analytics layer): cheap decode, small row groups
+    # with statistics and page index for the predicate pushdown of the readers
+    'read': {
+        'compression'      : 'zstd',
+        'compression_level': 3,
+        'row_group_size'   : 65536,
+        'dictionary'       : True,
+        'statistics'       : True,
+        'page_index'       : True,
+    },
+}
+
+
+def get_profile(name: str) -> dict:
+    """
+    Args:
+        name (str): The name of the profile.
+
+    Returns:
+        profile (dict): The writer options of the profile.
+    """
+    if name not in PROFILES:
+        raise ValueError(f"Unknown parquet profile '{name}', use one of {', '.join(PROFILES)}")
+    return PROFILES[name]
+
+
+def extension(name: str) -> str:
+    """
+    The file extension of a profile, e.g. '.snappy.parquet'.
+    """
+    return f".{get_profile(name)['compression']}.parquet"
+
+
+def write_parquet(data: pl.DataFrame, file: Union[str, io.IOBase], name: str = 'snappy') -> None:
+    """
+    Write a dataframe as parquet with the options of a profile.
+
+    Args:
+        data (pl.DataFrame): The data.
+        file (str | io.IOBase): The path, or the file object (a buffer, a multipart upload) where
+                                the file is written.
+        name (str): The name of the profile.
+    """
+    profile = get_profile(name)
+    options = {
+        'compression'      : profile['compression'],
+        'compression_level': profile['compression_level'],
+        'row_group_size'   : profile['row_group_size'],
+    }
+
+    if profile['page_index'] or not profile['dictionary']:
+        data.write_parquet(
+            file,
+            **options,
+            statistics=bool(profile['statistics']),
+            use_pyarrow=True,
+            pyarrow_options={'use_dictionary': profile['dictionary'], 'write_page_index': profile['page_index']},
+        )
+    else:
+        data.write_parquet(file, **options, statistics=profile['statistics'])
@@ -1,11 +1,45 @@
-import boto3
 import io
 
 import polars as pl
 from typing import Any, List, Dict
 
+import aws.parquet_profiles as profiles
+import aws.session as session
 
-def __write_parquet(data: pl.DataFrame, bucket: str, filename: str) -> None:
+_client = None
+
+
+def get_client():
+    """
+    Process-wide S3 client (see `aws.session`), shared by all the upload workers. The benchmarks
+    replace it with a stand-in.
+    """
+    global _client
+
+    if _client is None:
+        _client = session.get_client('s3')
+    return _client
+
+
+def __encode_parquet(data: pl.DataFrame, profile: str = 'snappy') -> io.BytesIO:
+    """
+    To serialise a dataframe as a parquet file in memory.
+
+    Args:
+        data (): the data in polars dataframe (not a lazyframe)
+        profile (str): The parquet writer profile, see `aws.parquet_profiles`.
+
+    Returns:
+        buffer (io.BytesIO): The parquet file, ready to be read from the start.
+    """
+
+    buffer = io.BytesIO()
+    profiles.write_parquet(data, buffer, profile)
+    buffer.seek(0)
+    return buffer
+
+
+def __write_parquet(data: pl.DataFrame, bucket: str, filename: str, profile: str = 'snappy') -> None:
     """
     To write parquet file into S3 bucket.
 
@@ -13,13 +47,24 @@ def __write_parquet(data: pl.DataFrame, bucket: str, filename: str) -> None:
         data (): the data in polars dataframe (not a lazyframe)
         bucket (str): the target bucket
         filename (str); The name of the object that will be put in the bucket.  
+        profile (str): The parquet writer profile, see `aws.parquet_profiles`.
     """
 
-    s3_client = boto3.client('s3')
-    buffer    = io.BytesIO()
-    
-    data.write_parquet(buffer, compression="snappy")
-    buffer.seek(0)
+    buffer = __encode_parquet(data, profile)
+    __put_buffer(buffer, bucket, filename)
+
+
+def __put_buffer(buffer: io.BytesIO, bucket: str, filename: str) -> None:
+    """
+    To put an encoded file into S3 bucket.
+
+    Args:
+        buffer (io.BytesIO): The encoded file, read from the start.
+        bucket (str): the target bucket
+        filename (str); The name of the object that will be put in the bucket.
+    """
+
+    s3_client = get_client()
     s3_client.put_object(Bucket=bucket, Key=filename, Body=buffer)
     
 
@@ -37,7 +82,7 @@ def get_objects(
     Returns:
         List[str]: A list of object names extracted from the S3 keys.
     """
-    s3_client = boto3.client('s3')
+    s3_client = get_client()
     paginator = s3_client.get_paginator('list_objects_v2')
     
     files: List[str] = []
@@ -52,4 +97,73 @@ def get_objects(
 
 
 
-    
\ No newline at end of file
+    
+
+def get_prefixes(
+    bucket: str,
+    object_prefix: str
+) -> List[str]:
+    """
+    Retrieves the "folders" right under a prefix, using a delimiter listing (CommonPrefixes),
+    without listing the objects inside them.
+
+    Parameters:
+        bucket (str): The S3 bucket name.
+        object_prefix (str): Prefix that ends with '/'.
+
+    Returns:
+        List[str]: The full child prefixes, e.g. 'zero/bets/day=20250101/'.
+    """
+    s3_client = get_client()
+    paginator = s3_client.get_paginator('list_objects_v2')
+
+    prefixes: List[str] = []
+    for page in paginator.paginate(Bucket=bucket, Prefix=object_prefix, Delimiter='/'):
+        prefixes.extend([common['Prefix'] for common in page.get('CommonPrefixes', [])])
+
+    return prefixes
+
+
+def get_object_sizes(bucket: str, object_prefix: str) -> Dict[str, int]:
+    """
+    Retrieves the keys and sizes of the objects under a prefix.
+
+    Parameters:
+        bucket (str): The S3 bucket name.
+        object_prefix (str): Prefix to filter the S3 objects.
+
+    Returns:
+        Dict[str, int]: The size in bytes of every object, by full key.
+    """
+    s3_client = get_client()
+    paginator = s3_client.get_paginator('list_objects_v2')
+
+    sizes: Dict[str, int] = {}
+    for page in paginator.paginate(Bucket=bucket, Prefix=object_prefix):
+        sizes.update({obj['Key']: obj['Size'] for obj in page.get('Contents', [])})
+
+    return sizes
+
+
+def get_buffer(bucket: str, filename: str) -> io.BytesIO:
+    """
+    To read an object of the S3 bucket into memory.
+    """
+    body = get_client().get_object(Bucket=bucket, Key=filename)['Body']
+    return io.BytesIO(body.read())
+
+
+def delete_keys(bucket: str, keys: List[str]) -> None:
+    """
+    To delete objects of the S3 bucket, in requests of up to 1000 keys.
+
+    Raises:
+        PermissionError: If S3 did not delete some keys (e.g. AccessDenied without s3:DeleteObject).
+                         A DeleteObjects request reports them in its response instead of failing.
+    """
+    s3_client = get_client()
+    for i in range(0, len(keys), 1000):
+        response = s3_client.delete_objects(Bucket=bucket, Delete={'Objects': [{'Key': key} for key in keys[i:i + 1000]], 'Quiet': True})
+        errors   = response.get('Errors', [])
+        if errors:
+            raise PermissionError(f"Cannot delete {len(errors)} objects, e.g. {errors[0]['Key']}: {errors[0]['Code']} {errors[0].get('Message', '')}")
@@ -0,0 +1,88 @@
+import io
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import aws.s3 as s3
+import utils.metrics as metrics
+
+
+class UploadExecutor:
+    """
+    Uploads finished parquet buffers to S3 from a small pool of workers sharing one client.
+
+    At most `max_pending` buffers wait or travel at the same time: `submit` blocks when the
+    limit is reached, which bounds the memory used by encoded files. Failed uploads are retried
+    with jittered exponential backoff before the returned future fails.
+
+    Args:
+        workers (int): Number of upload threads.
+        max_pending (int): Maximum number of buffers queued or in flight.
+        max_retries (int): Retries of a failed upload before giving up.
+        backoff_base (float): Base delay in seconds of the exponential backoff.
+        backoff_max (float): Upper bound in seconds of a single backoff delay.
+        client: The S3 client, by default the process-wide client of `aws.s3`.
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        max_pending: int = 8,
+        max_retries: int = 5,
+        backoff_base: float = 1.0,
+        backoff_max: float = 30.0,
+        client=None,
+    ):
+        self.client       = client or s3.get_client()
+        self.max_retries  = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max  = backoff_max
+        self.slots        = threading.BoundedSemaphore(max(1, max_pending))
+        self.pool         = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='s3-upload')
+
+    def _upload(self, bucket: str, key: str, buffer: io.BytesIO) -> str:
+        attempt = 0
+        while True:
+            try:
+                buffer.seek(0)
+                start = time.perf_counter()
+                self.client.put_object(Bucket=bucket, Key=key, Body=buffer)
+                metrics.observe('upload_latency_seconds', time.perf_counter() - start)
+                print(f"Uploaded {key} to S3 in {time.perf_counter() - start:.3f} seconds")
+                return key
+            except Exception as e:
+                if attempt >= self.max_retries:
+                    print(f"Failed to upload {key} after {attempt + 1} attempts: {e}")
+                    raise e
+
+                metrics.incr('upload_retries')
+                delay   = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+                attempt += 1
+                print(f"Upload of {key} failed ({e}). Retry {attempt}/{self.max_retries} in {delay:.2f}s")
+                time.sleep(delay)
+
+    def submit(self, bucket: str, key: str, buffer: io.BytesIO) -> Future:
+        """
+        Queue a buffer to be uploaded, blocking while the pending limit is reached.
+
+        Args:
+            bucket (str): The target bucket.
+            key (str): The object key.
+            buffer (io.BytesIO): The encoded file.
+
+        Returns:
+            Future: Resolves to the key once S3 acknowledged the object.
+        """
+        self.slots.acquire()
+        try:
+            future = self.pool.submit(self._upload, bucket, key, buffer)
+        except Exception:
+            self.slots.release()
+            raise
+
+        future.add_done_callback(lambda _: self.slots.release())
+        return future
+
+    def shutdown(self, wait: bool = True) -> None:
+        self.pool.shutdown(wait=wait)
@@ -3,11 +3,110 @@ import os
 
 # API 
 ROOT_API_ENDPOINT   = os.getenv("ROOT_API_ENDPOINT")
+STREAMING_DECODE    = os.getenv("STREAMING_DECODE", "false").lower() == "true"
+STREAM_CHUNK_SIZE   = int(os.getenv("STREAM_CHUNK_SIZE", 1000))  # Bets decoded per chunk in streaming mode
+API_CONNECT_TIMEOUT = float(os.getenv("API_CONNECT_TIMEOUT", 5))   # seconds
+API_READ_TIMEOUT    = float(os.getenv("API_READ_TIMEOUT", 60))     # seconds
+API_MAX_RETRIES     = int(os.getenv("API_MAX_RETRIES", 5))
+API_BACKOFF_BASE    = float(os.getenv("API_BACKOFF_BASE", 0.5))    # seconds, doubled on each retry
+API_BACKOFF_MAX     = float(os.getenv("API_BACKOFF_MAX", 30))      # seconds
+API_POOL_SIZE       = int(os.getenv("API_POOL_SIZE", 2))           # keep-alive connections per host
 
 BETS_ONLINE_SCHEMA  = raw.BETS_INFORMATION_RAW['schema']
 FIELDS_TO_KEEP      = BETS_ONLINE_SCHEMA.keys()
+FIELDS_DATETIME     = raw.BETS_INFORMATION_RAW['fields_datetime']
+FIELDS_DATE         = raw.BETS_INFORMATION_RAW['fields_date']
 
 # S3
 BUCKET_TARGET       = os.getenv("BUCKET_TARGET")
 OBJECT_KEY          = os.getenv("OBJECT_KEY")
-DELAY_TIME          = int(os.getenv("DELAY_TIME", 3))  # Default to 3 minutes if not set
\ No newline at end of file
+DELAY_TIME          = int(os.getenv("DELAY_TIME", 3))  # Default to 3 minutes if not set
+PARQUET_PROFILE     = os.getenv("PARQUET_PROFILE", "snappy")  # Writer profile of the zero files: snappy, write, archive or read
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", 32))  # at least UPLOAD_WORKERS
+S3_RETRY_MODE       = os.getenv("S3_RETRY_MODE", "adaptive")        # legacy, standard or adaptive
+S3_MAX_ATTEMPTS     = int(os.getenv("S3_MAX_ATTEMPTS", 5))
+S3_CONNECT_TIMEOUT  = float(os.getenv("S3_CONNECT_TIMEOUT", 5))     # seconds
+S3_READ_TIMEOUT     = float(os.getenv("S3_READ_TIMEOUT", 60))       # seconds
+DEDUP_FIELDS        = [field for field in os.getenv("DEDUP_FIELDS", "customer,transId").split(',') if field]  # Key of a flush deduplication, empty to disable
+TYPED_ZERO_LAYER    = os.getenv("TYPED_ZERO_LAYER", "false").lower() == "true"  # Write the FIELDS_DATETIME / FIELDS_DATE as Datetime / Date
+
+# Restart checkpoint, the filenames in S3 are only scanned when it is missing or stale
+CHECKPOINT_FILE          = os.getenv("CHECKPOINT_FILE", "/tmp/nrt_bets_checkpoint.json")
+CHECKPOINT_KEY           = os.getenv("CHECKPOINT_KEY", f"{OBJECT_KEY or ''}_checkpoint/state.json")  # S3 mirror, under the table prefix (TaskRole), empty to disable
+CHECKPOINT_MAX_AGE_HOURS = float(os.getenv("CHECKPOINT_MAX_AGE_HOURS", 24))  # 0 to never expire
+
+# Write-ahead spool of the fetched pages not uploaded yet
+SPOOL_ENABLED            = os.getenv("SPOOL_ENABLED", "false").lower() == "true"
+SPOOL_DIR                = os.getenv("SPOOL_DIR", "/tmp/nrt_bets_spool")
+SPOOL_COMPRESSION        = os.getenv("SPOOL_COMPRESSION", "lz4")  # Arrow IPC: uncompressed, lz4 or zstd
+
+# Flush policy, a trigger set to 0 is disabled
+FLUSH_MAX_ROWS           = int(os.getenv("FLUSH_MAX_ROWS", 100000))
+FLUSH_MAX_BYTES          = int(os.getenv("FLUSH_MAX_BYTES", 64 * 1024 * 1024))  # estimated in-memory size
+FLUSH_MAX_AGE_SECONDS    = float(os.getenv("FLUSH_MAX_AGE_SECONDS", 300))      # oldest buffered page
+
+# Compaction of the closed hours (batch= prefixes) of the zero layer, it needs s3:DeleteObject (TaskRole of template.yaml)
+COMPACTION_ENABLED       = os.getenv("COMPACTION_ENABLED", "false").lower() == "true"
+COMPACTION_TARGET_MB     = float(os.getenv("COMPACTION_TARGET_MB", 128))   # size of a merged file
+COMPACTION_MIN_FILES     = int(os.getenv("COMPACTION_MIN_FILES", 2))       # part files of an hour to compact it
+COMPACTION_GRACE_SECONDS = float(os.getenv("COMPACTION_GRACE_SECONDS", 300))  # after the end of the hour
+COMPACTION_LOOKBACK_DAYS = int(os.getenv("COMPACTION_LOOKBACK_DAYS", 2))   # latest day partitions searched
+COMPACTION_INTERVAL      = float(os.getenv("COMPACTION_INTERVAL", 60))     # minimum seconds between two runs
+COMPACTION_DELETE_GRACE  = float(os.getenv("COMPACTION_DELETE_GRACE", 900))  # seconds the replaced part files are kept for the readers
+
+# Memory budget of the process: flush and pause the fetch at the budget, gc above MEMORY_GC_RATIO of it
+MEMORY_BUDGET_MB         = float(os.getenv("MEMORY_BUDGET_MB", 0))       # 0 to use MEMORY_BUDGET_RATIO of the container memory
+MEMORY_BUDGET_RATIO      = float(os.getenv("MEMORY_BUDGET_RATIO", 0.8))
+MEMORY_GC_RATIO          = float(os.getenv("MEMORY_GC_RATIO", 0.8))
+MEMORY_MAX_PAUSE         = float(os.getenv("MEMORY_MAX_PAUSE", 60))      # seconds a fetch waits for memory
+
+# Polling
+POLL_MIN_INTERVAL        = float(os.getenv("POLL_MIN_INTERVAL", 1))     # seconds
+POLL_MAX_INTERVAL        = float(os.getenv("POLL_MAX_INTERVAL", 60))    # seconds, upper bound of the quiet backoff
+POLL_BACKOFF_FACTOR      = float(os.getenv("POLL_BACKOFF_FACTOR", 2))   # growth of the wait on every empty poll
+POLL_DELAY_MARGIN        = float(os.getenv("POLL_DELAY_MARGIN", 1))     # seconds added to the wait for DELAY_TIME
+POLL_ERROR_BASE          = float(os.getenv("POLL_ERROR_BASE", 2))       # seconds, backoff after the first failed fetch
+POLL_ERROR_MAX           = float(os.getenv("POLL_ERROR_MAX", 60))       # seconds, upper bound of the error backoff
+
+# Pipeline
+PIPELINE_MODE            = os.getenv("PIPELINE_MODE", "false").lower() == "true"
+PIPELINE_PREFETCH_PAGES  = int(os.getenv("PIPELINE_PREFETCH_PAGES", 2))   # Pages fetched ahead of the transformation
+PIPELINE_PENDING_UPLOADS = int(os.getenv("PIPELINE_PENDING_UPLOADS", 2))  # Flushes waiting for the upload
+
+# Background uploads
+UPLOAD_ASYNC             = os.getenv("UPLOAD_ASYNC", "false").lower() == "true"
+UPLOAD_WORKERS           = int(os.getenv("UPLOAD_WORKERS", 4))
+UPLOAD_MAX_PENDING       = int(os.getenv("UPLOAD_MAX_PENDING", 8))      # Encoded buffers queued or in flight
+UPLOAD_MAX_RETRIES       = int(os.getenv("UPLOAD_MAX_RETRIES", 5))
+UPLOAD_BACKOFF_BASE      = float(os.getenv("UPLOAD_BACKOFF_BASE", 1))   # seconds, doubled on each retry
+
+# Metrics: none, emf (CloudWatch embedded metric format lines) or prometheus (text endpoint on localhost)
+METRICS_MODE             = os.getenv("METRICS_MODE", "none").lower()
+METRICS_FILE             = os.getenv("METRICS_FILE", "")                # EMF lines file, stdout when empty
+METRICS_PORT             = int(os.getenv("METRICS_PORT", 9108))
+METRICS_INTERVAL         = float(os.getenv("METRICS_INTERVAL", 60))     # seconds between EMF exports
+METRICS_NAMESPACE        = os.getenv("METRICS_NAMESPACE", "NRT/SourceToZero")
+
+# Multi-table runtime (nrt_tables.py): endpoint, schema, prefix and delay of every table
+NRT_TABLES = {
+    'bets': {
+        'schema': BETS_ONLINE_SCHEMA,
+        'configuration': {
+            'endpoint'          : ROOT_API_ENDPOINT,
+            'array_field'       : 'bets',
+            'field_modify_date' : 'modifyDate',
+            'field_id'          : DEDUP_FIELDS,
+            'fields_datetime'   : FIELDS_DATETIME,
+            'fields_date'       : FIELDS_DATE,
+            'typed_zero_layer'  : TYPED_ZERO_LAYER,
+            'prefix'            : OBJECT_KEY,
+            'delay_time'        : DELAY_TIME,
+            'checkpoint_file'   : CHECKPOINT_FILE,
+            'checkpoint_key'    : CHECKPOINT_KEY,
+            'spool_dir'         : SPOOL_DIR,
+            'parquet_profile'   : PARQUET_PROFILE,
+            'compaction'        : COMPACTION_ENABLED,
+        },
+    },
+}
+NRT_TABLE_NAMES          = [name for name in os.getenv("NRT_TABLE_NAMES", "bets").split(",") if name]  # Tables followed by the process
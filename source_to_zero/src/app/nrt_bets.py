@@ -1,14 +1,29 @@
 import os
 import sys
-from datetime import datetime
 import time
+
+# Freed memory goes back to the OS within a second, so the RSS seen by the memory budget follows
+# the buffered data. It is read by the allocator of polars when it is loaded.
+os.environ.setdefault('_RJEM_MALLOC_CONF', 'background_thread:true,dirty_decay_ms:1000,muzzy_decay_ms:0')
+
 import polars as pl
-import gc
 
 import config
-import aws.s3 as s3
+from api.client import ApiClient
+from aws.uploader import UploadExecutor
+import aws.parquet_profiles as profiles
 import utils.helpers as h
 import utils.manage_information as m_inf
+import utils.memory as memory
+import utils.metrics as metrics
+from utils.buffer import FrameBuffer
+from utils.checkpoint import Checkpoint
+from utils.compaction import Compactor, CompactionWorker
+from utils.flush_policy import FlushPolicy
+from utils.routing import route_by_day
+from utils.scheduler import PollScheduler
+from utils.spool import Spool
+from utils.pipeline import PageSource, PrefetchingPageSource, UploadStage, BackgroundUploadStage, UploadStageError
 
 # Getting the enviroment variables
 
@@ -21,122 +36,287 @@ print(f'object key: {config.OBJECT_KEY}')
 # Searching the last timestamp
 print(f'INIT: SEARCH LAST PARQUET')
 
-files = s3.get_objects(config.BUCKET_TARGET, config.OBJECT_KEY)
-max_modify_date, max_tstamp = m_inf.initialization_timestamp(files, sys.argv)
+checkpoint = Checkpoint(config.CHECKPOINT_FILE, config.BUCKET_TARGET, config.CHECKPOINT_KEY, config.OBJECT_KEY, config.CHECKPOINT_MAX_AGE_HOURS)
+max_modify_date, max_tstamp = m_inf.restore_state(checkpoint, config.BUCKET_TARGET, config.OBJECT_KEY, sys.argv)
 print(f'INIT-FINISHED: SEARCH LAST PARQUET')
 
 DELAY_TIME = config.DELAY_TIME
 print(f'DELAY TIME: {DELAY_TIME} minutes')
 
-brief_writter = lambda data, start_date, end_date, tstamp: m_inf.write_to_s3(data, config.BETS_ONLINE_SCHEMA, start_date, end_date, config.BUCKET_TARGET, config.OBJECT_KEY, tstamp)
+metrics.start(config.METRICS_MODE, config.METRICS_FILE, config.METRICS_PORT, config.METRICS_INTERVAL, config.METRICS_NAMESPACE)
+memory_guard = memory.configure(config.MEMORY_BUDGET_MB, config.MEMORY_BUDGET_RATIO, config.MEMORY_GC_RATIO, config.MEMORY_MAX_PAUSE)
+
+api_client = ApiClient(
+    connect_timeout=config.API_CONNECT_TIMEOUT,
+    read_timeout=config.API_READ_TIMEOUT,
+    max_retries=config.API_MAX_RETRIES,
+    backoff_base=config.API_BACKOFF_BASE,
+    backoff_max=config.API_BACKOFF_MAX,
+    pool_size=config.API_POOL_SIZE,
+)
+
+# Background uploads: the files are encoded by the upload stage and sent by a pool of workers
+uploader = None
+if config.UPLOAD_ASYNC:
+    print(f'ASYNC UPLOAD: {config.UPLOAD_WORKERS} workers, {config.UPLOAD_MAX_PENDING} pending buffers')
+    uploader = UploadExecutor(
+        workers=config.UPLOAD_WORKERS,
+        max_pending=config.UPLOAD_MAX_PENDING,
+        max_retries=config.UPLOAD_MAX_RETRIES,
+        backoff_base=config.UPLOAD_BACKOFF_BASE,
+    )
+
+# Polling: sleep until the data clears DELAY_TIME, back off while the API has nothing new
+scheduler = PollScheduler(
+    min_interval=config.POLL_MIN_INTERVAL,
+    max_interval=config.POLL_MAX_INTERVAL,
+    backoff_factor=config.POLL_BACKOFF_FACTOR,
+    delay_margin=config.POLL_DELAY_MARGIN,
+    error_base=config.POLL_ERROR_BASE,
+    error_max=config.POLL_ERROR_MAX,
+)
+
+flush_policy = FlushPolicy(
+    max_rows=config.FLUSH_MAX_ROWS,
+    max_bytes=config.FLUSH_MAX_BYTES,
+    max_age=config.FLUSH_MAX_AGE_SECONDS,
+)
+print(f'FLUSH POLICY: {config.FLUSH_MAX_ROWS} rows, {config.FLUSH_MAX_BYTES} bytes, {config.FLUSH_MAX_AGE_SECONDS}s')
+print(f'PARQUET PROFILE: {config.PARQUET_PROFILE} {profiles.get_profile(config.PARQUET_PROFILE)}')
+print(f'FLUSH DEDUPLICATION: {config.DEDUP_FIELDS or "disabled"}')
+print(f'TYPED ZERO LAYER: {config.TYPED_ZERO_LAYER}')
+
+brief_writter = lambda data, start_date, end_date, tstamp: m_inf.write_to_s3(data, config.BETS_ONLINE_SCHEMA, start_date, end_date, config.BUCKET_TARGET, config.OBJECT_KEY, tstamp, uploader, config.PARQUET_PROFILE)
+
+
+def fetch_page(tstamp: str) -> tuple[list, str]:
+    """
+    Fetch the next page after `tstamp`. When the API has no new data, or the data is not at least
+    DELAY_TIME minutes old, it waits as decided by the scheduler and returns an empty page, so the
+    caller can still flush the buffer by age during quiet periods.
+
+    Args:
+        tstamp (str): The last fetched tstamp.
+
+    Returns:
+        bets_data (pl.DataFrame): The typed bets of the page (it can be empty).
+        new_max_tstamp (str): The tstamp where the next page starts.
+    """
+    while True:
+        # Wait while the process is over its memory budget
+        memory_guard.admit()
+
+        start_time = time.time()
+        try:
+            if config.STREAMING_DECODE:
+                bets_data, new_max_tstamp, maxMobiusModifiedOn = m_inf.fetch_bets_data_by_timestamp_streaming(api_client, config.ROOT_API_ENDPOINT, tstamp, config.BETS_ONLINE_SCHEMA, config.STREAM_CHUNK_SIZE)
+            else:
+                bets_data, new_max_tstamp, maxMobiusModifiedOn = m_inf.fetch_bets_data_by_timestamp(api_client, config.ROOT_API_ENDPOINT, tstamp)
+        except Exception as e:
+            print(f"Error fetching information: {e}")
+            time.sleep(scheduler.on_error())
+            continue
+        new_max_tstamp = h.format_tstamp(new_max_tstamp)
+        metrics.observe('fetch_latency_seconds', time.time() - start_time, table='bets')
+
+        print("Time fetching information: %s  seconds" % (time.time() - start_time))
+        print(f'API latency: {api_client.latency_summary()}')
+        print(f'Poll scheduler: {scheduler.metrics()}')
+        print(f'{len(bets_data)}, ts:{tstamp}, {new_max_tstamp}')
+
+        if h.parse_tstamp(new_max_tstamp) <= h.parse_tstamp(tstamp):
+            print("Non recieve new data")
+            del bets_data
+            time.sleep(scheduler.on_no_data())
+            return pl.DataFrame(schema=config.BETS_ONLINE_SCHEMA), tstamp
+
+        # Data lag: server time minus maxMobiusModifiedOn, only set when the page has new data
+        # (an empty page has no maxMobiusModifiedOn)
+        remaining = m_inf.seconds_until_old_enough(maxMobiusModifiedOn, DELAY_TIME)
+        metrics.gauge('data_lag_seconds', DELAY_TIME * 60 - remaining, 'Seconds', table='bets')
+
+        if remaining >= 0:
+            print(f"The data is not at least {DELAY_TIME} minutes old. Delay {remaining:.1f}s")
+            del bets_data
+            memory_guard.collect_if_needed()
+            time.sleep(scheduler.on_not_old_enough(remaining))
+            return pl.DataFrame(schema=config.BETS_ONLINE_SCHEMA), tstamp
+
+        scheduler.on_data(len(bets_data))
+
+        # Preprocessing data, the streaming fetch already converts every chunk
+        if not config.STREAMING_DECODE:
+            print('Preprocessing data' )
+            with metrics.timer('preprocess_seconds', table='bets'):
+                bets_data = h.records_to_frame(bets_data, config.BETS_ONLINE_SCHEMA)
+
+        metrics.observe('page_records', bets_data.height, 'Count', table='bets')
+        metrics.observe('page_bytes', bets_data.estimated_size(), 'Bytes', table='bets')
+        return bets_data, new_max_tstamp
+
+
+def upload_job(total_bets_data: pl.DataFrame, initial_modify_date: str, max_modify_date: str, max_tstamp: str):
+    """
+    Build the job that writes one flush into S3, with one file per day of modifyDate.
+    The job returns the result of every write (pending uploads when the uploader is enabled).
+    """
+    def job():
+        results = []
+        try:
+            # Only the latest version of the bets modified several times in the flush is written
+            bets_data, removed = h.deduplicate(total_bets_data, config.DEDUP_FIELDS, 'modifyDate')
+            metrics.incr('dedup_removed_rows', removed)
+
+            routes = route_by_day(bets_data, 'modifyDate', initial_modify_date, max_modify_date)
+            print(f'Flush of {bets_data.height} bets ({removed} duplicates removed) into {len(routes)} days')
+
+            for start_date, end_date, bets_day in routes:
+                # The dates are parsed once here, the downstream stages then skip the conversion
+                if config.TYPED_ZERO_LAYER:
+                    bets_day = h.type_dates(bets_day, config.FIELDS_DATETIME, config.FIELDS_DATE)
+                results.append(brief_writter(bets_day, start_date, end_date, max_tstamp))
+        except Exception as e:
+            print("Error saving the information. Please check the problem.")
+            print(e)
+            raise e
+
+        return results
+
+    return job
+
+
+# Write-ahead spool: the pages fetched before a crash are replayed instead of fetched again
+spool    = Spool(config.SPOOL_DIR, config.SPOOL_COMPRESSION) if config.SPOOL_ENABLED else None
+replayed = spool.replay(max_tstamp) if spool is not None else []
+resume_tstamp = replayed[-1][1] if replayed else max_tstamp
+
+
+# Compaction of the small files of the closed hours, in background after the commits
+compaction = None
+if config.COMPACTION_ENABLED:
+    print(f'COMPACTION: hours closed for {config.COMPACTION_GRACE_SECONDS}s into files of {config.COMPACTION_TARGET_MB} MB')
+    compaction = CompactionWorker(Compactor(
+        bucket=config.BUCKET_TARGET,
+        prefix=config.OBJECT_KEY,
+        profile=config.PARQUET_PROFILE,
+        target_bytes=int(config.COMPACTION_TARGET_MB * 1024 * 1024),
+        min_files=config.COMPACTION_MIN_FILES,
+        grace_seconds=config.COMPACTION_GRACE_SECONDS,
+        lookback_days=config.COMPACTION_LOOKBACK_DAYS,
+        delete_grace_seconds=config.COMPACTION_DELETE_GRACE,
+        fields_datetime=config.FIELDS_DATETIME,
+        fields_date=config.FIELDS_DATE,
+    ), config.COMPACTION_INTERVAL)
+
+
+def on_commit(committed: tuple) -> None:
+    checkpoint.save(*committed)
+    if spool is not None:
+        spool.truncate(committed[0])
+    if compaction is not None:
+        compaction.notify(committed[1])
+
+
+# Pipelined mode: the next pages are fetched while the previous ones are transformed and uploaded
+if config.PIPELINE_MODE:
+    print(f'PIPELINE MODE: {config.PIPELINE_PREFETCH_PAGES} pages ahead, {config.PIPELINE_PENDING_UPLOADS} pending uploads')
+    source  = PrefetchingPageSource(fetch_page, resume_tstamp, config.PIPELINE_PREFETCH_PAGES)
+    uploads = BackgroundUploadStage((max_tstamp, max_modify_date), config.PIPELINE_PENDING_UPLOADS, on_commit)
+elif config.UPLOAD_ASYNC:
+    source  = PageSource(fetch_page, resume_tstamp)
+    uploads = BackgroundUploadStage((max_tstamp, max_modify_date), config.PIPELINE_PENDING_UPLOADS, on_commit)
+else:
+    source  = PageSource(fetch_page, resume_tstamp)
+    uploads = UploadStage((max_tstamp, max_modify_date), on_commit)
 
 try:
     while True:
-        total_bets_data_current_day = []
-        total_bets_data_next_day    = []
+        total_bets_data = FrameBuffer(config.BETS_ONLINE_SCHEMA)
 
         initial_max_tstamp  = max_tstamp
         initial_modify_date = max_modify_date
 
+        # Pages spooled before a restart, already fetched
+        for bets_data, max_tstamp, max_modify_date in replayed:
+            if not initial_modify_date:
+                initial_modify_date = bets_data['modifyDate'][0]
+            total_bets_data.append(bets_data)
+        replayed = []
+
         start_time = time.time()
         print("Start Fetching iteration ...")
 
         try:
             while True:
-                bets_data, new_max_tstamp, maxMobiusModifiedOn = m_inf.fetch_bets_data_by_timestamp(config.ROOT_API_ENDPOINT, max_tstamp)
-                new_max_tstamp = h.format_tstamp(new_max_tstamp)
+                uploads.check()
 
-                print("Time fetching information: %s  seconds" % (time.time() - start_time))
-                print(f'{len(bets_data)}, ts:{max_tstamp}, {new_max_tstamp}')
+                trigger = flush_policy.trigger(total_bets_data) or memory_guard.trigger(total_bets_data)
+                if trigger:
+                    print(flush_policy.describe(total_bets_data, trigger))
+                    metrics.incr('flushes', trigger=trigger, table='bets')
+                    metrics.observe('flush_records', len(total_bets_data), 'Count', table='bets')
+                    break
 
-                if not ((new_max_tstamp != "0x" or len(new_max_tstamp) > 2) and m_inf.is_old_enough(maxMobiusModifiedOn, DELAY_TIME)):
-                    print(f"Non recieve new data or not is at least {DELAY_TIME} minutes old. Delay 60s")
-                    del bets_data
-                    gc.collect()
-                    time.sleep(60)
-                    continue
-                if new_max_tstamp == max_tstamp:
-                    print("Non recieve new data. Delay 60s")
-                    time.sleep(60)
+                bets_data, new_max_tstamp = source.next_page()
+
+                # No new data, or a page without bets that only moves the tstamp
+                if bets_data.is_empty():
+                    max_tstamp = new_max_tstamp
                     continue
-                # Only usefull when it runs the first time
-                if not bets_data:
-                    break
 
-                # Preprocessing data
-                print('Preprocessing data' )
                 try:
-                    bets_data           = h.preprocess_data(bets_data, config.FIELDS_TO_KEEP)
-                    new_max_modify_date = max({x['modifyDate'] for x in bets_data}, key=lambda x: datetime.strptime(h.format_date(x), "%Y-%m-%dT%H:%M:%S.%f"))
+                    new_max_modify_date = h.max_date(bets_data, 'modifyDate')
 
                     
                     print(f'modifyDate: {initial_modify_date}, {max_modify_date}, {new_max_modify_date}')
 
                     if not initial_modify_date:
-                        initial_modify_date = bets_data[0]['modifyDate']
+                        initial_modify_date = bets_data['modifyDate'][0]
 
-                    # Splitting the data in current and next day information
-                    bets_current_day = [y for y in bets_data if y['modifyDate'][:10] <= initial_modify_date[:10]]
-                    bets_next_day    = [y for y in bets_data if y['modifyDate'][:10] > initial_modify_date[:10]]
-                    total_bets_data_current_day.extend(bets_current_day)
-                    total_bets_data_next_day.extend(bets_next_day)
+                    if spool is not None:
+                        spool.append(bets_data, new_max_tstamp, new_max_modify_date)
+
+                    # The batch is split by day when it is flushed
+                    total_bets_data.append(bets_data)
 
                     # Setting the state variables
                     max_tstamp      = new_max_tstamp
                     max_modify_date = new_max_modify_date
-
-                    # To control the max lenght of batch information.
-                    if len(total_bets_data_current_day) + len(total_bets_data_next_day) > 4999:
-                        break
                 except Exception as e:
                     print("Preprocessing Error. Please check what happend Exactly")
                     print(e)
                     exit()
 
-            if not (total_bets_data_current_day or total_bets_data_next_day):
-                time.sleep(5)
-            else:
-                try:
-                    if (initial_modify_date[:10] == max_modify_date[:10]):
-                        brief_writter(
-                            total_bets_data_current_day,
-                            initial_modify_date,
-                            max_modify_date,
-                            max_tstamp
-                        )
-                    else:
-                        if not total_bets_data_current_day:
-                            brief_writter(
-                                total_bets_data_next_day,
-                                f'{max_modify_date[:10]}T00:00:00.000',
-                                max_modify_date,
-                                max_tstamp
-                            )
-                        else:
-                            brief_writter(
-                                total_bets_data_current_day,
-                                initial_modify_date,
-                                f'{initial_modify_date[:10]}T23:59:59.999',
-                                max_tstamp
-                            )
-                            brief_writter(
-                                total_bets_data_next_day,
-                                f'{max_modify_date[:10]}T00:00:00.000',
-                                max_modify_date,
-                                max_tstamp
-                            )
-                except Exception as e:
-                    print("Error saving the information. Please check the problem.")
-                    print(e)
-                    exit()
+            try:
+                # The checkpoint is committed in order, once all the files of the flush are in S3
+                uploads.submit(
+                    upload_job(total_bets_data.to_frame(), initial_modify_date, max_modify_date, max_tstamp),
+                    (max_tstamp, max_modify_date)
+                )
+            except Exception as e:
+                print(e)
+                exit()
 
             print("Time until save information: %s seconds" % (time.time() - start_time))
+        except UploadStageError:
+            # A failed upload is fatal in every mode: the stage stops at the failed flush, so the
+            # process exits and the restart resumes from the last committed checkpoint
+            raise
         except Exception as e:
-            max_modify_date = initial_modify_date
             print(e)
+            if config.PIPELINE_MODE:
+                raise e
+
+            # The buffered pages were not saved, fetch them again
+            max_tstamp      = initial_max_tstamp
+            max_modify_date = initial_modify_date
+            source.rewind(max_tstamp)
+            if spool is not None:
+                spool.discard_after(max_tstamp)
 
 except Exception as e:
     print(e)
 finally:
+    source.close()
     print('Script Error. Please check the logs')
     raise SystemError("Error unknown. please check the logs")
\ No newline at end of file
@@ -0,0 +1,103 @@
+import asyncio
+import os
+import sys
+
+# Freed memory goes back to the OS within a second, so the RSS seen by the memory budget follows
+# the buffered data. It is read by the allocator of polars when it is loaded.
+os.environ.setdefault('_RJEM_MALLOC_CONF', 'background_thread:true,dirty_decay_ms:1000,muzzy_decay_ms:0')
+
+import config
+import utils.memory as memory
+import utils.metrics as metrics
+from api.client import ApiClient
+from aws.uploader import UploadExecutor
+from utils.checkpoint import Checkpoint
+from utils.compaction import Compactor, CompactionWorker
+from utils.cursor import TableCursor
+from utils.flush_policy import FlushPolicy
+from utils.scheduler import PollScheduler
+from utils.spool import Spool
+
+# Multi-table runtime: one asyncio cursor per table of config.NRT_TABLES, sharing the HTTP pool
+# and the upload executor. Initial tstamps are given as arguments: python nrt_tables.py bets=0x...
+# (a tstamp without table name is used by every table without its own).
+
+print("Version Code V.0.2.0")
+print(f'Script execution Id: {os.getpid()}')
+print(f'bucket: {config.BUCKET_TARGET}')
+
+tables          = {name: config.NRT_TABLES[name] for name in config.NRT_TABLE_NAMES}
+initial_tstamps = dict(arg.split('=', 1) if '=' in arg else ('', arg) for arg in sys.argv[1:])
+print(f'tables: {list(tables)}')
+
+metrics.start(config.METRICS_MODE, config.METRICS_FILE, config.METRICS_PORT, config.METRICS_INTERVAL, config.METRICS_NAMESPACE)
+memory.configure(config.MEMORY_BUDGET_MB, config.MEMORY_BUDGET_RATIO, config.MEMORY_GC_RATIO, config.MEMORY_MAX_PAUSE)
+
+api_client = ApiClient(
+    connect_timeout=config.API_CONNECT_TIMEOUT,
+    read_timeout=config.API_READ_TIMEOUT,
+    max_retries=config.API_MAX_RETRIES,
+    backoff_base=config.API_BACKOFF_BASE,
+    backoff_max=config.API_BACKOFF_MAX,
+    pool_size=max(config.API_POOL_SIZE, len(tables)),
+)
+
+uploader = UploadExecutor(
+    workers=config.UPLOAD_WORKERS,
+    max_pending=config.UPLOAD_MAX_PENDING,
+    max_retries=config.UPLOAD_MAX_RETRIES,
+    backoff_base=config.UPLOAD_BACKOFF_BASE,
+)
+
+# Searching the last timestamp of every table
+print(f'INIT: RESTORE TABLES')
+
+cursors = []
+for table_name, table_info in tables.items():
+    table_config = table_info['configuration']
+
+    cursor = TableCursor(
+        name=table_name,
+        table_info=table_info,
+        api_client=api_client,
+        uploader=uploader,
+        bucket=config.BUCKET_TARGET,
+        checkpoint=Checkpoint(table_config['checkpoint_file'], config.BUCKET_TARGET, table_config['checkpoint_key'], table_config['prefix'], config.CHECKPOINT_MAX_AGE_HOURS),
+        scheduler=PollScheduler(config.POLL_MIN_INTERVAL, config.POLL_MAX_INTERVAL, config.POLL_BACKOFF_FACTOR, config.POLL_DELAY_MARGIN, error_base=config.POLL_ERROR_BASE, error_max=config.POLL_ERROR_MAX),
+        flush_policy=FlushPolicy(config.FLUSH_MAX_ROWS, config.FLUSH_MAX_BYTES, config.FLUSH_MAX_AGE_SECONDS),
+        spool=Spool(table_config['spool_dir'], config.SPOOL_COMPRESSION) if config.SPOOL_ENABLED else None,
+        compaction=CompactionWorker(Compactor(
+            bucket=config.BUCKET_TARGET,
+            prefix=table_config['prefix'],
+            profile=table_config.get('parquet_profile', 'snappy'),
+            target_bytes=int(config.COMPACTION_TARGET_MB * 1024 * 1024),
+            min_files=config.COMPACTION_MIN_FILES,
+            grace_seconds=config.COMPACTION_GRACE_SECONDS,
+            lookback_days=config.COMPACTION_LOOKBACK_DAYS,
+            delete_grace_seconds=config.COMPACTION_DELETE_GRACE,
+            field_modify_date=table_config.get('field_modify_date', 'modifyDate'),
+            fields_datetime=table_config.get('fields_datetime'),
+            fields_date=table_config.get('fields_date'),
+        ), config.COMPACTION_INTERVAL) if table_config.get('compaction') else None,
+        streaming=config.STREAMING_DECODE,
+        chunk_size=config.STREAM_CHUNK_SIZE,
+    )
+    initial_tstamp = initial_tstamps.get(table_name, initial_tstamps.get(''))
+    cursor.restore([sys.argv[0]] + ([initial_tstamp] if initial_tstamp else []))
+    cursors.append(cursor)
+
+print(f'INIT-FINISHED: RESTORE TABLES')
+
+
+async def main():
+    await asyncio.gather(*(cursor.run() for cursor in cursors))
+
+
+try:
+    asyncio.run(main())
+except Exception as e:
+    print(e)
+finally:
+    uploader.shutdown(wait=False)
+    print('Script Error. Please check the logs')
+    raise SystemError("Error unknown. please check the logs")
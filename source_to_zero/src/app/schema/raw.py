@@ -70,7 +70,7 @@ BETS_INFORMATION_RAW = {
         "memberStatus"  : pl.Int32,      # Nuevos max 256
         "betPage"       : pl.Int16,  # tinyint
         "locationId"    : pl.Int32,     # Nuevos  - No hay datos en la tabla pero esta definido como int
-        "tstamp"        : pl.String, 
+        "tstamp"        : pl.UInt64, # rowversion, parsed from its hex string
         "acceptingStatus": pl.Int32,    # Nuevos - min 0 max 5 int
         "rejectReason"  : pl.Int32,     # Nuevos - min 0 max 100 int
         "checkTime"     : pl.String,     # Nuevos - datetime
@@ -210,7 +210,7 @@ BETS_INFORMATION_RAW = {
         #"memberStatus"  : pl.Int32,      # Nuevos max 256
         #"betPage"       : pl.Int16,  # tinyint
         #"locationId"    : pl.Int32,     # Nuevos  - No hay datos en la tabla pero esta definido como int
-        "tstamp"        : pl.String,
+        "tstamp"        : pl.UInt64,
         #"acceptingStatus": pl.Int32,    # Nuevos - min 0 max 5 int
         #"rejectReason"  : pl.Int32,     # Nuevos - min 0 max 100 int
         #"checkTime"     : pl.String,     # Nuevos - datetime
@@ -0,0 +1,70 @@
+import time
+
+import polars as pl
+
+
+class FrameBuffer:
+    """
+    Buffer of typed record batches (polars dataframes) waiting to be written.
+
+    The batches are kept as they arrive and only concatenated when the buffer is flushed,
+    so appending a page never copies the data already buffered.
+
+    Args:
+        schema (dict): The polars schema of the buffered data.
+    """
+
+    def __init__(self, schema: dict):
+        self.schema = schema
+        self.frames = []
+        self.height = 0
+        self.size   = 0
+        self.since  = None
+
+    def __len__(self) -> int:
+        return self.height
+
+    def append(self, data_df: pl.DataFrame) -> None:
+        if data_df.is_empty():
+            return
+
+        if self.since is None:
+            self.since = time.monotonic()
+
+        self.frames.append(data_df)
+        self.height += data_df.height
+        self.size   += data_df.estimated_size()
+
+    def estimated_size(self) -> int:
+        """
+        Returns:
+            int: Estimated size in bytes of the buffered data.
+        """
+        return self.size
+
+    def age(self) -> float:
+        """
+        Returns:
+            float: Seconds since the oldest buffered batch was appended, 0 when the buffer is empty.
+        """
+        return 0.0 if self.since is None else time.monotonic() - self.since
+
+    def to_frame(self, rechunk: bool = True) -> pl.DataFrame:
+        """
+        Args:
+            rechunk (bool): Copy the batches into one contiguous dataframe. Without it the dataframe
+                            only references the buffered batches, one chunk per batch.
+
+        Returns:
+            pl.DataFrame: All the buffered batches in one dataframe.
+        """
+        if not self.frames:
+            return pl.DataFrame(schema=self.schema)
+
+        return pl.concat(self.frames, how='vertical', rechunk=rechunk)
+
+    def clear(self) -> None:
+        self.frames = []
+        self.height = 0
+        self.size   = 0
+        self.since  = None
@@ -0,0 +1,110 @@
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+import aws.s3 as s3
+
+
+class Checkpoint:
+    """
+    Restart state of the poller: the tstamp and modifyDate of the last flush acknowledged by S3.
+
+    It is kept in a local file, replaced atomically, and mirrored into a small S3 object so it
+    survives the loss of the instance. On load the newest of both copies is used. A checkpoint
+    older than `max_age_hours` (or written for another prefix) is ignored, and the caller falls
+    back to the filenames of the uploaded parquets.
+
+    Args:
+        path (str): The local state file.
+        bucket (str): The bucket of the S3 mirror.
+        key (str): The key of the S3 mirror, empty to disable it.
+        object_key (str): The prefix the poller writes to.
+        max_age_hours (float): Age after which a checkpoint is stale, 0 to never expire.
+    """
+
+    def __init__(self, path: str, bucket: str, key: str, object_key: str, max_age_hours: float = 24):
+        self.path          = path
+        self.bucket        = bucket
+        self.key           = key
+        self.object_key    = object_key
+        self.max_age_hours = max_age_hours
+
+    def _read_local(self) -> Optional[dict]:
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path) as f:
+            return json.load(f)
+
+    def _read_mirror(self) -> Optional[dict]:
+        if not self.key:
+            return None
+        client = s3.get_client()
+        try:
+            response = client.get_object(Bucket=self.bucket, Key=self.key)
+        except client.exceptions.NoSuchKey:
+            return None
+        return json.loads(response['Body'].read())
+
+    def _write_local(self, body: str) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(body)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _write_mirror(self, body: str) -> None:
+        if self.key:
+            s3.get_client().put_object(Bucket=self.bucket, Key=self.key, Body=body.encode('utf-8'), ContentType='application/json')
+
+    def load(self) -> Optional[dict]:
+        """
+        Returns:
+            dict: The newest valid checkpoint (max_tstamp, max_modify_date, object_key, updated_at),
+                  None when it is missing or stale.
+        """
+        states = []
+        for name, read in (('local', self._read_local), ('s3', self._read_mirror)):
+            try:
+                state = read()
+            except Exception as e:
+                print(f'Cannot read the {name} checkpoint: {e}')
+                continue
+            if state:
+                print(f'Checkpoint ({name}): {state}')
+                states.append(state)
+
+        states = [state for state in states if state.get('object_key') == self.object_key and state.get('max_tstamp')]
+        if not states:
+            return None
+
+        state      = max(states, key=lambda state: state['updated_at'])
+        updated_at = datetime.fromisoformat(state['updated_at'])
+        if self.max_age_hours and datetime.now(timezone.utc) - updated_at > timedelta(hours=self.max_age_hours):
+            print(f'The checkpoint is stale, it was written at {state["updated_at"]}')
+            return None
+
+        return state
+
+    def save(self, max_tstamp: str, max_modify_date: str) -> None:
+        """
+        Persist the state of an acknowledged flush. The files are already in S3, so a failure
+        is only reported: the next restart would fetch again from an older checkpoint.
+        """
+        body = json.dumps({
+            'max_tstamp'      : max_tstamp,
+            'max_modify_date' : max_modify_date,
+            'object_key'      : self.object_key,
+            'updated_at'      : datetime.now(timezone.utc).isoformat(),
+        })
+
+        for name, write in (('local', self._write_local), ('s3', self._write_mirror)):
+            try:
+                write(body)
+            except Exception as e:
+                print(f'Cannot write the {name} checkpoint: {e}')
@@ -0,0 +1,272 @@
+import io
+import json
+import math
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+import polars as pl
+
+import aws.parquet_profiles as profiles
+import aws.s3 as s3
+import utils.helpers as h
+import utils.metrics as metrics
+
+# part_{start}-{end}_{tstamp}[.compacted-NNN].{codec}.parquet, as written by `write_to_s3`
+PART_FILE = re.compile(r'^part_(?P<start>\d{14})-(?P<end>\d{14})_(?P<tstamp>0x[0-9A-Fa-f]+)(?P<compacted>\.compacted-\d+)?\.\w+\.parquet$')
+
+
+def _put(buffer: io.BytesIO, bucket: str, key: str) -> None:
+    s3.__put_buffer(buffer, bucket, key)
+
+
+class Compactor:
+    """
+    Merges the small part files of a closed hour (`day=YYYYMMDD/batch=YYYYMMDDHH0000/`) of the zero
+    layer into one or a few files of about `target_bytes`.
+
+    The merged files keep the name format of the part files, so `initialization_timestamp` still
+    recovers from them: the rows are sorted by modify date and tstamp, and the last file ends with
+    the end date and the tstamp of the latest part file. They are marked with `.compacted-NNN`.
+
+    S3 has no rename, so the replacement is made safe with a manifest outside the day partitions
+    (`{prefix}_compaction/{day}/{batch}.json`) written before the merged files. The part files are
+    only deleted `delete_grace_seconds` after the merged files are written, and then the manifest:
+    a reader that listed the hour before (e.g. the zero_to_raw Lambda) can still read them, and the
+    rows it may read twice in the meantime are deduplicated by key in the analytics layer. A run
+    that finds a manifest finishes the replacement when all the merged files exist, or removes
+    them and starts again.
+
+    Args:
+        bucket (str): The bucket of the zero layer.
+        prefix (str): The prefix of the table, e.g. 'zero/bets/'.
+        profile (str): The parquet writer profile of the merged files.
+        target_bytes (int): Target size of a merged file.
+        min_files (int): Minimum part files of an hour to compact it.
+        grace_seconds (float): Seconds after the end of the hour before it is considered closed.
+        lookback_days (int): Latest day partitions searched for closed hours.
+        delete_grace_seconds (float): Seconds the replaced part files are kept after the merged
+                                      files are written, longer than a read of the day.
+        field_modify_date (str): The modify date column, used to sort the rows.
+        fields_datetime (list): The datetime columns of the typed zero layer, parsed in the string
+                                files of an hour that also has typed files.
+        fields_date (list): The date columns of the typed zero layer.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str,
+        profile: str = 'write',
+        target_bytes: int = 128 * 1024 * 1024,
+        min_files: int = 2,
+        grace_seconds: float = 300,
+        lookback_days: int = 2,
+        delete_grace_seconds: float = 900,
+        field_modify_date: str = 'modifyDate',
+        fields_datetime: Optional[list] = None,
+        fields_date: Optional[list] = None,
+    ):
+        self.bucket            = bucket
+        self.prefix            = prefix
+        self.profile           = profile
+        self.target_bytes      = target_bytes
+        self.min_files         = min_files
+        self.grace             = timedelta(seconds=grace_seconds)
+        self.lookback_days     = lookback_days
+        self.delete_grace      = timedelta(seconds=delete_grace_seconds)
+        self.field_modify_date = field_modify_date
+        self.fields_datetime   = fields_datetime or []
+        self.fields_date       = fields_date or []
+        self.compacted         = set()  # batch prefixes already compacted by this process
+        self.pending           = {}     # batch prefix: time when its replaced part files can be deleted
+
+    def _manifest_key(self, batch: str) -> str:
+        day, batch_name = batch[len(self.prefix):].strip('/').split('/')
+        return f'{self.prefix}_compaction/{day}/{batch_name}.json'
+
+    def closed_batches(self, max_modify_date: str) -> List[str]:
+        """
+        Args:
+            max_modify_date (str): The committed max modify date of the poller.
+
+        Returns:
+            batches (list): The batch prefixes of the latest days whose hour ended, plus the grace,
+                            before `max_modify_date`, and not compacted yet by this process.
+        """
+        watermark = datetime.strptime(h.format_date(max_modify_date), '%Y-%m-%dT%H:%M:%S.%f')
+        days      = sorted(day for day in s3.get_prefixes(self.bucket, self.prefix) if day[len(self.prefix):].startswith('day='))
+
+        batches = []
+        for day in days[-self.lookback_days:]:
+            for batch in s3.get_prefixes(self.bucket, day):
+                name = batch[len(day):].strip('/')
+                if not name.startswith('batch=') or batch in self.compacted:
+                    continue
+                hour = datetime.strptime(name[len('batch='):], '%Y%m%d%H%M%S')
+                if hour + timedelta(hours=1) + self.grace <= watermark:
+                    batches.append(batch)
+        return batches
+
+    def _recover(self, batch: str) -> bool:
+        """
+        Finish the replacement of a batch once its grace period is over, or undo the one of a
+        previous run that stopped in the middle.
+
+        Returns:
+            bool: True while the replaced part files of the batch wait for the grace period.
+        """
+        key = self._manifest_key(batch)
+        try:
+            manifest = json.loads(s3.get_buffer(self.bucket, key).read())
+        except Exception:
+            self.pending.pop(batch, None)
+            return False
+
+        existing = s3.get_object_sizes(self.bucket, batch)
+        if all(output in existing for output in manifest['outputs']):
+            delete_at = manifest.get('written_at', 0) + self.delete_grace.total_seconds()
+            if time.time() < delete_at:
+                self.pending[batch] = delete_at
+                return True
+            print(f'Compaction of {batch}: deleting the replaced part files')
+            s3.delete_keys(self.bucket, [source for source in manifest['sources'] if source in existing])
+        else:
+            print(f'Compaction of {batch}: removing the partial output of a previous run')
+            s3.delete_keys(self.bucket, [output for output in manifest['outputs'] if output in existing])
+        s3.delete_keys(self.bucket, [key])
+        self.pending.pop(batch, None)
+        return False
+
+    def compact(self, batch: str) -> int:
+        """
+        Merge the part files of a batch prefix.
+
+        Returns:
+            int: The number of part files replaced, 0 when the batch was left as it is.
+        """
+        if self._recover(batch):
+            return 0
+
+        sizes = {key: size for key, size in s3.get_object_sizes(self.bucket, batch).items() if key.endswith('.parquet')}
+        parts = {key: PART_FILE.match(key.split('/')[-1]) for key in sizes}
+        if any(match is None for match in parts.values()):
+            print(f'Compaction of {batch}: skipped, it has files without the part_{{start}}-{{end}}_{{tstamp}} name')
+            return 0
+        if len(parts) < self.min_files or all(match['compacted'] for match in parts.values()):
+            return 0
+
+        sources = sorted(parts)
+        latest  = max(parts.values(), key=lambda match: (match['end'], h.parse_tstamp(match['tstamp'])))
+        start   = min(match['start'] for match in parts.values())
+
+        with metrics.timer('compaction_seconds'):
+            frames = [h.normalize_tstamp(pl.read_parquet(s3.get_buffer(self.bucket, key))) for key in sources]
+            # An hour written while the typed zero layer was enabled gets typed dates in all its rows
+            if any(frame.schema.get(self.field_modify_date) != pl.String for frame in frames):
+                frames = [h.type_dates(frame, self.fields_datetime, self.fields_date) for frame in frames]
+
+            data_df = pl.concat(frames, how='vertical_relaxed')
+            del frames
+            data_df = data_df.sort([self._date_expr(data_df), 'tstamp'])
+
+            n_files = max(1, math.ceil(sum(sizes.values()) / self.target_bytes))
+            rows    = math.ceil(data_df.height / n_files)
+            chunks  = [data_df.slice(i * rows, rows) for i in range(n_files) if i * rows < data_df.height]
+
+            # Every file is labelled with the max tstamp of the rows up to its end, the last one
+            # with the tstamp of the latest part file (never lower than the rows)
+            outputs, buffers = [], []
+            max_tstamp       = 0
+            for i, chunk in enumerate(chunks):
+                last        = i == len(chunks) - 1
+                max_tstamp  = max(max_tstamp, chunk['tstamp'].max() or 0)
+                chunk_start = start if i == 0 else self._date(chunk, 0)
+                chunk_end   = latest['end'] if last else self._date(chunk, -1)
+                label       = h.format_tstamp(latest['tstamp'] if last else min(max_tstamp, h.parse_tstamp(latest['tstamp'])))
+                outputs.append(f'{batch}part_{chunk_start}-{chunk_end}_{label}.compacted-{i:03d}{profiles.extension(self.profile)}')
+
+                buffer = io.BytesIO()
+                profiles.write_parquet(chunk, buffer, self.profile)
+                buffer.seek(0)
+                buffers.append(buffer)
+            del data_df, chunks
+
+            # Sources that are also an output (the same name) are not deleted
+            sources  = [source for source in sources if source not in outputs]
+            manifest = {'sources': sources, 'outputs': outputs, 'written_at': time.time()}
+            _put(io.BytesIO(json.dumps(manifest).encode('utf-8')), self.bucket, self._manifest_key(batch))
+            for output, buffer in zip(outputs, buffers):
+                _put(buffer, self.bucket, output)
+            # The sources are deleted now without grace period, or by a later run
+            self._recover(batch)
+
+        metrics.incr('compacted_files', len(sources))
+        print(f'Compaction of {batch}: {len(sources)} files ({sum(sizes.values()) / 1024 / 1024:.1f} MB) into {len(outputs)}')
+        return len(sources)
+
+    def _date_expr(self, data_df: pl.DataFrame) -> pl.Expr:
+        return h.date_expr(self.field_modify_date, data_df.schema[self.field_modify_date])
+
+    def _date(self, chunk: pl.DataFrame, row: int) -> str:
+        date = chunk.select(self._date_expr(chunk).get(row)).item()
+        return date.strftime('%Y%m%d%H%M%S') if date else '00000000000000'
+
+    def run(self, max_modify_date: Optional[str]) -> None:
+        """
+        Compact every closed hour of the latest days.
+        """
+        if not max_modify_date:
+            return
+
+        for batch in [batch for batch, delete_at in self.pending.items() if delete_at <= time.time()]:
+            try:
+                self._recover(batch)
+            except Exception as e:
+                print(f'Deletion of the part files of {batch} failed, it is retried in the next run: {e}')
+
+        for batch in self.closed_batches(max_modify_date):
+            try:
+                self.compact(batch)
+                self.compacted.add(batch)
+            except Exception as e:
+                print(f'Compaction of {batch} failed, it is retried in the next run: {e}')
+
+
+class CompactionWorker:
+    """
+    Runs a compactor in a daemon thread after the commits of the poller, so the compaction never
+    delays the fetch nor the uploads.
+
+    Args:
+        compactor (Compactor): The compactor of the table.
+        min_interval (float): Minimum seconds between two runs, each one lists the latest days.
+    """
+
+    def __init__(self, compactor: Compactor, min_interval: float = 60):
+        self.compactor       = compactor
+        self.min_interval    = min_interval
+        self.max_modify_date = None
+        self._event          = threading.Event()
+        self._lock           = threading.Lock()
+        self.thread          = threading.Thread(target=self._run, name='zero-compaction', daemon=True)
+        self.thread.start()
+
+    def notify(self, max_modify_date: str) -> None:
+        """
+        Called with the committed max modify date of every flush.
+        """
+        with self._lock:
+            self.max_modify_date = max_modify_date
+        self._event.set()
+
+    def _run(self) -> None:
+        while True:
+            self._event.wait()
+            self._event.clear()
+            with self._lock:
+                max_modify_date = self.max_modify_date
+            self.compactor.run(max_modify_date)
+            time.sleep(self.min_interval)
@@ -0,0 +1,228 @@
+import asyncio
+import time
+from typing import Optional
+
+import polars as pl
+
+import aws.parquet_profiles as profiles
+import utils.helpers as h
+import utils.manage_information as m_inf
+import utils.memory as memory
+import utils.metrics as metrics
+from api.client import ApiClient
+from aws.uploader import UploadExecutor
+from utils.buffer import FrameBuffer
+from utils.checkpoint import Checkpoint
+from utils.compaction import CompactionWorker
+from utils.flush_policy import FlushPolicy
+from utils.routing import route_by_day
+from utils.scheduler import PollScheduler
+from utils.spool import Spool
+
+
+class TableCursor:
+    """
+    Incremental ingestion of one API table into the zero layer, run as an asyncio task.
+
+    It follows the tstamp of its table like `nrt_bets.py`: the pages are buffered until the
+    flush policy fires, every flush is written with one file per day of the modify date and
+    the checkpoint of the table moves once all its files are acknowledged. The blocking calls
+    (HTTP, decoding, parquet encoding) run in threads, the waits are asyncio sleeps, so many
+    tables share one event loop, one HTTP pool and one upload executor.
+
+    Args:
+        name (str): The table name, used in the logs.
+        table_info (dict): The entry of the table registry (schema and configuration).
+        api_client (ApiClient): The shared HTTP client.
+        uploader (UploadExecutor): The shared upload executor.
+        bucket (str): The target bucket.
+        checkpoint (Checkpoint): The restart checkpoint of the table.
+        scheduler (PollScheduler): The poll scheduler of the table.
+        flush_policy (FlushPolicy): The flush triggers of the table.
+        spool (Spool): The write-ahead spool of the table, None to disable it.
+        compaction (CompactionWorker): The compaction of the closed hours of the table, None to disable it.
+        streaming (bool): Decode the pages incrementally.
+        chunk_size (int): Records decoded per chunk in streaming mode.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        table_info: dict,
+        api_client: ApiClient,
+        uploader: UploadExecutor,
+        bucket: str,
+        checkpoint: Checkpoint,
+        scheduler: PollScheduler,
+        flush_policy: FlushPolicy,
+        spool: Optional[Spool] = None,
+        compaction: Optional[CompactionWorker] = None,
+        streaming: bool = False,
+        chunk_size: int = 1000,
+    ):
+        table_config = table_info['configuration']
+
+        self.name              = name
+        self.schema            = table_info['schema']
+        self.endpoint          = table_config['endpoint']
+        self.prefix            = table_config['prefix']
+        self.delay_time        = table_config['delay_time']
+        self.array_field       = table_config.get('array_field', 'bets')
+        self.field_modify_date = table_config.get('field_modify_date', 'modifyDate')
+        self.field_id          = table_config.get('field_id', [])
+        self.fields_datetime   = table_config.get('fields_datetime', [])
+        self.fields_date       = table_config.get('fields_date', [])
+        self.typed_zero_layer  = table_config.get('typed_zero_layer', False)
+        self.parquet_profile   = table_config.get('parquet_profile', 'snappy')
+        profiles.get_profile(self.parquet_profile)
+
+        self.api_client   = api_client
+        self.uploader     = uploader
+        self.bucket       = bucket
+        self.checkpoint   = checkpoint
+        self.scheduler    = scheduler
+        self.flush_policy = flush_policy
+        self.spool        = spool
+        self.compaction   = compaction
+        self.streaming    = streaming
+        self.chunk_size   = chunk_size
+
+        self.max_tstamp      = None
+        self.max_modify_date = None
+        self.flushing        = None
+
+    def log(self, message: str) -> None:
+        print(f'[{self.name}] {message}')
+
+    def restore(self, args: list) -> None:
+        """
+        Restore the state of the table from its checkpoint or from its files in S3.
+
+        Args:
+            args (list): Arguments in the format of `sys.argv`, args[1] is the initial tstamp.
+        """
+        self.max_modify_date, self.max_tstamp = m_inf.restore_state(self.checkpoint, self.bucket, self.prefix, args)
+        self.log(f'Restored state: {self.max_tstamp}, {self.max_modify_date}')
+
+    def _fetch(self, tstamp: str) -> tuple:
+        if self.streaming:
+            return m_inf.fetch_bets_data_by_timestamp_streaming(self.api_client, self.endpoint, tstamp, self.schema, self.chunk_size, array_field=self.array_field)
+
+        records, new_max_tstamp, max_mobius_modified_on = m_inf.fetch_bets_data_by_timestamp(self.api_client, self.endpoint, tstamp, self.array_field)
+        with metrics.timer('preprocess_seconds', table=self.name):
+            data_df = h.records_to_frame(records, self.schema)
+        return data_df, new_max_tstamp, max_mobius_modified_on
+
+    async def next_page(self, tstamp: str) -> tuple[pl.DataFrame, str]:
+        """
+        Fetch the next page after `tstamp`. Without new data, or with data that is not at least
+        `delay_time` minutes old, it waits as decided by the scheduler and returns an empty page.
+        """
+        while True:
+            await asyncio.to_thread(memory.guard.admit)
+
+            start_time = time.time()
+            try:
+                data_df, new_max_tstamp, max_mobius_modified_on = await asyncio.to_thread(self._fetch, tstamp)
+            except Exception as e:
+                self.log(f"Error fetching information: {e}")
+                await asyncio.sleep(self.scheduler.on_error())
+                continue
+            new_max_tstamp = h.format_tstamp(new_max_tstamp)
+            metrics.observe('fetch_latency_seconds', time.time() - start_time, table=self.name)
+
+            self.log(f'{data_df.height}, ts:{tstamp}, {new_max_tstamp} in {time.time() - start_time:.3f} seconds')
+
+            if h.parse_tstamp(new_max_tstamp) <= h.parse_tstamp(tstamp):
+                await asyncio.sleep(self.scheduler.on_no_data())
+                return pl.DataFrame(schema=self.schema), tstamp
+
+            # An empty page has no maxMobiusModifiedOn, the lag is only known with new data
+            remaining = m_inf.seconds_until_old_enough(max_mobius_modified_on, self.delay_time)
+            metrics.gauge('data_lag_seconds', self.delay_time * 60 - remaining, 'Seconds', table=self.name)
+
+            if remaining >= 0:
+                await asyncio.sleep(self.scheduler.on_not_old_enough(remaining))
+                return pl.DataFrame(schema=self.schema), tstamp
+
+            self.scheduler.on_data(data_df.height)
+            metrics.observe('page_records', data_df.height, 'Count', table=self.name)
+            metrics.observe('page_bytes', data_df.estimated_size(), 'Bytes', table=self.name)
+            return data_df, new_max_tstamp
+
+    def _write(self, data_df: pl.DataFrame, initial_modify_date: str, max_modify_date: str, max_tstamp: str) -> list:
+        # Only the latest version of the records modified several times in the flush is written
+        data_df, removed = h.deduplicate(data_df, self.field_id, self.field_modify_date)
+        metrics.incr('dedup_removed_rows', removed, table=self.name)
+
+        routes = route_by_day(data_df, self.field_modify_date, initial_modify_date, max_modify_date)
+        self.log(f'Flush of {data_df.height} records ({removed} duplicates removed) into {len(routes)} days')
+
+        return [
+            m_inf.write_to_s3(
+                h.type_dates(data_day, self.fields_datetime, self.fields_date) if self.typed_zero_layer else data_day,
+                self.schema, start_date, end_date, self.bucket, self.prefix, max_tstamp, self.uploader, self.parquet_profile
+            )
+            for start_date, end_date, data_day in routes
+        ]
+
+    async def _flush(self, data_df: pl.DataFrame, initial_modify_date: str, max_modify_date: str, max_tstamp: str) -> None:
+        uploads = await asyncio.to_thread(self._write, data_df, initial_modify_date, max_modify_date, max_tstamp)
+        await asyncio.gather(*(asyncio.wrap_future(upload) for upload in uploads))
+
+        self.log(f'Committed checkpoint: {(max_tstamp, max_modify_date)}')
+        await asyncio.to_thread(self.checkpoint.save, max_tstamp, max_modify_date)
+        if self.spool is not None:
+            self.spool.truncate(max_tstamp)
+        if self.compaction is not None:
+            self.compaction.notify(max_modify_date)
+
+    async def run(self) -> None:
+        """
+        Follow the table forever. A flush is uploaded while the next pages are buffered, and it
+        is awaited before the next flush starts, so the checkpoints are committed in order.
+        """
+        replayed = self.spool.replay(self.max_tstamp) if self.spool is not None else []
+        tstamp   = replayed[-1][1] if replayed else self.max_tstamp
+
+        while True:
+            buffer              = FrameBuffer(self.schema)
+            initial_modify_date = self.max_modify_date
+
+            for data_df, self.max_tstamp, self.max_modify_date in replayed:
+                initial_modify_date = initial_modify_date or data_df[self.field_modify_date][0]
+                buffer.append(data_df)
+            replayed = []
+
+            while True:
+                trigger = self.flush_policy.trigger(buffer) or memory.guard.trigger(buffer)
+                if trigger:
+                    break
+
+                if self.flushing is not None and self.flushing.done():
+                    self.flushing.result()
+
+                data_df, tstamp = await self.next_page(tstamp)
+                if data_df.is_empty():
+                    self.max_tstamp = tstamp
+                    continue
+
+                max_modify_date     = h.max_date(data_df, self.field_modify_date)
+                initial_modify_date = initial_modify_date or data_df[self.field_modify_date][0]
+
+                if self.spool is not None:
+                    await asyncio.to_thread(self.spool.append, data_df, tstamp, max_modify_date)
+                buffer.append(data_df)
+
+                self.max_tstamp      = tstamp
+                self.max_modify_date = max_modify_date
+
+            self.log(self.flush_policy.describe(buffer, trigger))
+            metrics.incr('flushes', trigger=trigger, table=self.name)
+            metrics.observe('flush_records', len(buffer), 'Count', table=self.name)
+            if self.flushing is not None:
+                await self.flushing
+
+            self.flushing = asyncio.create_task(
+                self._flush(buffer.to_frame(), initial_modify_date, self.max_modify_date, self.max_tstamp)
+            )
@@ -0,0 +1,46 @@
+from typing import Optional
+
+from utils.buffer import FrameBuffer
+
+
+class FlushPolicy:
+    """
+    Decides when the buffered bets are written into S3.
+
+    A flush is due when the buffer reaches `max_rows` rows, `max_bytes` estimated bytes,
+    or when its oldest batch has waited `max_age` seconds. A trigger set to 0 is disabled.
+
+    Args:
+        max_rows (int): Rows that trigger a flush.
+        max_bytes (int): Estimated size in bytes that triggers a flush.
+        max_age (float): Seconds a buffered batch can wait before it is flushed.
+    """
+
+    def __init__(self, max_rows: int = 5000, max_bytes: int = 0, max_age: float = 0):
+        self.max_rows  = max_rows
+        self.max_bytes = max_bytes
+        self.max_age   = max_age
+
+    def trigger(self, buffer: FrameBuffer) -> Optional[str]:
+        """
+        Args:
+            buffer (FrameBuffer): The buffered bets.
+
+        Returns:
+            str: The trigger that fired ('rows', 'bytes' or 'age'), None when no flush is due.
+        """
+        if not buffer:
+            return None
+        if self.max_rows and len(buffer) >= self.max_rows:
+            return 'rows'
+        if self.max_bytes and buffer.estimated_size() >= self.max_bytes:
+            return 'bytes'
+        if self.max_age and buffer.age() >= self.max_age:
+            return 'age'
+        return None
+
+    def describe(self, buffer: FrameBuffer, trigger: str) -> str:
+        return (
+            f'Flush triggered by {trigger}: {len(buffer)} rows, '
+            f'{buffer.estimated_size() / 1024 / 1024:.2f} MB, {buffer.age():.1f}s old'
+        )
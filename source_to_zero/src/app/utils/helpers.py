@@ -1,4 +1,5 @@
-from typing import Optional, List, Any
+from typing import Optional, List, Any, Union
+import polars as pl
 
 
 def format_date(date: Optional[str]) -> Optional[str]:
@@ -12,20 +13,94 @@ def format_date(date: Optional[str]) -> Optional[str]:
     return date if not date else f"{date}.000" if len(date) == 19 else date.ljust(23, "0")
 
 
-def format_tstamp(tstamp: str) -> str:
+def format_date_expr(field: str) -> pl.Expr:
+    """
+    Vectorized version of `format_date` for a string column.
+
+    Args:
+        field (str): The name of the column.
+
+    Returns:
+        pl.Expr: The padded date strings.
+    """
+    col = pl.col(field)
+    return pl.when(col.str.len_chars() == 19).then(col + ".000").otherwise(col.str.pad_end(23, "0"))
+
+
+def parse_date_expr(field: str) -> pl.Expr:
+    """
+    Parse a string column with the API date format into datetimes, without Python calls per row.
+
+    Args:
+        field (str): The name of the column.
+
+    Returns:
+        pl.Expr: The parsed datetimes.
+    """
+    return format_date_expr(field).str.to_datetime(format="%Y-%m-%dT%H:%M:%S%.f")
+
+
+def max_date(data_df: pl.DataFrame, field: str) -> Optional[str]:
+    """
+    Get the original string value of the latest date of a column.
+
+    Args:
+        data_df (pl.DataFrame): The data.
+        field (str): The name of the date column.
+
+    Returns:
+        max_date (str): The latest date, as it was received.
+    """
+    return data_df.select(pl.col(field).get(parse_date_expr(field).arg_max())).item()
+
+
+def format_tstamp(tstamp: Union[str, int]) -> str:
     """
     To correct a timestamp
 
     Args:
-        tstamp (str): the tstamp.
+        tstamp (str | int): the tstamp, as hex string or as its UInt64 value.
         
     Returns:
         tstamp (str): The correct tstamp.
     """
+    if isinstance(tstamp, int):
+        return "0x%016X" % tstamp
 
     return "0x" + tstamp.upper() if tstamp[:2] != '0x' and len(tstamp) == 16 else "0x" + tstamp[2:].upper()
 
 
+def parse_tstamp(tstamp: Optional[str]) -> int:
+    """
+    The UInt64 value of a rowversion tstamp, so that tstamps are compared as numbers.
+
+    Args:
+        tstamp (str): The tstamp, with or without the '0x' prefix ("0x" or empty is 0).
+
+    Returns:
+        value (int): The rowversion.
+    """
+    tstamp = (tstamp or '')[2:] if (tstamp or '')[:2].lower() == '0x' else (tstamp or '')
+    return int(tstamp, 16) if tstamp else 0
+
+
+def parse_tstamp_expr(field: str) -> pl.Expr:
+    """
+    Parse a column of hex tstamps into UInt64, without Python calls per row. The integer parser
+    of polars is signed, so the high and low 32 bits are parsed apart.
+
+    Args:
+        field (str): The name of the column.
+
+    Returns:
+        pl.Expr: The rowversions as UInt64.
+    """
+    hexa = pl.col(field).str.strip_prefix("0x").str.strip_prefix("0X").str.zfill(16)
+    high = hexa.str.slice(0, 8).str.to_integer(base=16).cast(pl.UInt64)
+    low  = hexa.str.slice(8, 8).str.to_integer(base=16).cast(pl.UInt64)
+    return (high * pl.lit(1 << 32, dtype=pl.UInt64) + low).alias(field)
+
+
 def remove_fields(record: dict, fields_to_keep: list) -> dict:
     """
     A function to remove useless fileds in the records
@@ -72,6 +147,99 @@ def preprocess_data(data: list, fields_to_keep: list) -> list:
     return [remove_fields(x, fields_to_keep) for x in data]
 
 
+def records_to_frame(records: list, schema: dict, tstamp_fields: tuple = ('tstamp',)) -> pl.DataFrame:
+    """
+    Build a typed dataframe from the API records. Only the fields of the schema are loaded,
+    so the useless fields are dropped while the columns are built. The tstamp fields come as
+    hex strings and are parsed once here into UInt64.
+
+    Args:
+        records (list): The records as they come from the API.
+        schema (dict): The polars schema of the table.
+        tstamp_fields (tuple): The rowversion fields of the table.
+
+    Returns:
+        data (pl.DataFrame): The typed data.
+    """
+    tstamps = [field for field in tstamp_fields if schema.get(field) == pl.UInt64]
+    if not tstamps:
+        return pl.DataFrame(records, schema=schema)
+
+    data_df = pl.DataFrame(records, schema={**schema, **{field: pl.String for field in tstamps}})
+    return data_df.with_columns(parse_tstamp_expr(field) for field in tstamps)
+
+
+def normalize_tstamp(data_df: Union[pl.DataFrame, pl.LazyFrame], field: str = 'tstamp') -> Union[pl.DataFrame, pl.LazyFrame]:
+    """
+    Parse the tstamp column when it is still a hex string (data written before it was UInt64).
+
+    Args:
+        data_df (pl.DataFrame | pl.LazyFrame): The data.
+        field (str): The name of the tstamp column.
+
+    Returns:
+        data_df (pl.DataFrame | pl.LazyFrame): The data with a UInt64 tstamp.
+    """
+    schema = data_df.collect_schema() if isinstance(data_df, pl.LazyFrame) else data_df.schema
+    return data_df.with_columns(parse_tstamp_expr(field)) if schema.get(field) == pl.String else data_df
+
+
+def type_dates(data_df: pl.DataFrame, fields_datetime: list, fields_date: list) -> pl.DataFrame:
+    """
+    Parse the date columns that are still API strings into `pl.Datetime` (microseconds, as the
+    analytics layer) and `pl.Date`. The columns already typed are left as they are.
+
+    Args:
+        data_df (pl.DataFrame): The data.
+        fields_datetime (list): The datetime columns, e.g. ['transDate', 'modifyDate'].
+        fields_date (list): The date columns, e.g. ['winlostdate'].
+
+    Returns:
+        data_df (pl.DataFrame): The data with typed date columns.
+    """
+    schema = data_df.schema
+    return data_df.with_columns(
+        [parse_date_expr(field).cast(pl.Datetime('us')).alias(field) for field in fields_datetime if schema.get(field) == pl.String]
+        + [parse_date_expr(field).dt.date().alias(field) for field in fields_date if schema.get(field) == pl.String]
+    )
+
+
+def date_expr(field: str, dtype: pl.DataType) -> pl.Expr:
+    """
+    The datetimes of a date column, typed or still an API string.
+    """
+    return parse_date_expr(field) if dtype == pl.String else pl.col(field)
+
+
+def deduplicate(data_df: pl.DataFrame, field_id: list, field_modify_date: str, field_tstamp: str = 'tstamp') -> tuple[pl.DataFrame, int]:
+    """
+    Keep only the latest version of every record: the one with the latest modify date (and the
+    highest tstamp between equal dates) per key. The rows kept stay in their original order.
+
+    Args:
+        data_df (pl.DataFrame): The data.
+        field_id (list): The key of the records, e.g. ['customer', 'transId'].
+        field_modify_date (str): The modify date column.
+        field_tstamp (str): The tstamp column.
+
+    Returns:
+        data_df (pl.DataFrame): The latest version of every record.
+        removed (int): The number of rows removed.
+    """
+    if not field_id or data_df.height < 2:
+        return data_df, 0
+
+    latest_df = (
+        data_df
+        .with_row_index('__row')
+        .sort([parse_date_expr(field_modify_date), field_tstamp, '__row'], nulls_last=False)
+        .unique(subset=field_id, keep='last')
+        .sort('__row')
+        .drop('__row')
+    )
+    return latest_df, data_df.height - latest_df.height
+
+
 # def standard_date(record: dict) -> dict:
 #     """
 #     Standarize the datetime fiels in all records.
@@ -0,0 +1,156 @@
+import codecs
+import json
+from typing import Any, Dict, Iterable, Iterator, List
+
+
+_WHITESPACE = ' \t\n\r'
+
+
+class _TextReader:
+    """
+    Incremental UTF-8 text buffer on top of an iterable of byte chunks.
+
+    Only the unread tail of the document is kept in memory, so the buffer never
+    grows beyond the largest single JSON value plus one network chunk.
+    """
+
+    def __init__(self, byte_chunks: Iterable[bytes]):
+        self._chunks  = iter(byte_chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json    = json.JSONDecoder()
+        self.buffer   = ''
+        self.pos      = 0
+        self.eof      = False
+
+    def fill(self) -> bool:
+        """
+        Read the next chunk from the stream, dropping the consumed part of the buffer.
+
+        Returns:
+            bool: False when the stream was already exhausted.
+        """
+        if self.eof:
+            return False
+
+        try:
+            data = self._decoder.decode(next(self._chunks))
+        except StopIteration:
+            data     = self._decoder.decode(b'', final=True)
+            self.eof = True
+
+        self.buffer = self.buffer[self.pos:] + data
+        self.pos    = 0
+        return True
+
+    def peek(self) -> str:
+        """
+        Skip whitespace and return the next character without consuming it ('' at the end).
+        """
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self.fill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def expect(self, chars: str) -> str:
+        """
+        Consume the next non whitespace character, that must be one of `chars`.
+        """
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"Invalid JSON stream: expected one of {chars!r} at offset {self.pos}, found {char!r}")
+        self.pos += 1
+        return char
+
+    def value(self) -> Any:
+        """
+        Decode the next complete JSON value, reading more chunks while it is truncated.
+        """
+        self.peek()
+        while True:
+            try:
+                obj, end = self._json.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+
+            # A number or literal ending exactly at the buffer limit can be incomplete
+            if end == len(self.buffer) and self.fill():
+                continue
+
+            self.pos = end
+            return obj
+
+
+class JsonPageStream:
+    """
+    Streaming decoder for a page shaped like {"<array_field>": [...], "<key>": <value>, ...}.
+
+    The records of `array_field` are produced in lists of at most `chunk_size` elements
+    while the HTTP body is being read; every other top-level key is kept in `fields`.
+    Keys that come after the array are only available once `chunks()` is exhausted.
+
+    Args:
+        byte_chunks (Iterable[bytes]): The raw body, e.g. `urllib3.HTTPResponse.stream()`.
+        array_field (str): The top-level key of the array to stream.
+        chunk_size (int): Maximum number of records in each produced chunk.
+    """
+
+    def __init__(self, byte_chunks: Iterable[bytes], array_field: str, chunk_size: int = 1000):
+        self._reader     = _TextReader(byte_chunks)
+        self.array_field = array_field
+        self.chunk_size  = max(1, chunk_size)
+        self.fields: Dict[str, Any] = {}
+        self.n_records   = 0
+
+    def _array_chunks(self) -> Iterator[List[Any]]:
+        reader = self._reader
+        reader.expect('[')
+
+        if reader.peek() == ']':
+            reader.pos += 1
+            return
+
+        chunk = []
+        while True:
+            chunk.append(reader.value())
+            if len(chunk) >= self.chunk_size:
+                self.n_records += len(chunk)
+                yield chunk
+                chunk = []
+            if reader.expect(',]') == ']':
+                break
+
+        if chunk:
+            self.n_records += len(chunk)
+            yield chunk
+
+    def chunks(self) -> Iterator[List[Any]]:
+        """
+        Iterate over the records of `array_field` in chunks.
+
+        Returns:
+            Iterator[list]: Lists with at most `chunk_size` decoded records.
+
+        Raises:
+            ValueError: If the body is not a JSON object or it is truncated.
+        """
+        reader = self._reader
+        reader.expect('{')
+
+        if reader.peek() == '}':
+            reader.pos += 1
+            return
+
+        while True:
+            key = reader.value()
+            reader.expect(':')
+
+            if key == self.array_field and reader.peek() == '[':
+                yield from self._array_chunks()
+            else:
+                self.fields[key] = reader.value()
+
+            if reader.expect(',}') == '}':
+                break
@@ -1,13 +1,22 @@
 import os
 import polars as pl
-import urllib3
-import gc
 import json
 
 import aws.s3 as s3
+import aws.parquet_profiles as profiles
+from api.client import ApiClient
+from aws.uploader import UploadExecutor
+from concurrent.futures import Future
+from typing import Optional
 
 from datetime import datetime, timedelta
 import utils.helpers as h
+import utils.memory as memory
+import utils.metrics as metrics
+from utils.buffer import FrameBuffer
+from utils.checkpoint import Checkpoint
+from utils.compaction import PART_FILE
+from utils.json_stream import JsonPageStream
 from zoneinfo import ZoneInfo
 
 # UTC−4
@@ -21,6 +30,7 @@ def initialization_timestamp(files:list, args: list) -> tuple[str, str]:
     Get the last timestamp as a reference, searching the last diference timestamp into the s3 filenames.
 
     Args:
+        files (list): The filenames, only the part files with a tstamp (`PART_FILE`) are used.
         args (list): Received argunments when the code was running.
 
     Returns:
@@ -31,6 +41,8 @@ def initialization_timestamp(files:list, args: list) -> tuple[str, str]:
         ConnectionError: If it cannot access to s3 files or cannot extract the information from the filenames.
         ValueError: If any file was founded, and it do not have any received paramenter.
     """
+    # Other objects of the prefix (e.g. the compaction manifests) have no date nor tstamp
+    files = [filename for filename in files if PART_FILE.match(filename.split('/')[-1])]
 
     if  len(files) > 0:
         print(f'Last parquet is founded. Searching information ...')
@@ -65,31 +77,95 @@ def initialization_timestamp(files:list, args: list) -> tuple[str, str]:
     return max_modify_date, max_tstamp
 
 
+def restore_state(checkpoint: Checkpoint, bucket: str, prefix: str, args: list) -> tuple[str, str]:
+    """
+    Get the last max_modify_date and max_tstamp from the checkpoint, or from the filenames
+    in S3 when the checkpoint is missing or stale.
+
+    Args:
+        checkpoint (Checkpoint): The restart checkpoint of the poller.
+        bucket (str): The target bucket.
+        prefix (str): The prefix of the parquet files.
+        args (list): Received argunments when the code was running.
+
+    Returns:
+        max_modify_date (str): The last max_modify_date.
+        max_tstamp (str): The last max_tstamp.
+    """
+    state = checkpoint.load()
+    if state:
+        print(f'Variables was restored from the checkpoint ...')
+        return state['max_modify_date'], state['max_tstamp']
+
+    print(f'There is not a valid checkpoint. Searching the filenames ...')
+    files = latest_partition_files(bucket, prefix)
+    return initialization_timestamp(files, args)
+
+
+def latest_partition_files(bucket: str, prefix: str) -> list:
+    """
+    Get the filenames of the most recent `day=YYYYMMDD/batch=YYYYMMDDHH0000/` partition.
+
+    Both folders grow with the max modify date of the file (the day is shifted 3 hours), so
+    the newest file is always in the latest batch of the latest day. The day and batch folders
+    are found with delimiter listings, in reverse order, and only that leaf is listed.
+
+    Args:
+        bucket (str): The target bucket.
+        prefix (str): The prefix of the parquet files.
+
+    Returns:
+        files (list): The filenames of the latest partition, all the files of the prefix when it
+                      does not use the day/batch layout.
+    """
+    days = sorted((day for day in s3.get_prefixes(bucket, prefix) if day[len(prefix):].startswith('day=')), reverse=True)
+    if not days:
+        print(f'There are not day partitions under {prefix}. Listing the whole prefix ...')
+        return s3.get_objects(bucket, prefix)
+
+    for day in days:
+        batches = sorted((batch for batch in s3.get_prefixes(bucket, day) if batch[len(day):].startswith('batch=')), reverse=True)
+        for batch in batches:
+            files = [filename for filename in s3.get_objects(bucket, batch) if PART_FILE.match(filename)]
+            if files:
+                print(f'Latest partition: {batch} ({len(files)} files)')
+                return files
+
+    return []
+
+
 def write_to_s3(
-    bets_data: list,
+    bets_data: pl.DataFrame,
     schema: dict,
     start_date: str,
     end_date: str,
     bucket_name: str,
     prefix: str,
     marked: str,
-    ) -> None:
+    uploader: UploadExecutor = None,
+    profile: str = 'snappy',
+    ) -> Optional[Future]:
 
     """
     Write dataframe into S3
 
     Args:
-        bets_data (int): List of records to save as a parquet file with the schema.
+        bets_data (pl.DataFrame): The records to save as a parquet file with the schema (a list of records is also accepted).
         timestamp (str): Timestamp to include into the filename to track the evolution of fetch information in online process.
         start_modify_date (str): The minimun modify date to include in the filename
         end_modify_date (str): The maximun modify date to include in the filename
+        uploader (UploadExecutor): If it is set, the file is encoded here and uploaded in background.
+        profile (str): The parquet writer profile (codec, row groups, statistics), see `aws.parquet_profiles`.
+
+    Returns:
+        Future: The pending upload when an uploader is used, it resolves to the object key.
     """
 
     try:
         # Convert the input data to a Polars DataFrame
-        data_df     = pl.DataFrame(bets_data, schema=schema)
+        data_df     = bets_data if isinstance(bets_data, pl.DataFrame) else pl.DataFrame(bets_data, schema=schema)
 
-        # Write the DataFrame to a Parquet file in memory with snappy compression
+        # Write the DataFrame to a Parquet file in memory with the writer profile
         start_date  = datetime.strptime(h.format_date(start_date), "%Y-%m-%dT%H:%M:%S.%f")
         end_date    = datetime.strptime(h.format_date(end_date), "%Y-%m-%dT%H:%M:%S.%f")
 
@@ -99,14 +175,24 @@ def write_to_s3(
         end_str     = end_date.strftime("%Y%m%d%H%M%S")
 
         # Format the S3 object key using provided dates and object prefix
+        extension   = profiles.extension(profile)
         if marked:
-            object_key = f'{prefix}day={folder_name}/batch={batch_name}/part_{start_str}-{end_str}_{marked}.snappy.parquet'
+            object_key = f'{prefix}day={folder_name}/batch={batch_name}/part_{start_str}-{end_str}_{marked}{extension}'
         else:
-            object_key = f'{prefix}day={folder_name}/batch={batch_name}/part_{start_str}-{end_str}.snappy.parquet'
+            object_key = f'{prefix}day={folder_name}/batch={batch_name}/part_{start_str}-{end_str}{extension}'
+
+        with metrics.timer('parquet_encode_seconds'):
+            buffer = s3.__encode_parquet(data_df, profile)
+        metrics.observe('parquet_bytes', buffer.getbuffer().nbytes, 'Bytes')
+        del data_df
 
-        s3.__write_parquet(data_df, bucket_name, object_key)
+        if uploader is not None:
+            return uploader.submit(bucket_name, object_key, buffer)
+
+        with metrics.timer('upload_latency_seconds'):
+            s3.__put_buffer(buffer, bucket_name, object_key)
         print(f"Uploaded {object_key} to S3")
-        gc.collect()
+        memory.guard.collect_if_needed()
 
     except Exception as e:
         # Log any errors encountered during the upload process
@@ -114,30 +200,68 @@ def write_to_s3(
         raise e
 
 
-def fetch_bets_data_by_timestamp(api_url: str, timestamp: str) -> list[list, str]:
+def fetch_bets_data_by_timestamp(client: ApiClient, api_url: str, timestamp: str, array_field: str = 'bets') -> list[list, str]:
 
     """
     A function to fetch information from Taiwan Team using the timestamp version of bets API Route
 
     Args:
+        client (ApiClient): The long-lived API client.
         api_url (str): Root API from API.
         timestamp (str): The API to use to fetch information
+        array_field (str): The field of the response with the records.
 
     Returns:
         bets (list): The list of bets records.
         maxTimestamp (str): The last max_tstamp, you can expect that the timestamp is the maxium in the set (the bets list).
     """
 
-    http        = urllib3.PoolManager()
-    response    = http.request('GET', f'{api_url}?timestamp={timestamp}')
-
-    if response.status != 200:
-        raise Exception(f"Failed to fetch data: {response.status_code}")
-
+    response    = client.get(f'{api_url}?timestamp={timestamp}')
     data = json.loads(response.data.decode('utf-8'))
     print("maxMobiusModifiedOn", data["maxMobiusModifiedOn"], "date server:", datetime.now())
     print("maxTimestamp", data["maxTimestamp"])
-    return data['bets'], data['maxTimestamp'], data['maxMobiusModifiedOn']
+    return data[array_field], data['maxTimestamp'], data['maxMobiusModifiedOn']
+
+
+def fetch_bets_data_by_timestamp_streaming(client: ApiClient, api_url: str, timestamp: str, schema: dict, chunk_size: int = 1000, read_size: int = 65536, array_field: str = 'bets') -> list[pl.DataFrame, str]:
+
+    """
+    Streaming version of `fetch_bets_data_by_timestamp`. The body is decoded incrementally from the
+    response stream and every chunk of bets is turned into a typed dataframe as soon as it is decoded,
+    so the raw bytes, the decoded text and the records of the page are never held completely in memory.
+
+    Args:
+        client (ApiClient): The long-lived API client.
+        api_url (str): Root API from API.
+        timestamp (str): The API to use to fetch information
+        schema (dict): The polars schema of the bets, only its fields are kept.
+        chunk_size (int): Number of bets decoded before they are converted.
+        read_size (int): Number of bytes read from the socket in each step.
+        array_field (str): The field of the response with the records.
+
+    Returns:
+        bets (pl.DataFrame): The typed bets records.
+        maxTimestamp (str): The last max_tstamp, you can expect that the timestamp is the maxium in the set (the bets list).
+        maxMobiusModifiedOn (str): The max modify date known by the server.
+    """
+
+    response    = client.get(f'{api_url}?timestamp={timestamp}', preload_content=False)
+
+    # Every chunk is converted and appended to the page as soon as it is decoded, so only the
+    # records of one chunk exist at a time. The page references the chunks without a copy
+    bets = FrameBuffer(schema)
+    try:
+        page = JsonPageStream(response.stream(read_size), array_field, chunk_size)
+        for chunk in page.chunks():
+            bets.append(h.records_to_frame(chunk, schema))
+            del chunk
+    finally:
+        response.release_conn()
+
+    print("maxMobiusModifiedOn", page.fields["maxMobiusModifiedOn"], "date server:", datetime.now())
+    print("maxTimestamp", page.fields["maxTimestamp"])
+    return bets.to_frame(rechunk=False), page.fields['maxTimestamp'], page.fields['maxMobiusModifiedOn']
+
 
 def parse_iso_timestamp(timestamp_str):
     """
@@ -158,14 +282,22 @@ def parse_iso_timestamp(timestamp_str):
     # Si llegamos aquí, ninguno de los formatos encajó:
     raise ValueError(f"Formato de fecha inválido: {timestamp_str}")
 
-def is_old_enough(timestamp_str, DELAY_TIME=3):
+def seconds_until_old_enough(timestamp_str, DELAY_TIME=3):
     """
-    Devuelve True si la fecha en timestamp_str tiene una antigüedad mayor a DELAY_TIME
-    respecto a ahora. Levanta ValueError si el formato no coincide con ninguno de los soportados.
+    Devuelve los segundos que faltan para que la fecha en timestamp_str tenga una antigüedad
+    mayor a DELAY_TIME respecto a ahora (negativo si ya la tiene). Levanta ValueError si el
+    formato no coincide con ninguno de los soportados.
     """
     srt = datetime.now(TZ_MINUS4)
     print("Server relative time", srt)
     timestamp = parse_iso_timestamp(timestamp_str)
     timestamp = timestamp.replace(tzinfo=TZ_MINUS4)
     print("Adding tzinfo de UTC−4 to MaxMobiusModifiedDate:", timestamp)
-    return (srt - timestamp) > timedelta(minutes=DELAY_TIME)
\ No newline at end of file
+    return (timedelta(minutes=DELAY_TIME) - (srt - timestamp)).total_seconds()
+
+def is_old_enough(timestamp_str, DELAY_TIME=3):
+    """
+    Devuelve True si la fecha en timestamp_str tiene una antigüedad mayor a DELAY_TIME
+    respecto a ahora. Levanta ValueError si el formato no coincide con ninguno de los soportados.
+    """
+    return seconds_until_old_enough(timestamp_str, DELAY_TIME) < 0
@@ -0,0 +1,161 @@
+import gc
+import os
+import time
+from typing import Optional
+
+import psutil
+
+import utils.metrics as metrics
+from utils.buffer import FrameBuffer
+
+# cgroup files with the memory limit of the container (v2, then v1)
+CGROUP_LIMIT_FILES = ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes')
+
+
+def memory_limit() -> int:
+    """
+    Returns:
+        int: Bytes available to the process: the cgroup limit of the container when there is
+             one, the physical memory of the host otherwise.
+    """
+    total = psutil.virtual_memory().total
+    for path in CGROUP_LIMIT_FILES:
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+        except OSError:
+            continue
+        if value.isdigit():
+            return min(int(value), total)
+    return total
+
+
+class MemoryGuard:
+    """
+    Keeps the resident memory of the process under a budget.
+
+    - Above `gc_ratio` of the budget, a garbage collection is run (instead of after every upload).
+    - At the budget, the buffered data is flushed, and the fetch of new pages waits (up to
+      `max_pause` seconds) until the flushes and uploads in progress release memory.
+
+    The allocator does not always give the freed memory back, so after a memory flush the RSS
+    can stay over the budget. The RSS measured then becomes a floor, and the next memory flush
+    waits until the process grows `headroom` of the budget over it, instead of flushing tiny
+    batches in a loop.
+
+    Args:
+        budget (int): Maximum RSS in bytes, 0 to disable the guard.
+        gc_ratio (float): Fraction of the budget that triggers a garbage collection.
+        max_pause (float): Maximum seconds a fetch waits for memory before it goes on.
+        poll_interval (float): Seconds between two checks while the fetch waits.
+        headroom (float): Fraction of the budget the RSS must grow over the floor to flush again.
+    """
+
+    def __init__(self, budget: int = 0, gc_ratio: float = 0.8, max_pause: float = 60, poll_interval: float = 0.5, headroom: float = 0.1):
+        self.budget        = budget
+        self.gc_ratio      = gc_ratio
+        self.max_pause     = max_pause
+        self.poll_interval = poll_interval
+        self.headroom      = headroom
+        self.floor         = 0
+        self.flushed       = False
+        self.process       = psutil.Process(os.getpid())
+
+    def rss(self) -> int:
+        rss = self.process.memory_info().rss
+        metrics.gauge('rss_bytes', rss, 'Bytes')
+        return rss
+
+    def collect_if_needed(self) -> bool:
+        """
+        Run a garbage collection when the RSS is above `gc_ratio` of the budget.
+
+        Returns:
+            bool: True if a collection was run.
+        """
+        if not self.budget or self.rss() < self.gc_ratio * self.budget:
+            return False
+
+        start = time.perf_counter()
+        gc.collect()
+        metrics.incr('gc_collections')
+        print(f'Memory pressure: gc in {time.perf_counter() - start:.3f}s, RSS {self.rss() / 1024 / 1024:.0f} MB')
+        return True
+
+    def limit(self) -> int:
+        """
+        Returns:
+            int: The RSS that triggers a flush and pauses the fetch: the budget, or the floor left
+                 by the last memory flush plus the headroom when it is higher.
+        """
+        rss = self.rss()
+        if self.flushed:
+            self.floor, self.flushed = rss, False
+        else:
+            self.floor = min(self.floor, rss)
+
+        return max(self.budget, int(self.floor + self.headroom * self.budget))
+
+    def trigger(self, buffer: FrameBuffer) -> Optional[str]:
+        """
+        Returns:
+            str: 'memory' when the buffer must be flushed to release memory, None otherwise.
+        """
+        if not self.budget or not buffer:
+            return None
+
+        limit = self.limit()
+        if self.rss() < limit:
+            return None
+
+        self.collect_if_needed()
+        if self.rss() < limit:
+            return None
+
+        self.flushed = True
+        return 'memory'
+
+    def admit(self) -> None:
+        """
+        Wait before fetching a new page while the RSS is over the budget.
+        """
+        if not self.budget:
+            return
+
+        limit = self.limit()
+        if self.rss() < limit:
+            return
+
+        if self.collect_if_needed() and self.rss() < limit:
+            return
+
+        start = time.perf_counter()
+        while self.rss() >= limit:
+            if time.perf_counter() - start >= self.max_pause:
+                print(f'Memory budget still exceeded after {self.max_pause}s. Fetching anyway')
+                return
+            time.sleep(self.poll_interval)
+
+        metrics.incr('memory_pauses')
+        print(f'Fetch paused {time.perf_counter() - start:.2f}s by the memory budget')
+
+
+# Process-wide guard, configured at start by the poller
+guard = MemoryGuard()
+
+
+def configure(budget_mb: float = 0, budget_ratio: float = 0.8, gc_ratio: float = 0.8, max_pause: float = 60) -> MemoryGuard:
+    """
+    Configure the process-wide guard.
+
+    Args:
+        budget_mb (float): The RSS budget in MB, 0 to use `budget_ratio` of the memory limit.
+        budget_ratio (float): Fraction of the container (or host) memory used as budget.
+        gc_ratio (float): Fraction of the budget that triggers a garbage collection.
+        max_pause (float): Maximum seconds a fetch waits for memory.
+    """
+    guard.budget    = int(budget_mb * 1024 * 1024) if budget_mb else int(budget_ratio * memory_limit())
+    guard.gc_ratio  = gc_ratio
+    guard.max_pause = max_pause
+    print(f'MEMORY BUDGET: {guard.budget / 1024 / 1024:.0f} MB (gc above {gc_ratio:.0%})')
+    return guard
@@ -0,0 +1,239 @@
+import bisect
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+# Upper bounds of the histogram buckets by unit
+BUCKETS = {
+    'Seconds' : (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+    'Count'   : (1, 10, 100, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000),
+    'Bytes'   : tuple(1024 * 4 ** i for i in range(11)),  # 1 KB to 1 GB
+}
+
+# EMF accepts up to 100 values per metric in a line
+EMF_MAX_VALUES = 100
+
+
+class _Histogram:
+
+    def __init__(self, unit: str, max_pending: int):
+        self.unit        = unit
+        self.buckets     = BUCKETS.get(unit, BUCKETS['Count'])
+        self.counts      = [0] * (len(self.buckets) + 1)
+        self.sum         = 0.0
+        self.count       = 0
+        self.pending     = []
+        self.max_pending = max_pending
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum   += value
+        self.count += 1
+        if len(self.pending) < self.max_pending:
+            self.pending.append(value)
+
+
+class MetricsRegistry:
+    """
+    In-memory counters, gauges and histograms of the poller, keyed by name and labels.
+
+    They are exported as CloudWatch embedded metric format (EMF) JSON lines, with the values
+    observed since the previous export, or as Prometheus text with cumulative buckets.
+
+    Args:
+        namespace (str): The CloudWatch namespace of the EMF lines.
+        max_pending (int): Values kept per histogram between two EMF exports.
+    """
+
+    def __init__(self, namespace: str = 'NRT/SourceToZero', max_pending: int = 1000):
+        self.namespace   = namespace
+        self.max_pending = max_pending
+        self.counters    = {}  # key -> [total, since the last export]
+        self.gauges      = {}  # key -> (value, unit)
+        self.histograms  = {}  # key -> _Histogram
+        self._lock       = threading.Lock()
+
+    @staticmethod
+    def _key(name: str, labels: dict) -> tuple:
+        return name, tuple(sorted(labels.items()))
+
+    def incr(self, name: str, value: float = 1, **labels) -> None:
+        with self._lock:
+            counter = self.counters.setdefault(self._key(name, labels), [0, 0])
+            counter[0] += value
+            counter[1] += value
+
+    def gauge(self, name: str, value: float, unit: str = 'None', **labels) -> None:
+        with self._lock:
+            self.gauges[self._key(name, labels)] = (value, unit)
+
+    def observe(self, name: str, value: float, unit: str = 'Seconds', **labels) -> None:
+        with self._lock:
+            key = self._key(name, labels)
+            if key not in self.histograms:
+                self.histograms[key] = _Histogram(unit, self.max_pending)
+            self.histograms[key].observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """
+        Observe the seconds spent in the block.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, 'Seconds', **labels)
+
+    def emf_lines(self) -> list:
+        """
+        Returns:
+            list: One EMF JSON line per label set, with the counter increments, the gauges and the
+                  histogram values since the previous call.
+        """
+        groups = {}
+        with self._lock:
+            for (name, labels), counter in self.counters.items():
+                if counter[1]:
+                    groups.setdefault(labels, []).append((name, 'Count', [counter[1]]))
+                    counter[1] = 0
+            for (name, labels), (value, unit) in self.gauges.items():
+                groups.setdefault(labels, []).append((name, unit, [value]))
+            for (name, labels), histogram in self.histograms.items():
+                if histogram.pending:
+                    groups.setdefault(labels, []).append((name, histogram.unit, histogram.pending))
+                    histogram.pending = []
+
+        lines     = []
+        timestamp = int(time.time() * 1000)
+        for labels, metrics in groups.items():
+            for offset in range(0, max(len(values) for _, _, values in metrics), EMF_MAX_VALUES):
+                line = {
+                    '_aws': {
+                        'Timestamp': timestamp,
+                        'CloudWatchMetrics': [{
+                            'Namespace' : self.namespace,
+                            'Dimensions': [[label for label, _ in labels]],
+                            'Metrics'   : [],
+                        }],
+                    },
+                    **dict(labels),
+                }
+                for name, unit, values in metrics:
+                    chunk = values[offset:offset + EMF_MAX_VALUES]
+                    if chunk:
+                        line['_aws']['CloudWatchMetrics'][0]['Metrics'].append({'Name': name, 'Unit': unit})
+                        line[name] = chunk if len(chunk) > 1 else chunk[0]
+                lines.append(json.dumps(line))
+        return lines
+
+    def prometheus_text(self) -> str:
+        """
+        Returns:
+            str: All the metrics in the Prometheus text exposition format.
+        """
+        def series(name: str, labels: tuple, extra: tuple = ()) -> str:
+            pairs = ','.join(f'{label}="{value}"' for label, value in labels + extra)
+            return f'nrt_{name}{{{pairs}}}' if pairs else f'nrt_{name}'
+
+        lines = []
+        with self._lock:
+            for (name, labels), counter in sorted(self.counters.items()):
+                lines.append(f'{series(name + "_total", labels)} {counter[0]}')
+            for (name, labels), (value, _) in sorted(self.gauges.items()):
+                lines.append(f'{series(name, labels)} {value}')
+            for (name, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0]):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + ('+Inf',), histogram.counts):
+                    cumulative += count
+                    lines.append(f'{series(name + "_bucket", labels, (("le", bound),))} {cumulative}')
+                lines.append(f'{series(name + "_sum", labels)} {histogram.sum}')
+                lines.append(f'{series(name + "_count", labels)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+
+class EmfEmitter:
+    """
+    Writes the EMF lines of a registry every `interval` seconds, into a file (e.g. one tailed by
+    the CloudWatch agent) or into stdout, where the awslogs driver of ECS picks them up.
+    """
+
+    def __init__(self, registry: MetricsRegistry, path: Optional[str] = None, interval: float = 60):
+        self.registry = registry
+        self.path     = path
+        self.interval = interval
+        self.thread   = threading.Thread(target=self._run, name='metrics-emf', daemon=True)
+        self.thread.start()
+
+    def emit(self) -> None:
+        lines = self.registry.emf_lines()
+        if not lines:
+            return
+        if self.path:
+            with open(self.path, 'a') as f:
+                f.write('\n'.join(lines) + '\n')
+        else:
+            print('\n'.join(lines), file=sys.stdout, flush=True)
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.emit()
+            except Exception as e:
+                print(f'Cannot emit the metrics: {e}')
+
+
+def serve_prometheus(registry: MetricsRegistry, port: int, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+    """
+    Serve the registry as Prometheus text on http://host:port/metrics from a daemon thread.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = registry.prometheus_text().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    return server
+
+
+# Process-wide registry, shared by the poller, the writers and the uploader
+registry = MetricsRegistry()
+incr     = registry.incr
+gauge    = registry.gauge
+observe  = registry.observe
+timer    = registry.timer
+
+
+def start(mode: str, path: Optional[str] = None, port: int = 9108, interval: float = 60, namespace: Optional[str] = None) -> None:
+    """
+    Start exporting the process-wide registry.
+
+    Args:
+        mode (str): 'emf', 'prometheus' or 'none'.
+        path (str): File of the EMF lines, stdout when it is empty.
+        port (int): Local port of the Prometheus endpoint.
+        interval (float): Seconds between two EMF exports.
+        namespace (str): The CloudWatch namespace of the EMF lines.
+    """
+    if namespace:
+        registry.namespace = namespace
+
+    if mode == 'emf':
+        print(f'METRICS: EMF every {interval}s into {path or "stdout"}')
+        EmfEmitter(registry, path, interval)
+    elif mode == 'prometheus':
+        print(f'METRICS: Prometheus text on http://127.0.0.1:{port}/metrics')
+        serve_prometheus(registry, port)
@@ -0,0 +1,176 @@
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Callable, Optional, Tuple
+
+
+class UploadStageError(RuntimeError):
+    """
+    A flush of the background upload stage failed. Nothing after it was committed, and the stage
+    does not run any other job, so the poller cannot go on: it stops and a restart resumes from
+    the last committed checkpoint.
+    """
+
+
+class PageSource:
+    """
+    Sequential source of pages: every page is fetched when it is requested.
+
+    Args:
+        fetch_page (Callable): Function that receives a tstamp and returns (bets_data, new_max_tstamp).
+        tstamp (str): The tstamp where the fetch starts.
+    """
+
+    def __init__(self, fetch_page: Callable[[str], Tuple[list, str]], tstamp: str):
+        self.fetch_page = fetch_page
+        self.tstamp     = tstamp
+
+    def next_page(self) -> Tuple[list, str]:
+        bets_data, self.tstamp = self.fetch_page(self.tstamp)
+        return bets_data, self.tstamp
+
+    def rewind(self, tstamp: str) -> None:
+        self.tstamp = tstamp
+
+    def close(self) -> None:
+        pass
+
+
+class PrefetchingPageSource(PageSource):
+    """
+    Page source that reads ahead in a background thread, so the API is queried while the
+    previous pages are transformed and uploaded. At most `max_pages_ahead` pages wait in memory.
+
+    Args:
+        fetch_page (Callable): Function that receives a tstamp and returns (bets_data, new_max_tstamp).
+        tstamp (str): The tstamp where the fetch starts.
+        max_pages_ahead (int): Size of the bounded queue between the fetcher and the consumer.
+    """
+
+    def __init__(self, fetch_page: Callable[[str], Tuple[list, str]], tstamp: str, max_pages_ahead: int = 2):
+        super().__init__(fetch_page, tstamp)
+        self.pages   = queue.Queue(maxsize=max(1, max_pages_ahead))
+        self.error   = None
+        self.stopped = threading.Event()
+        self.thread  = threading.Thread(target=self._run, name='page-fetcher', daemon=True)
+        self.thread.start()
+
+    def _run(self) -> None:
+        cursor = self.tstamp
+        try:
+            while not self.stopped.is_set():
+                bets_data, cursor = self.fetch_page(cursor)
+                self.pages.put((bets_data, cursor))
+        except BaseException as e:
+            self.error = e
+            self.pages.put(None)
+
+    def next_page(self) -> Tuple[list, str]:
+        page = self.pages.get()
+        if page is None:
+            raise RuntimeError(f"Page fetcher stopped: {self.error}")
+
+        self.tstamp = page[1]
+        return page
+
+    def rewind(self, tstamp: str) -> None:
+        raise RuntimeError("A prefetching page source cannot be rewound")
+
+    def close(self) -> None:
+        """
+        Stop the fetcher. The pages read ahead are dropped, so a fetcher blocked on the full
+        queue can put its page and see the stop.
+        """
+        self.stopped.set()
+        while True:
+            try:
+                self.pages.get_nowait()
+            except queue.Empty:
+                break
+
+
+class UploadStage:
+    """
+    Executes the upload jobs of every flush inline and commits the checkpoint right after.
+
+    A job returns the results of its writes; the ones that are futures (background uploads)
+    are awaited before committing. The checkpoint (max_tstamp, max_modify_date) only moves
+    when all the files of a flush are in S3, which is the state a restart recovers from the
+    filenames, so a flush never starts to upload before the previous one is acknowledged.
+
+    Args:
+        checkpoint (tuple): The durable (max_tstamp, max_modify_date) at start.
+        on_commit (Callable): Called with every committed checkpoint, e.g. to persist it.
+    """
+
+    def __init__(self, checkpoint: Tuple[str, Optional[str]], on_commit: Optional[Callable[[Tuple[str, str]], None]] = None):
+        self.committed = checkpoint
+        self.on_commit = on_commit
+
+    def _complete(self, results: Optional[list], checkpoint: Tuple[str, str]) -> None:
+        for result in results or []:
+            if isinstance(result, Future):
+                result.result()
+
+        self.committed = checkpoint
+        print(f'Committed checkpoint: {self.committed}')
+
+        if self.on_commit:
+            self.on_commit(checkpoint)
+
+    def submit(self, job: Callable[[], Optional[list]], checkpoint: Tuple[str, str]) -> None:
+        self._complete(job(), checkpoint)
+
+    def check(self) -> None:
+        pass
+
+    def drain(self) -> None:
+        pass
+
+
+class BackgroundUploadStage(UploadStage):
+    """
+    Upload stage running in its own thread, fed through a bounded queue.
+
+    The jobs are executed one by one in submission order, so the checkpoints are committed in
+    order too. `submit` blocks while `max_pending` flushes are waiting (backpressure).
+
+    Args:
+        checkpoint (tuple): The durable (max_tstamp, max_modify_date) at start.
+        max_pending (int): Number of flushes that can wait for the upload.
+        on_commit (Callable): Called with every committed checkpoint, from the upload thread.
+    """
+
+    def __init__(self, checkpoint: Tuple[str, Optional[str]], max_pending: int = 2, on_commit: Optional[Callable[[Tuple[str, str]], None]] = None):
+        super().__init__(checkpoint, on_commit)
+        self.jobs   = queue.Queue(maxsize=max(1, max_pending))
+        self.error  = None
+        self.thread = threading.Thread(target=self._run, name='uploader', daemon=True)
+        self.thread.start()
+
+    def _run(self) -> None:
+        while True:
+            job, checkpoint = self.jobs.get()
+            try:
+                if self.error is None:
+                    self._complete(job(), checkpoint)
+            except BaseException as e:
+                self.error = e
+            finally:
+                self.jobs.task_done()
+
+    def submit(self, job: Callable[[], Optional[list]], checkpoint: Tuple[str, str]) -> None:
+        self.check()
+        self.jobs.put((job, checkpoint))
+
+    def check(self) -> None:
+        """
+        Raises:
+            UploadStageError: If a previous upload failed. Nothing after it was committed.
+        """
+        if self.error is not None:
+            raise UploadStageError(f"Upload stage failed: {self.error}")
+
+    def drain(self) -> None:
+        self.jobs.join()
+        self.check()
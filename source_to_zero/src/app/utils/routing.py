@@ -0,0 +1,47 @@
+from datetime import date
+from typing import List, Tuple
+
+import polars as pl
+
+import utils.helpers as h
+
+_DAY_COLUMN = '__day'
+
+
+def route_by_day(data_df: pl.DataFrame, field: str, start_date: str, end_date: str) -> List[Tuple[str, str, pl.DataFrame]]:
+    """
+    Partition a batch by the day of a date column, in a single pass and for any number of days.
+
+    The column is parsed once. Rows dated before the day of `start_date` (or without date) go
+    to that first day, like the current day of the previous two-day split did.
+
+    Args:
+        data_df (pl.DataFrame): The batch to split.
+        field (str): The date column used to route, e.g. modifyDate.
+        start_date (str): The max date of the previous flush, lower bound of the first day.
+        end_date (str): The max date of the batch, upper bound of the last day.
+
+    Returns:
+        routes (list): (start_date, end_date, data) for every day with data, sorted by day.
+                       Days in the middle are bounded by T00:00:00.000 and T23:59:59.999.
+    """
+    first_day = date.fromisoformat(start_date[:10])
+    day       = h.parse_date_expr(field).dt.date()
+
+    partitions = (
+        data_df
+        .with_columns(
+            pl.when(day.is_null() | (day < first_day)).then(pl.lit(first_day)).otherwise(day).alias(_DAY_COLUMN)
+        )
+        .partition_by(_DAY_COLUMN, as_dict=True, include_key=False)
+    )
+
+    days   = sorted(key[0] for key in partitions)
+    routes = []
+    for i, day_value in enumerate(days):
+        day_str = day_value.isoformat()
+        start   = start_date if day_value == first_day else f'{day_str}T00:00:00.000'
+        end     = end_date if i == len(days) - 1 else f'{day_str}T23:59:59.999'
+        routes.append((start, end, partitions[(day_value,)]))
+
+    return routes
@@ -0,0 +1,145 @@
+import random
+import threading
+import time
+from collections import Counter, deque
+from typing import Optional
+
+import utils.metrics as metrics
+
+
+class PollScheduler:
+    """
+    Decides how long the poller sleeps between API calls.
+
+    - New data: poll again right away.
+    - Data not yet DELAY_TIME old: sleep exactly until maxMobiusModifiedOn clears the delay.
+    - No new data: wait the observed gap between pages with data, doubled on every
+      consecutive empty poll (exponential backoff during quiet periods).
+    - API error: full jitter exponential backoff, capped at `error_max`, so a failing API is not
+      hammered nor left waiting a fixed minute after it recovers. A successful poll resets it.
+
+    Every decision is counted, so it can be logged or published as a metric.
+
+    Args:
+        min_interval (float): Shortest sleep in seconds.
+        max_interval (float): Longest sleep in seconds for the quiet backoff.
+        backoff_factor (float): Growth of the sleep on every consecutive empty poll.
+        delay_margin (float): Seconds added to the remaining delay, to not poll just before it clears.
+        window (int): Number of recent pages with data used to estimate the arrival rate.
+        error_base (float): Seconds of the backoff after the first consecutive API error.
+        error_max (float): Longest sleep in seconds after an API error.
+    """
+
+    def __init__(
+        self,
+        min_interval: float = 1.0,
+        max_interval: float = 60.0,
+        backoff_factor: float = 2.0,
+        delay_margin: float = 1.0,
+        window: int = 20,
+        error_base: float = 1.0,
+        error_max: float = 60.0,
+    ):
+        self.min_interval   = min_interval
+        self.max_interval   = max_interval
+        self.backoff_factor = backoff_factor
+        self.delay_margin   = delay_margin
+        self.arrivals       = deque(maxlen=max(2, window))
+        self.error_base     = error_base
+        self.error_max      = error_max
+        self.quiet_polls    = 0
+        self.errors         = 0
+        self.decisions      = Counter()
+        self.last_sleep     = 0.0
+        self.total_sleep    = 0.0
+        self._lock          = threading.Lock()
+
+    def _decide(self, reason: str, sleep_time: float) -> float:
+        self.decisions[reason] += 1
+        metrics.incr('poll_decisions', reason=reason)
+        metrics.observe('poll_sleep_seconds', sleep_time)
+        self.last_sleep   = sleep_time
+        self.total_sleep += sleep_time
+        print(f"Scheduler: {reason}, sleep {sleep_time:.2f}s")
+        return sleep_time
+
+    def arrival_gap(self) -> Optional[float]:
+        """
+        Returns:
+            float: Mean seconds between pages with data in the window, None without enough pages.
+        """
+        if len(self.arrivals) < 2:
+            return None
+        return (self.arrivals[-1][0] - self.arrivals[0][0]) / (len(self.arrivals) - 1)
+
+    def arrival_rate(self) -> Optional[float]:
+        """
+        Returns:
+            float: Records per second received in the window, None without enough pages.
+        """
+        if len(self.arrivals) < 2:
+            return None
+        elapsed = self.arrivals[-1][0] - self.arrivals[0][0]
+        records = sum(n for _, n in list(self.arrivals)[1:])
+        return records / elapsed if elapsed > 0 else None
+
+    def on_data(self, n_records: int) -> float:
+        """
+        A page with new data was received: poll again right away.
+        """
+        with self._lock:
+            self.arrivals.append((time.monotonic(), n_records))
+            self.quiet_polls = 0
+            self.errors      = 0
+            return self._decide('data', 0.0)
+
+    def on_not_old_enough(self, remaining: float) -> float:
+        """
+        The data is not DELAY_TIME old yet.
+
+        Args:
+            remaining (float): Seconds until maxMobiusModifiedOn clears the delay.
+        """
+        with self._lock:
+            self.errors = 0
+            return self._decide('delay', max(self.min_interval, remaining + self.delay_margin))
+
+    def on_no_data(self) -> float:
+        """
+        The API has no new data: wait the expected gap between pages and back off while it stays quiet.
+        """
+        with self._lock:
+            self.errors = 0
+            gap         = self.arrival_gap() or self.min_interval
+            base        = min(self.max_interval, max(self.min_interval, gap))
+            sleep_time  = min(self.max_interval, base * self.backoff_factor ** self.quiet_polls)
+            self.quiet_polls += 1
+            return self._decide('no_data', sleep_time)
+
+    def on_error(self) -> float:
+        """
+        The API call failed: back off exponentially on every consecutive error, with full jitter
+        (a random sleep between min_interval and the capped backoff), so the pollers of the
+        tables do not retry all at once.
+        """
+        with self._lock:
+            cap         = min(self.error_max, self.error_base * self.backoff_factor ** self.errors)
+            sleep_time  = max(self.min_interval, random.uniform(0, cap))
+            self.errors += 1
+            return self._decide('error', sleep_time)
+
+    def metrics(self) -> dict:
+        """
+        Returns:
+            dict: Counters of every decision and the current estimations.
+        """
+        with self._lock:
+            return {
+                'decisions'    : dict(self.decisions),
+                'last_sleep'   : self.last_sleep,
+                'total_sleep'  : self.total_sleep,
+                'quiet_polls'  : self.quiet_polls,
+                'errors'       : self.errors,
+                'arrival_gap'  : self.arrival_gap(),
+                'arrival_rate' : self.arrival_rate(),
+            }
@@ -0,0 +1,123 @@
+import json
+import os
+import threading
+from typing import List, Tuple
+
+import polars as pl
+
+import utils.helpers as h
+
+
+class Spool:
+    """
+    Local write-ahead spool of the pages fetched but not uploaded yet.
+
+    Every page is written as an Arrow IPC segment with a JSON sidecar holding the tstamp
+    where the page ends and its max modifyDate. The sidecar is renamed into place after the
+    segment, so only complete pages are seen. Segments are removed once a flush up to their
+    tstamp is acknowledged; after a crash, the remaining ones are replayed instead of being
+    fetched again from the API.
+
+    Args:
+        directory (str): Folder of the segments, created if needed.
+        compression (str): IPC compression ('uncompressed', 'lz4' or 'zstd').
+    """
+
+    def __init__(self, directory: str, compression: str = 'lz4'):
+        self.directory   = directory
+        self.compression = compression
+        self.segments    = []  # (seq, tstamp value), sorted by seq
+        self._lock       = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        for filename in sorted(os.listdir(directory)):
+            name, extension = os.path.splitext(filename)
+            if extension == '.json':
+                with open(self._path(int(name), 'json')) as f:
+                    self.segments.append((int(name), h.parse_tstamp(json.load(f)['tstamp'])))
+            elif extension == '.tmp':
+                os.remove(os.path.join(directory, filename))
+
+        self.next_seq = self.segments[-1][0] + 1 if self.segments else 0
+
+    def __len__(self) -> int:
+        return len(self.segments)
+
+    def _path(self, seq: int, extension: str) -> str:
+        return os.path.join(self.directory, f'{seq:012d}.{extension}')
+
+    def _remove(self, seq: int) -> None:
+        for extension in ('json', 'arrow'):
+            try:
+                os.remove(self._path(seq, extension))
+            except FileNotFoundError:
+                pass
+
+    def append(self, data_df: pl.DataFrame, tstamp: str, max_modify_date: str) -> None:
+        """
+        Write a page before it is buffered.
+
+        Args:
+            data_df (pl.DataFrame): The typed bets of the page.
+            tstamp (str): The tstamp where the page ends.
+            max_modify_date (str): The max modifyDate of the page.
+        """
+        with self._lock:
+            seq = self.next_seq
+            self.next_seq += 1
+
+        data_path = self._path(seq, 'arrow')
+        data_df.write_ipc(f'{data_path}.tmp', compression=self.compression)
+        os.replace(f'{data_path}.tmp', data_path)
+
+        meta_path = self._path(seq, 'json')
+        with open(f'{meta_path}.tmp', 'w') as f:
+            json.dump({'tstamp': tstamp, 'max_modify_date': max_modify_date, 'rows': data_df.height}, f)
+        os.replace(f'{meta_path}.tmp', meta_path)
+
+        with self._lock:
+            self.segments.append((seq, h.parse_tstamp(tstamp)))
+
+    def truncate(self, tstamp: str) -> None:
+        """
+        Remove the segments already uploaded, up to `tstamp` (included).
+        """
+        value = h.parse_tstamp(tstamp)
+        with self._lock:
+            done          = [seq for seq, end in self.segments if end <= value]
+            self.segments = [(seq, end) for seq, end in self.segments if end > value]
+        for seq in done:
+            self._remove(seq)
+
+    def discard_after(self, tstamp: str) -> None:
+        """
+        Remove the segments after `tstamp`, when those pages are going to be fetched again.
+        """
+        value = h.parse_tstamp(tstamp)
+        with self._lock:
+            dropped       = [seq for seq, end in self.segments if end > value]
+            self.segments = [(seq, end) for seq, end in self.segments if end <= value]
+        for seq in dropped:
+            self._remove(seq)
+
+    def replay(self, tstamp: str) -> List[Tuple[pl.DataFrame, str, str]]:
+        """
+        Read the pages spooled after the committed `tstamp`.
+
+        Args:
+            tstamp (str): The tstamp of the last acknowledged flush.
+
+        Returns:
+            pages (list): (bets_data, tstamp, max_modify_date) of every pending page, in fetch order.
+        """
+        self.truncate(tstamp)
+
+        pages = []
+        for seq, _ in list(self.segments):
+            with open(self._path(seq, 'json')) as f:
+                meta = json.load(f)
+            pages.append((h.normalize_tstamp(pl.read_ipc(self._path(seq, 'arrow'), memory_map=False)), meta['tstamp'], meta['max_modify_date']))
+
+        if pages:
+            print(f'Spool: {len(pages)} pages ({sum(page[0].height for page in pages)} bets) to replay after {tstamp}')
+        return pages
@@ -0,0 +1,144 @@
+import gzip
+import json
+import pytest
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+import sys
+import os
+
+# Add src/app to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
+
+from api.client import ApiClient
+
+
+class FakeApi(ThreadingHTTPServer):
+    """Local HTTP server that answers the queued (status, body, gzip) responses in order"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), FakeApiHandler)
+        self.responses   = []
+        self.requests    = []
+        self.connections = set()
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}/bets'
+
+
+class FakeApiHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.requests.append({name.lower(): value for name, value in self.headers.items()})
+        self.server.connections.add(self.client_address)
+        status, body, compress = self.server.responses.pop(0) if self.server.responses else (200, b'{}', False)
+
+        if compress:
+            body = gzip.compress(body)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if compress:
+            self.send_header('Content-Encoding', 'gzip')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def api():
+    server = FakeApi()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def sleeps():
+    sleeps = []
+    with patch('api.client.time.sleep', sleeps.append):
+        yield sleeps
+
+
+class TestApiClient:
+    """Unit tests for the pooled API client"""
+
+    def test_retry_until_success(self, api, sleeps):
+        """Transient statuses are retried with a backoff until the API answers"""
+        api.responses = [(503, b'busy', False), (500, b'error', False), (200, b'{"bets": []}', False)]
+        client        = ApiClient(max_retries=3, backoff_base=0.5)
+
+        with patch('api.client.random.uniform', side_effect=lambda low, high: high):
+            response = client.get(api.url)
+
+        assert response.status == 200
+        assert json.loads(response.data) == {'bets': []}
+        assert sleeps == [0.5, 1.0]
+        assert client.n_requests == 3
+        assert client.n_retries == 2
+        assert client.latency_summary()['count'] == 3
+
+    def test_retries_exhausted(self, api, sleeps):
+        api.responses = [(502, b'bad gateway', False)] * 3
+        client        = ApiClient(max_retries=2)
+
+        with pytest.raises(ConnectionError, match='after 3 attempts'):
+            client.get(api.url)
+        assert len(api.requests) == 3
+        assert len(sleeps) == 2
+
+    @pytest.mark.parametrize('status', [400, 401, 404])
+    def test_client_errors_are_not_retried(self, api, sleeps, status):
+        api.responses = [(status, b'no', False), (200, b'{}', False)]
+        client        = ApiClient(max_retries=3)
+
+        with pytest.raises(Exception, match=f'Failed to fetch data: {status}'):
+            client.get(api.url)
+        assert len(api.requests) == 1
+        assert sleeps == []
+
+    def test_connection_errors_are_retried(self, sleeps):
+        """A refused connection is retried, then raised as ConnectionError"""
+        client = ApiClient(max_retries=1, connect_timeout=0.5)
+
+        with pytest.raises(ConnectionError):
+            client.get('http://127.0.0.1:9/bets')
+        assert len(sleeps) == 1
+
+    def test_gzip_body(self, api, sleeps):
+        """Compression is negotiated and the body is decoded, also when it is streamed"""
+        body          = json.dumps({'bets': [{'transId': i} for i in range(1000)]}).encode()
+        api.responses = [(200, body, True), (200, body, True)]
+        client        = ApiClient()
+
+        assert client.get(api.url).data == body
+        assert 'gzip' in api.requests[0]['accept-encoding']
+
+        response = client.get(api.url, preload_content=False)
+        assert b''.join(response.stream(100)) == body
+        response.release_conn()
+
+    def test_keep_alive(self, api, sleeps):
+        """The requests reuse the pooled connection"""
+        client = ApiClient()
+
+        for _ in range(5):
+            client.get(api.url)
+
+        assert len(api.requests) == 5
+        assert len(api.connections) == 1
+        assert api.requests[0]['connection'] == 'keep-alive'
+
+    def test_backoff_is_capped(self):
+        client = ApiClient(backoff_base=1.0, backoff_max=5.0)
+
+        with patch('api.client.random.uniform', side_effect=lambda low, high: high):
+            assert [client.backoff(attempt) for attempt in range(5)] == [1.0, 2.0, 4.0, 5.0, 5.0]
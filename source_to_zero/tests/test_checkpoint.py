@@ -0,0 +1,140 @@
+import io
+import json
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+import sys
+import os
+
+# Add src/app to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
+
+import utils.manage_information as m_inf
+from utils.checkpoint import Checkpoint
+
+
+class NoSuchKey(Exception):
+    pass
+
+
+class FakeS3:
+    """In memory S3 client with the calls used by the checkpoint"""
+
+    def __init__(self):
+        self.objects    = {}
+        self.exceptions = MagicMock(NoSuchKey=NoSuchKey)
+
+    def get_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise NoSuchKey(Key)
+        return {'Body': io.BytesIO(self.objects[(Bucket, Key)])}
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[(Bucket, Key)] = Body
+
+
+@pytest.fixture
+def client():
+    client = FakeS3()
+    with patch('utils.checkpoint.s3.get_client', return_value=client):
+        yield client
+
+
+def state(max_tstamp: str, updated_at: datetime, object_key: str = 'zero/bets') -> dict:
+    return {'max_tstamp': max_tstamp, 'max_modify_date': '2025-01-01T10:00:00.000', 'object_key': object_key, 'updated_at': updated_at.isoformat()}
+
+
+class TestCheckpoint:
+    """Unit tests for the local and S3 checkpoint"""
+
+    def checkpoint(self, tmp_path, key: str = 'state/bets.json', max_age_hours: float = 24) -> Checkpoint:
+        return Checkpoint(str(tmp_path / 'state' / 'bets.json'), 'bucket', key, 'zero/bets', max_age_hours)
+
+    def test_save_and_load(self, tmp_path, client):
+        checkpoint = self.checkpoint(tmp_path)
+
+        checkpoint.save('0x0000000000000A', '2025-01-01T10:00:00.000')
+        loaded = checkpoint.load()
+
+        assert loaded['max_tstamp'] == '0x0000000000000A'
+        assert loaded['max_modify_date'] == '2025-01-01T10:00:00.000'
+        assert loaded['object_key'] == 'zero/bets'
+        assert json.loads(client.objects[('bucket', 'state/bets.json')]) == loaded
+
+    def test_save_is_atomic(self, tmp_path, client):
+        """The state file is replaced from a temporary file, which is not left behind"""
+        checkpoint = self.checkpoint(tmp_path)
+        checkpoint.save('0x01', None)
+
+        with patch('utils.checkpoint.os.replace', side_effect=OSError('disk full')):
+            checkpoint.save('0x02', None)
+
+        with open(checkpoint.path) as f:
+            assert json.load(f)['max_tstamp'] == '0x01'
+        checkpoint.save('0x03', None)
+        assert sorted(os.listdir(tmp_path / 'state')) == ['bets.json']
+
+    def test_s3_fallback(self, tmp_path, client):
+        """Without the local file (a new instance), the S3 mirror is used"""
+        self.checkpoint(tmp_path).save('0x0B', '2025-01-01T10:00:00.000')
+        os.remove(tmp_path / 'state' / 'bets.json')
+
+        assert self.checkpoint(tmp_path).load()['max_tstamp'] == '0x0B'
+
+    def test_unreadable_copy_is_skipped(self, tmp_path, client):
+        """A corrupted local file falls back to the S3 mirror"""
+        self.checkpoint(tmp_path).save('0x0C', None)
+        with open(tmp_path / 'state' / 'bets.json', 'w') as f:
+            f.write('{"max_tstamp": ')
+
+        assert self.checkpoint(tmp_path).load()['max_tstamp'] == '0x0C'
+
+    def test_newest_copy_wins(self, tmp_path, client):
+        now        = datetime.now(timezone.utc)
+        checkpoint = self.checkpoint(tmp_path)
+        checkpoint._write_local(json.dumps(state('0x01', now - timedelta(minutes=5))))
+        checkpoint._write_mirror(json.dumps(state('0x02', now)))
+
+        assert checkpoint.load()['max_tstamp'] == '0x02'
+
+    def test_stale_or_foreign_checkpoint_is_ignored(self, tmp_path, client):
+        now        = datetime.now(timezone.utc)
+        checkpoint = self.checkpoint(tmp_path, max_age_hours=1)
+
+        checkpoint._write_local(json.dumps(state('0x01', now - timedelta(hours=2))))
+        assert checkpoint.load() is None
+
+        checkpoint._write_local(json.dumps(state('0x01', now, object_key='zero/other')))
+        assert checkpoint.load() is None
+
+    def test_missing_checkpoint(self, tmp_path, client):
+        assert self.checkpoint(tmp_path).load() is None
+
+    def test_mirror_disabled(self, tmp_path, client):
+        checkpoint = self.checkpoint(tmp_path, key='')
+
+        checkpoint.save('0x0D', None)
+
+        assert client.objects == {}
+        assert checkpoint.load()['max_tstamp'] == '0x0D'
+
+    def test_mirror_failure_keeps_the_local_copy(self, tmp_path, client):
+        """A failed write is only reported, the flush is already in S3"""
+        checkpoint = self.checkpoint(tmp_path)
+
+        with patch.object(client, 'put_object', side_effect=OSError('denied')):
+            checkpoint.save('0x0E', None)
+
+        assert checkpoint.load()['max_tstamp'] == '0x0E'
+
+    def test_restore_state_from_the_mirror(self, tmp_path, client):
+        """A replaced task (no local file) restarts from the S3 mirror, without scanning the filenames"""
+        key = 'zero/bets/_checkpoint/state.json'
+        self.checkpoint(tmp_path, key=key).save('0x0F', '2025-01-01T10:00:00.000')
+        os.remove(tmp_path / 'state' / 'bets.json')
+
+        with patch('utils.manage_information.latest_partition_files') as latest_partition_files:
+            restored = m_inf.restore_state(self.checkpoint(tmp_path, key=key), 'bucket', 'zero/bets/', ['app.py'])
+
+        assert restored == ('2025-01-01T10:00:00.000', '0x0F')
+        latest_partition_files.assert_not_called()
@@ -0,0 +1,187 @@
+import io
+import json
+import pytest
+from unittest.mock import patch
+import sys
+import os
+
+import polars as pl
+
+# Add src/app to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
+
+import aws.parquet_profiles as profiles
+import utils.manage_information as m_inf
+from utils.compaction import Compactor, PART_FILE
+
+PREFIX = 'zero/bets/'
+BATCH  = f'{PREFIX}day=20250101/batch=20250101100000/'
+SCHEMA = {'transId': pl.Int64, 'modifyDate': pl.String, 'tstamp': pl.UInt64}
+
+
+class FakeS3:
+    """In memory bucket with the helpers of `aws.s3` used by the compaction"""
+
+    def __init__(self):
+        self.objects = {}
+
+    def put(self, buffer: io.BytesIO, bucket: str, key: str) -> None:
+        self.objects[key] = buffer.getvalue()
+
+    def get_buffer(self, bucket: str, key: str) -> io.BytesIO:
+        return io.BytesIO(self.objects[key])
+
+    def get_object_sizes(self, bucket: str, prefix: str) -> dict:
+        return {key: len(body) for key, body in self.objects.items() if key.startswith(prefix)}
+
+    def get_prefixes(self, bucket: str, prefix: str) -> list:
+        return sorted({prefix + key[len(prefix):].split('/')[0] + '/' for key in self.objects if key.startswith(prefix) and '/' in key[len(prefix):]})
+
+    def delete_keys(self, bucket: str, keys: list) -> None:
+        for key in keys:
+            self.objects.pop(key, None)
+
+    def write_part(self, minute: int, tstamps: list) -> str:
+        data_df = pl.DataFrame(
+            {'transId': tstamps, 'modifyDate': [f'2025-01-01T10:{minute:02d}:{i:02d}.000' for i in range(len(tstamps))], 'tstamp': tstamps},
+            schema=SCHEMA,
+        )
+        key    = f'{BATCH}part_2025010110{minute:02d}00-2025010110{minute + 1:02d}00_{"0x%016X" % max(tstamps)}.snappy.parquet'
+        buffer = io.BytesIO()
+        profiles.write_parquet(data_df, buffer, 'snappy')
+        self.objects[key] = buffer.getvalue()
+        return key
+
+    def parts(self) -> list:
+        return sorted(key for key in self.objects if key.startswith(BATCH) and '.compacted-' not in key)
+
+    def outputs(self) -> list:
+        return sorted(key for key in self.objects if '.compacted-' in key)
+
+
+@pytest.fixture
+def bucket():
+    bucket = FakeS3()
+    with patch('utils.compaction.s3', bucket), patch('utils.compaction._put', bucket.put):
+        yield bucket
+
+
+@pytest.fixture
+def clock():
+    clock = [1000.0]
+    with patch('utils.compaction.time.time', lambda: clock[0]):
+        yield clock
+
+
+def compactor(**kwargs) -> Compactor:
+    return Compactor(**{'bucket': 'bucket', 'prefix': PREFIX, 'profile': 'snappy', 'grace_seconds': 300, 'delete_grace_seconds': 900, **kwargs})
+
+
+class TestCompactor:
+    """Unit tests for the compaction of the closed hours"""
+
+    def test_manifest_outside_the_day_partitions(self):
+        assert compactor()._manifest_key(BATCH) == f'{PREFIX}_compaction/day=20250101/batch=20250101100000.json'
+
+    def test_closed_batches(self, bucket):
+        bucket.write_part(0, [1])
+        bucket.objects[f'{PREFIX}day=20250101/batch=20250101110000/part_x.snappy.parquet'] = b''
+
+        assert compactor().closed_batches('2025-01-01T11:04:59.999') == []
+        assert compactor().closed_batches('2025-01-01T11:05:00') == [BATCH]
+
+    def test_merge_keeps_the_parts_during_the_grace(self, bucket, clock):
+        """The merged files are written next to the parts, which are only deleted after the grace period"""
+        sources = [bucket.write_part(minute, [minute * 10 + 1, minute * 10 + 2]) for minute in (0, 1, 2)]
+        worker  = compactor()
+
+        assert worker.compact(BATCH) == 3
+
+        manifest = json.loads(bucket.objects[worker._manifest_key(BATCH)])
+        assert manifest == {'sources': sources, 'outputs': bucket.outputs(), 'written_at': 1000.0}
+        assert bucket.parts() == sources
+        assert worker.pending == {BATCH: 1900.0}
+
+        merged = pl.concat([pl.read_parquet(bucket.get_buffer('bucket', key)) for key in bucket.outputs()])
+        assert merged['tstamp'].to_list() == [1, 2, 11, 12, 21, 22]
+
+        clock[0] = 1899.0
+        worker.run('2025-01-01T12:00:00')
+        assert bucket.parts() == sources
+
+        clock[0] = 1900.0
+        worker.run('2025-01-01T12:00:00')
+        assert bucket.parts() == []
+        assert worker._manifest_key(BATCH) not in bucket.objects
+        assert worker.pending == {}
+
+    def test_merged_file_name(self, bucket, clock):
+        """The merged file ends with the end date and tstamp of the latest part"""
+        bucket.write_part(0, [5])
+        bucket.write_part(1, [7])
+
+        compactor(delete_grace_seconds=0).compact(BATCH)
+
+        assert [key[len(BATCH):] for key in bucket.objects if key.startswith(BATCH)] == [
+            'part_20250101100000-20250101100200_0x0000000000000007.compacted-000.snappy.parquet',
+        ]
+
+    def test_restart_waits_for_a_pending_deletion(self, bucket, clock):
+        """A new process finds the manifest of a merge in its grace period and leaves the batch"""
+        sources = [bucket.write_part(minute, [minute + 1]) for minute in (0, 1)]
+        compactor().compact(BATCH)
+        outputs = bucket.outputs()
+
+        clock[0] = 1500.0
+        restarted = compactor()
+        assert restarted.compact(BATCH) == 0
+        assert bucket.parts() == sources
+        assert bucket.outputs() == outputs
+        assert restarted.pending == {BATCH: 1900.0}
+
+    def test_partial_output_is_removed(self, bucket, clock):
+        """A merge that stopped before all its files were written is undone and started again"""
+        sources  = [bucket.write_part(minute, [minute + 1]) for minute in (0, 1)]
+        partial  = f'{BATCH}part_20250101100000-20250101100000_0x0000000000000001.compacted-000.snappy.parquet'
+        missing  = f'{BATCH}part_20250101100000-20250101100200_0x0000000000000002.compacted-001.snappy.parquet'
+        bucket.objects[partial] = b'partial'
+        bucket.objects[compactor()._manifest_key(BATCH)] = json.dumps({'sources': sources, 'outputs': [partial, missing], 'written_at': 0}).encode()
+
+        assert compactor(delete_grace_seconds=0).compact(BATCH) == 2
+
+        assert partial not in bucket.objects
+        assert bucket.parts() == []
+        assert len(bucket.outputs()) == 1
+
+    def test_not_enough_parts(self, bucket):
+        bucket.write_part(0, [1])
+
+        assert compactor().compact(BATCH) == 0
+        assert bucket.outputs() == []
+
+
+class TestRestartListing:
+    """The restart from the filenames only reads the part files"""
+
+    def test_manifests_and_other_files_are_ignored(self, bucket, clock):
+        for minute in (0, 1):
+            bucket.write_part(minute, [minute + 1])
+        compactor().compact(BATCH)
+        files = [key.split('/')[-1] for key in bucket.objects]
+        assert 'batch=20250101100000.json' in files
+
+        with patch('utils.manage_information.s3', bucket):
+            bucket.get_objects = lambda _, prefix: [key.split('/')[-1] for key in bucket.objects if key.startswith(prefix)]
+            assert m_inf.latest_partition_files('bucket', PREFIX)
+            assert m_inf.initialization_timestamp(files + ['_SUCCESS', 'part_20250101100000-20250101100500.snappy.parquet'], ['nrt_bets.py']) == (
+                '2025-01-01T10:02:00.000', '0x0000000000000002'
+            )
+
+    @pytest.mark.parametrize('filename, matches', [
+        ('part_20250101100000-20250101100100_0x00000000000000FF.snappy.parquet', True),
+        ('part_20250101100000-20250101100100_0x00000000000000FF.compacted-001.zstd.parquet', True),
+        ('part_20250101100000-20250101100100.snappy.parquet', False),
+        ('batch=20250101100000.json', False),
+    ])
+    def test_part_file(self, filename, matches):
+        assert bool(PART_FILE.match(filename)) == matches
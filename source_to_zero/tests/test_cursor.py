@@ -0,0 +1,66 @@
+import asyncio
+import pytest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+
+import polars as pl
+
+# Add src/app to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
+
+from utils.cursor import TableCursor
+from utils.flush_policy import FlushPolicy
+from utils.scheduler import PollScheduler
+
+SCHEMA = {'transId': pl.Int64, 'tstamp': pl.UInt64, 'modifyDate': pl.String}
+
+TABLE_INFO = {
+    'schema': SCHEMA,
+    'configuration': {'endpoint': 'http://api/bets', 'prefix': 'zero/bets', 'delay_time': 3},
+}
+
+
+@pytest.fixture
+def sleeps():
+    sleeps = []
+
+    async def sleep(seconds):
+        sleeps.append(seconds)
+
+    with patch('utils.cursor.asyncio.sleep', sleep), patch('utils.cursor.memory.guard'):
+        yield sleeps
+
+
+def cursor(pages: list) -> TableCursor:
+    table = TableCursor('bets', TABLE_INFO, MagicMock(), MagicMock(), 'bucket', MagicMock(), PollScheduler(error_base=2.0), FlushPolicy())
+    table._fetch = MagicMock(side_effect=pages)
+    return table
+
+
+class TestNextPage:
+    """Unit tests for the polling loop of a table cursor"""
+
+    @pytest.mark.parametrize('max_tstamp', ['0x', '0x0000000000000A', '0x05'])
+    def test_page_without_new_data(self, sleeps, max_tstamp):
+        """A page without new data (and without maxMobiusModifiedOn) is an empty page, not an error"""
+        table = cursor([(pl.DataFrame(schema=SCHEMA), max_tstamp, None)])
+
+        data_df, tstamp = asyncio.run(table.next_page('0x0A'))
+
+        assert data_df.is_empty()
+        assert data_df.schema == SCHEMA
+        assert tstamp == '0x0A'
+        assert table.scheduler.decisions == {'no_data': 1}
+        assert len(sleeps) == 1
+
+    def test_fetch_error_backs_off(self, sleeps):
+        """Failed fetches are retried after the error backoff of the scheduler"""
+        table = cursor([OSError('timeout'), OSError('timeout'), (pl.DataFrame(schema=SCHEMA), '0x', None)])
+
+        with patch('utils.scheduler.random.uniform', side_effect=lambda low, high: high):
+            asyncio.run(table.next_page('0x0A'))
+
+        assert sleeps[:2] == [2.0, 4.0]
+        assert table.scheduler.decisions == {'error': 2, 'no_data': 1}
+        assert table.scheduler.errors == 0
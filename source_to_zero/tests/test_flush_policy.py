@@ -0,0 +1,104 @@
+import pytest
+from unittest.mock import patch
+import sys
+import os
+
+import polars as pl
+
+# Add src/app to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
+
+from utils.buffer import FrameBuffer
+from utils.flush_policy import FlushPolicy
+
+SCHEMA = {'transId': pl.Int64, 'remark': pl.String}
+
+
+def page(n: int, start: int = 0) -> pl.DataFrame:
+    return pl.DataFrame({'transId': range(start, start + n), 'remark': ['x' * 10] * n}, schema=SCHEMA)
+
+
+class TestFrameBuffer:
+    """Unit tests for the buffer of record batches"""
+
+    def test_append_and_clear(self):
+        buffer = FrameBuffer(SCHEMA)
+
+        buffer.append(page(3))
+        buffer.append(page(0))
+        buffer.append(page(2, start=3))
+
+        assert len(buffer) == 5
+        assert len(buffer.frames) == 2
+        assert buffer.estimated_size() == page(3).estimated_size() + page(2).estimated_size()
+        assert buffer.to_frame()['transId'].to_list() == [0, 1, 2, 3, 4]
+        assert buffer.to_frame(rechunk=False).n_chunks() == 2
+
+        buffer.clear()
+        assert not buffer
+        assert buffer.age() == 0.0
+        assert buffer.to_frame().schema == SCHEMA
+
+    def test_age_from_the_oldest_batch(self):
+        """The age starts with the first non empty batch"""
+        buffer = FrameBuffer(SCHEMA)
+
+        with patch('utils.buffer.time.monotonic', side_effect=[10.0, 15.0]):
+            buffer.append(page(0))
+            buffer.append(page(1))
+            buffer.append(page(1))
+            assert buffer.age() == 5.0
+
+
+class TestFlushPolicy:
+    """Unit tests for the flush triggers"""
+
+    def test_empty_buffer_never_flushes(self):
+        policy = FlushPolicy(max_rows=1, max_bytes=1, max_age=0.001)
+
+        assert policy.trigger(FrameBuffer(SCHEMA)) is None
+
+    def test_rows(self):
+        policy = FlushPolicy(max_rows=5)
+        buffer = FrameBuffer(SCHEMA)
+
+        buffer.append(page(4))
+        assert policy.trigger(buffer) is None
+        buffer.append(page(1))
+        assert policy.trigger(buffer) == 'rows'
+
+    def test_bytes(self):
+        buffer = FrameBuffer(SCHEMA)
+        buffer.append(page(100))
+
+        assert FlushPolicy(max_rows=0, max_bytes=buffer.estimated_size() + 1).trigger(buffer) is None
+        assert FlushPolicy(max_rows=0, max_bytes=buffer.estimated_size()).trigger(buffer) == 'bytes'
+
+    def test_age(self):
+        policy = FlushPolicy(max_rows=0, max_age=30)
+        buffer = FrameBuffer(SCHEMA)
+        buffer.append(page(1))
+
+        with patch.object(buffer, 'age', return_value=29.9):
+            assert policy.trigger(buffer) is None
+        with patch.object(buffer, 'age', return_value=30.0):
+            assert policy.trigger(buffer) == 'age'
+
+    def test_rows_before_bytes_and_age(self):
+        """When several triggers fire, the first one is reported in the order rows, bytes, age"""
+        buffer = FrameBuffer(SCHEMA)
+        buffer.append(page(10))
+
+        with patch.object(buffer, 'age', return_value=100.0):
+            assert FlushPolicy(max_rows=10, max_bytes=1, max_age=1).trigger(buffer) == 'rows'
+            assert FlushPolicy(max_rows=0, max_bytes=1, max_age=1).trigger(buffer) == 'bytes'
+            assert FlushPolicy(max_rows=0, max_bytes=0, max_age=1).trigger(buffer) == 'age'
+
+    @pytest.mark.parametrize('n_rows', [1, 100000])
+    def test_disabled_triggers(self, n_rows):
+        """A trigger set to 0 never fires"""
+        buffer = FrameBuffer(SCHEMA)
+        buffer.append(page(n_rows))
+
+        with patch.object(buffer, 'age', return_value=1e9):
+            assert FlushPolicy(max_rows=0, max_bytes=0, max_age=0).trigger(buffer) is None
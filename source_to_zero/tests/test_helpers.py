@@ -0,0 +1,152 @@
+import pytest
+import sys
+import os
+
+import polars as pl
+
+# Add src/app to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
+
+import utils.helpers as h
+
+
+class TestTstamp:
+    """Unit tests for the rowversion tstamps"""
+
+    @pytest.mark.parametrize('tstamp, value', [
+        ('0x0000000000000001', 1),
+        ('0x00000001FFFFFFFF', (1 << 32) + 0xFFFFFFFF),
+        ('0xFFFFFFFFFFFFFFFF', (1 << 64) - 1),
+        ('0X8000000000000000', 1 << 63),
+        ('0x00000000abcdef01', 0xABCDEF01),
+        ('0000000000000A0B', 0x0A0B),
+        ('0x1F', 0x1F),
+    ])
+    def test_parse_tstamp_expr(self, tstamp, value):
+        """Hex tstamps are parsed into UInt64, beyond the signed range too"""
+        parsed = pl.DataFrame({'tstamp': [tstamp]}).select(h.parse_tstamp_expr('tstamp'))
+
+        assert parsed.schema['tstamp'] == pl.UInt64
+        assert parsed['tstamp'].to_list() == [value]
+        assert h.parse_tstamp(tstamp) == value
+
+    def test_parse_tstamp_expr_keeps_nulls(self):
+        parsed = pl.DataFrame({'tstamp': ['0x01', None]}).select(h.parse_tstamp_expr('tstamp'))
+
+        assert parsed['tstamp'].to_list() == [1, None]
+
+    def test_parsed_tstamps_sort_as_numbers(self):
+        """The order of the parsed tstamps is the numeric one, not the one of the strings"""
+        tstamps = ['0xFF', '0x0000000000000100', '0x8000000000000000', '0x01']
+
+        parsed = pl.DataFrame({'tstamp': tstamps}).select(h.parse_tstamp_expr('tstamp')).sort('tstamp')
+
+        assert [h.format_tstamp(value) for value in parsed['tstamp']] == [
+            '0x0000000000000001', '0x00000000000000FF', '0x0000000000000100', '0x8000000000000000',
+        ]
+
+    @pytest.mark.parametrize('tstamp', ['0x', '', None])
+    def test_empty_tstamp_is_zero(self, tstamp):
+        assert h.parse_tstamp(tstamp) == 0
+
+    def test_records_to_frame(self):
+        """Only the schema fields are loaded and the tstamp is parsed"""
+        schema  = {'transId': pl.Int64, 'tstamp': pl.UInt64}
+        records = [{'transId': 1, 'tstamp': '0x00000000000000FF', 'useless': 'x'}]
+
+        data_df = h.records_to_frame(records, schema)
+
+        assert data_df.schema == schema
+        assert data_df.rows() == [(1, 255)]
+
+
+class TestMaxDate:
+    """Unit tests for max_date"""
+
+    def test_latest_date_as_received(self):
+        """The dates are compared as datetimes, and the value is returned without padding"""
+        data_df = pl.DataFrame({'modifyDate': ['2025-01-01T10:00:00.5', '2025-01-01T10:00:00.123', '2025-01-01T09:59:59']})
+
+        assert h.max_date(data_df, 'modifyDate') == '2025-01-01T10:00:00.5'
+
+    def test_nulls_are_ignored(self):
+        data_df = pl.DataFrame({'modifyDate': [None, '2025-01-02T00:00:00', None]})
+
+        assert h.max_date(data_df, 'modifyDate') == '2025-01-02T00:00:00'
+
+    @pytest.mark.parametrize('date, expected', [
+        ('2025-01-01T10:00:00', '2025-01-01T10:00:00.000'),
+        ('2025-01-01T10:00:00.5', '2025-01-01T10:00:00.500'),
+        ('2025-01-01T10:00:00.123', '2025-01-01T10:00:00.123'),
+        (None, None),
+    ])
+    def test_format_date(self, date, expected):
+        """The vectorized padding gives the same dates as format_date"""
+        padded = pl.DataFrame({'modifyDate': [date]}, schema={'modifyDate': pl.String}).select(h.format_date_expr('modifyDate'))
+
+        assert h.format_date(date) == expected
+        assert padded['modifyDate'].to_list() == [expected]
+
+
+class TestDeduplicate:
+    """Unit tests for deduplicate"""
+
+    FIELD_ID = ['customer', 'transId']
+
+    def bets(self, rows: list) -> pl.DataFrame:
+        return pl.DataFrame(rows, schema={'customer': pl.String, 'transId': pl.Int64, 'modifyDate': pl.String, 'tstamp': pl.UInt64, 'status': pl.String}, orient='row')
+
+    def test_latest_modify_date_wins(self):
+        """The latest version is kept even when it was fetched first, and the order is kept"""
+        data_df = self.bets([
+            ('ana', 1, '2025-01-01T10:00:05', 30, 'settled'),
+            ('bob', 1, '2025-01-01T10:00:00', 10, 'running'),
+            ('ana', 1, '2025-01-01T10:00:00.5', 40, 'running'),
+            ('ana', 2, '2025-01-01T10:00:01', 20, 'running'),
+        ])
+
+        latest_df, removed = h.deduplicate(data_df, self.FIELD_ID, 'modifyDate')
+
+        assert removed == 1
+        assert latest_df.select('customer', 'transId', 'status').rows() == [('ana', 1, 'settled'), ('bob', 1, 'running'), ('ana', 2, 'running')]
+
+    def test_highest_tstamp_between_equal_dates(self):
+        data_df = self.bets([
+            ('ana', 1, '2025-01-01T10:00:00.000', 50, 'settled'),
+            ('ana', 1, '2025-01-01T10:00:00', 40, 'running'),
+        ])
+
+        latest_df, removed = h.deduplicate(data_df, self.FIELD_ID, 'modifyDate')
+
+        assert removed == 1
+        assert latest_df['status'].to_list() == ['settled']
+
+    def test_last_fetched_between_equal_versions(self):
+        """With the same date and tstamp, the last row fetched is kept"""
+        data_df = self.bets([
+            ('ana', 1, '2025-01-01T10:00:00', 40, 'first'),
+            ('ana', 1, '2025-01-01T10:00:00', 40, 'second'),
+        ])
+
+        assert h.deduplicate(data_df, self.FIELD_ID, 'modifyDate')[0]['status'].to_list() == ['second']
+
+    def test_null_date_is_the_oldest(self):
+        data_df = self.bets([
+            ('ana', 1, '2025-01-01T10:00:00', 40, 'dated'),
+            ('ana', 1, None, 50, 'undated'),
+        ])
+
+        assert h.deduplicate(data_df, self.FIELD_ID, 'modifyDate')[0]['status'].to_list() == ['dated']
+
+    def test_without_duplicates_or_key(self):
+        data_df = self.bets([
+            ('ana', 1, '2025-01-01T10:00:00', 40, 'running'),
+            ('ana', 2, '2025-01-01T10:00:00', 41, 'running'),
+        ])
+
+        latest_df, removed = h.deduplicate(data_df, self.FIELD_ID, 'modifyDate')
+        assert removed == 0
+        assert latest_df.equals(data_df)
+
+        assert h.deduplicate(pl.concat([data_df, data_df]), [], 'modifyDate')[1] == 0
+        assert h.deduplicate(data_df.head(0), self.FIELD_ID, 'modifyDate')[1] == 0
@@ -0,0 +1,133 @@
+import json
+import pytest
+from unittest.mock import MagicMock
+import sys
+import os
+
+import polars as pl
+
+# Add src/app to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
+
+from utils.json_stream import JsonPageStream
+import utils.manage_information as m_inf
+
+
+def split_bytes(body: bytes, size: int) -> list:
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+def page_body(bets: list, **fields) -> bytes:
+    return json.dumps({'bets': bets, **fields}, ensure_ascii=False).encode('utf-8')
+
+
+BETS = [
+    {'customer': 'ana', 'transId': 1, 'remark': 'plain'},
+    {'customer': 'josé', 'transId': 2, 'remark': 'quote " and backslash \\ inside'},
+    {'customer': 'bob', 'transId': 3, 'remark': 'brackets ], } and , in a string'},
+    {'customer': '日本', 'transId': 4, 'remark': 'unicode é中'},
+    {'customer': 'eve', 'transId': 12345678901234, 'remark': None},
+]
+
+
+class TestJsonPageStream:
+    """Unit tests for the streaming page decoder"""
+
+    @pytest.mark.parametrize('read_size', [1, 2, 3, 7, 64, 100000])
+    def test_chunk_boundaries(self, read_size):
+        """Every split of the body decodes to the same records and fields"""
+        body = page_body(BETS, maxTimestamp='0x00000000ABCDEF', maxMobiusModifiedOn='2025-01-01T10:00:00.123')
+        page = JsonPageStream(split_bytes(body, read_size), 'bets', chunk_size=2)
+
+        chunks = list(page.chunks())
+
+        assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+        assert [record for chunk in chunks for record in chunk] == BETS
+        assert page.n_records == len(BETS)
+        assert page.fields == {'maxTimestamp': '0x00000000ABCDEF', 'maxMobiusModifiedOn': '2025-01-01T10:00:00.123'}
+
+    def test_fields_before_the_array(self):
+        """Keys before the array are available during the iteration"""
+        body = json.dumps({'maxTimestamp': '0x01', 'bets': BETS[:1], 'maxMobiusModifiedOn': None}).encode()
+        page = JsonPageStream(split_bytes(body, 5), 'bets')
+
+        chunks = page.chunks()
+        assert next(chunks) == BETS[:1]
+        assert page.fields == {'maxTimestamp': '0x01'}
+        assert list(chunks) == []
+        assert page.fields == {'maxTimestamp': '0x01', 'maxMobiusModifiedOn': None}
+
+    def test_empty_page(self):
+        """An empty array yields no chunk and keeps the fields"""
+        body = page_body([], maxTimestamp='0x', maxMobiusModifiedOn=None)
+        page = JsonPageStream(split_bytes(body, 4), 'bets')
+
+        assert list(page.chunks()) == []
+        assert page.n_records == 0
+        assert page.fields == {'maxTimestamp': '0x', 'maxMobiusModifiedOn': None}
+
+    def test_empty_object(self):
+        """An empty object has no records nor fields"""
+        page = JsonPageStream([b' { } '], 'bets')
+
+        assert list(page.chunks()) == []
+        assert page.fields == {}
+
+    def test_number_at_the_end_of_a_read(self):
+        """A number split between two reads is not truncated"""
+        page = JsonPageStream([b'{"bets": [12', b'34, 5', b'6]}'], 'bets')
+
+        assert list(page.chunks()) == [[1234, 56]]
+
+    @pytest.mark.parametrize('body', [b'{"bets": [1, 2', b'{"bets": [1, 2}', b'[1, 2]', b''])
+    def test_invalid_or_truncated_body(self, body):
+        """A truncated or malformed body raises ValueError"""
+        page = JsonPageStream([body], 'bets')
+
+        with pytest.raises(ValueError):
+            list(page.chunks())
+
+
+class TestStreamingFetch:
+    """Unit tests for fetch_bets_data_by_timestamp_streaming"""
+
+    SCHEMA = {'customer': pl.String, 'transId': pl.Int64}
+
+    def client_for(self, body: bytes, read_size: int = 16):
+        response = MagicMock()
+        response.stream.return_value = split_bytes(body, read_size)
+        client = MagicMock()
+        client.get.return_value = response
+        return client, response
+
+    def test_page_of_chunk_frames(self):
+        """The page keeps one chunk per decoded chunk and only the schema fields"""
+        body             = page_body(BETS, maxTimestamp='0x0A', maxMobiusModifiedOn='2025-01-01T10:00:00')
+        client, response = self.client_for(body)
+
+        bets, max_tstamp, max_modify = m_inf.fetch_bets_data_by_timestamp_streaming(client, 'http://api/bets', '0x01', self.SCHEMA, chunk_size=2)
+
+        assert bets.columns == ['customer', 'transId']
+        assert bets['transId'].to_list() == [1, 2, 3, 4, 12345678901234]
+        assert bets.n_chunks() == 3
+        assert (max_tstamp, max_modify) == ('0x0A', '2025-01-01T10:00:00')
+        client.get.assert_called_once_with('http://api/bets?timestamp=0x01', preload_content=False)
+        response.release_conn.assert_called_once()
+
+    def test_empty_page(self):
+        """A page without bets is an empty typed frame"""
+        client, _ = self.client_for(page_body([], maxTimestamp='0x', maxMobiusModifiedOn=None))
+
+        bets, max_tstamp, max_modify = m_inf.fetch_bets_data_by_timestamp_streaming(client, 'http://api/bets', '0x01', self.SCHEMA)
+
+        assert bets.is_empty()
+        assert bets.schema == self.SCHEMA
+        assert (max_tstamp, max_modify) == ('0x', None)
+
+    def test_connection_released_on_error(self):
+        """The connection goes back to the pool when the body is invalid"""
+        client, response = self.client_for(b'{"bets": [{"customer": "ana"')
+
+        with pytest.raises(ValueError):
+            m_inf.fetch_bets_data_by_timestamp_streaming(client, 'http://api/bets', '0x01', self.SCHEMA)
+        response.release_conn.assert_called_once()
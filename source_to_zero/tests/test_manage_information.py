@@ -0,0 +1,92 @@
+import pytest
+from unittest.mock import patch
+import sys
+import os
+
+# Add src/app to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
+
+import utils.manage_information as m_inf
+
+PREFIX = 'zero/bets/'
+
+
+class FakeS3:
+    """In memory listing with the helpers of `aws.s3` used to find the latest partition"""
+
+    def __init__(self, keys: list):
+        self.keys   = keys
+        self.listed = []
+
+    def get_prefixes(self, bucket: str, prefix: str) -> list:
+        return sorted({prefix + key[len(prefix):].split('/')[0] + '/' for key in self.keys if key.startswith(prefix) and '/' in key[len(prefix):]})
+
+    def get_objects(self, bucket: str, prefix: str) -> list:
+        self.listed.append(prefix)
+        return [key.split('/')[-1] for key in self.keys if key.startswith(prefix)]
+
+
+def part(day: str, hour: str, tstamp: int) -> str:
+    return f'{PREFIX}day={day}/batch={day}{hour}0000/part_{day}{hour}0000-{day}{hour}0500_{"0x%016X" % tstamp}.snappy.parquet'
+
+
+def latest_partition_files(fake: FakeS3) -> list:
+    with patch('utils.manage_information.s3', fake):
+        return m_inf.latest_partition_files('bucket', PREFIX)
+
+
+class TestLatestPartitionFiles:
+    """Unit tests for the restart scan of the latest day/batch partition"""
+
+    def test_only_the_latest_batch_is_listed(self):
+        """The days and batches are walked in reverse, and only the newest leaf is listed"""
+        fake = FakeS3([
+            part('20250101', '10', 1),
+            part('20250102', '09', 2),
+            part('20250102', '11', 3),
+            part('20250102', '11', 4).replace('0500_', '1000_'),
+        ])
+
+        files = latest_partition_files(fake)
+
+        assert sorted(files) == sorted(key.split('/')[-1] for key in fake.keys[2:])
+        assert fake.listed == [f'{PREFIX}day=20250102/batch=20250102110000/']
+        assert m_inf.initialization_timestamp(files, ['app.py']) == ('2025-01-02T11:10:00.000', '0x0000000000000004')
+
+    def test_batch_without_part_files_is_skipped(self):
+        """A latest batch with only unmarked files or other objects falls back to the previous one"""
+        fake = FakeS3([
+            part('20250101', '23', 1),
+            f'{PREFIX}day=20250102/batch=20250102000000/part_20250102000000-20250102000500.snappy.parquet',
+            f'{PREFIX}day=20250102/batch=20250102010000/_SUCCESS',
+        ])
+
+        assert latest_partition_files(fake) == [part('20250101', '23', 1).split('/')[-1]]
+        assert fake.listed == [
+            f'{PREFIX}day=20250102/batch=20250102010000/',
+            f'{PREFIX}day=20250102/batch=20250102000000/',
+            f'{PREFIX}day=20250101/batch=20250101230000/',
+        ]
+
+    def test_other_folders_are_ignored(self):
+        """The checkpoint and compaction folders of the prefix are not partitions"""
+        fake = FakeS3([
+            part('20250101', '10', 1),
+            f'{PREFIX}_checkpoint/state.json',
+            f'{PREFIX}_compaction/day=20250101/batch=20250101100000.json',
+        ])
+
+        assert latest_partition_files(fake) == [part('20250101', '10', 1).split('/')[-1]]
+        assert fake.listed == [f'{PREFIX}day=20250101/batch=20250101100000/']
+
+    def test_prefix_without_day_partitions(self):
+        """A flat prefix is listed as a whole"""
+        fake = FakeS3([f'{PREFIX}part_20250101100000-20250101100500_0x0000000000000001.snappy.parquet'])
+
+        assert latest_partition_files(fake) == ['part_20250101100000-20250101100500_0x0000000000000001.snappy.parquet']
+        assert fake.listed == [PREFIX]
+
+    def test_no_part_files(self):
+        fake = FakeS3([f'{PREFIX}day=20250101/batch=20250101100000/_SUCCESS'])
+
+        assert latest_partition_files(fake) == []
@@ -0,0 +1,174 @@
+import pytest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+import time
+
+# Add src/app to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
+
+import utils.memory as memory
+from utils.memory import MemoryGuard
+
+MB     = 1024 * 1024
+BUFFER = ['page']
+
+
+class FakeProcess:
+    """The RSS of the process, freed by `gc.collect` only when `collectable` is set"""
+
+    def __init__(self, rss: int):
+        self.rss         = rss
+        self.collectable = 0
+        self.collections = 0
+
+    def collect(self) -> int:
+        self.collections += 1
+        self.rss, self.collectable = self.rss - self.collectable, 0
+        return 0
+
+
+@pytest.fixture
+def process():
+    process = FakeProcess(0)
+    with patch.object(MemoryGuard, 'rss', lambda self: process.rss), patch('utils.memory.gc.collect', process.collect):
+        yield process
+
+
+class TestMemoryGuard:
+    """Unit tests for the RSS budget of the poller"""
+
+    def test_disabled(self, process):
+        process.rss = 10 * MB
+        guard       = MemoryGuard(budget=0)
+
+        assert guard.trigger(BUFFER) is None
+        guard.admit()
+        assert process.collections == 0
+
+    def test_under_the_budget(self, process):
+        process.rss = 70 * MB
+        guard       = MemoryGuard(budget=100 * MB)
+
+        assert guard.trigger(BUFFER) is None
+        assert guard.trigger([]) is None
+        assert process.collections == 0
+
+    def test_gc_above_the_gc_ratio(self, process):
+        process.rss = 85 * MB
+        guard       = MemoryGuard(budget=100 * MB, gc_ratio=0.8)
+
+        assert guard.collect_if_needed()
+        assert process.collections == 1
+
+    def test_flush_only_when_gc_does_not_free_memory(self, process):
+        """Over the budget, a collection is tried before the buffer is flushed"""
+        guard = MemoryGuard(budget=100 * MB)
+
+        process.rss, process.collectable = 110 * MB, 20 * MB
+        assert guard.trigger(BUFFER) is None
+        assert process.collections == 1
+
+        process.rss = 110 * MB
+        assert guard.trigger(BUFFER) == 'memory'
+        assert process.collections == 2
+
+    def test_floor_after_a_memory_flush(self, process):
+        """The RSS left by a memory flush plus the headroom must be reached to flush again"""
+        guard       = MemoryGuard(budget=100 * MB, headroom=0.1)
+        process.rss = 120 * MB
+        assert guard.trigger(BUFFER) == 'memory'
+
+        # The allocator kept the memory: 120 MB is the floor, the next flush needs 130 MB
+        assert guard.trigger(BUFFER) is None
+        assert guard.floor == 120 * MB
+        assert guard.limit() == 130 * MB
+
+        process.rss = 129 * MB
+        assert guard.trigger(BUFFER) is None
+
+        process.rss = 130 * MB
+        assert guard.trigger(BUFFER) == 'memory'
+
+    def test_floor_follows_the_released_memory(self, process):
+        """When the memory is given back, the budget is the limit again"""
+        guard       = MemoryGuard(budget=100 * MB, headroom=0.1)
+        process.rss = 120 * MB
+        assert guard.trigger(BUFFER) == 'memory'
+        assert guard.limit() == 130 * MB
+
+        process.rss = 50 * MB
+        assert guard.limit() == 100 * MB
+
+        process.rss = 100 * MB
+        assert guard.trigger(BUFFER) == 'memory'
+
+    def test_admit_waits_for_the_memory(self, process):
+        """The fetch waits until the uploads in progress release the memory"""
+        guard       = MemoryGuard(budget=100 * MB, max_pause=5, poll_interval=0.01)
+        process.rss = 110 * MB
+
+        def release(seconds):
+            process.rss = 60 * MB
+
+        with patch('utils.memory.time.sleep', side_effect=release) as sleep:
+            guard.admit()
+
+        assert sleep.call_count == 1
+        assert process.collections == 1
+
+    def test_admit_returns_after_max_pause(self, process):
+        guard       = MemoryGuard(budget=100 * MB, max_pause=0.05, poll_interval=0.01)
+        process.rss = 110 * MB
+
+        start = time.perf_counter()
+        guard.admit()
+
+        assert 0.05 <= time.perf_counter() - start < 1
+        assert process.rss == 110 * MB
+
+
+class TestMemoryLimit:
+    """Unit tests for the memory limit of the container"""
+
+    @pytest.fixture
+    def cgroup(self, tmp_path):
+        """Writes the cgroup v2 and v1 files, None leaves the file out"""
+        v2, v1 = tmp_path / 'memory.max', tmp_path / 'memory.limit_in_bytes'
+
+        def write(v2_value, v1_value):
+            for path, value in ((v2, v2_value), (v1, v1_value)):
+                if value is not None:
+                    path.write_text(f'{value}\n')
+
+        with patch('utils.memory.CGROUP_LIMIT_FILES', (str(v2), str(v1))), \
+             patch('utils.memory.psutil.virtual_memory', return_value=MagicMock(total=8192 * MB)):
+            yield write
+
+    def test_cgroup_v2(self, cgroup):
+        cgroup(2048 * MB, None)
+        assert memory.memory_limit() == 2048 * MB
+
+    def test_cgroup_v2_without_limit(self, cgroup):
+        """'max' is an unlimited container, so the host memory is used"""
+        cgroup('max', None)
+        assert memory.memory_limit() == 8192 * MB
+
+    def test_cgroup_v1(self, cgroup):
+        cgroup(None, 1024 * MB)
+        assert memory.memory_limit() == 1024 * MB
+
+    def test_cgroup_v1_without_limit(self, cgroup):
+        """The v1 files hold a huge number instead of 'max'"""
+        cgroup(None, 9223372036854771712)
+        assert memory.memory_limit() == 8192 * MB
+
+    def test_no_cgroup(self, cgroup):
+        cgroup(None, None)
+        assert memory.memory_limit() == 8192 * MB
+
+    def test_configure_from_the_limit(self, cgroup):
+        cgroup(1000 * MB, None)
+        with patch.object(memory, 'guard', MemoryGuard()):
+            assert memory.configure(budget_ratio=0.5).budget == 500 * MB
+            assert memory.configure(budget_mb=300).budget == 300 * MB
@@ -0,0 +1,118 @@
+import json
+import pytest
+import urllib.request
+import sys
+import os
+
+# Add src/app to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
+
+from utils.metrics import EMF_MAX_VALUES, EmfEmitter, MetricsRegistry, serve_prometheus
+
+
+@pytest.fixture
+def registry():
+    registry = MetricsRegistry(namespace='NRT/Test')
+    registry.incr('pages', 2, table='bets')
+    registry.incr('pages', table='bets')
+    registry.gauge('lag_seconds', 12.5, 'Seconds', table='bets')
+    registry.observe('fetch_seconds', 0.02, table='bets')
+    registry.observe('fetch_seconds', 3, table='bets')
+    registry.observe('flush_rows', 700, 'Count')
+    return registry
+
+
+def read_lines(path) -> list:
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+class TestEmf:
+    """Unit tests for the CloudWatch embedded metric format export"""
+
+    def test_lines_in_the_metrics_file(self, registry, tmp_path):
+        """One line per label set, with its dimensions, units and the values since the last export"""
+        path = tmp_path / 'metrics.log'
+
+        EmfEmitter(registry, str(path), interval=3600).emit()
+
+        bets, plain = sorted(read_lines(path), key=lambda line: 'table' not in line)
+        assert bets['_aws']['CloudWatchMetrics'] == [{
+            'Namespace' : 'NRT/Test',
+            'Dimensions': [['table']],
+            'Metrics'   : [
+                {'Name': 'pages', 'Unit': 'Count'},
+                {'Name': 'lag_seconds', 'Unit': 'Seconds'},
+                {'Name': 'fetch_seconds', 'Unit': 'Seconds'},
+            ],
+        }]
+        assert isinstance(bets['_aws']['Timestamp'], int)
+        assert bets['table'] == 'bets'
+        assert bets['pages'] == 3
+        assert bets['lag_seconds'] == 12.5
+        assert bets['fetch_seconds'] == [0.02, 3]
+
+        assert plain['_aws']['CloudWatchMetrics'][0]['Dimensions'] == [[]]
+        assert plain['_aws']['CloudWatchMetrics'][0]['Metrics'] == [{'Name': 'flush_rows', 'Unit': 'Count'}]
+        assert plain['flush_rows'] == 700
+
+    def test_values_since_the_previous_export(self, registry, tmp_path):
+        """The counters and histograms restart on every export, the gauges are repeated"""
+        path    = tmp_path / 'metrics.log'
+        emitter = EmfEmitter(registry, str(path), interval=3600)
+        emitter.emit()
+
+        registry.incr('pages', table='bets')
+        emitter.emit()
+
+        second = read_lines(path)[2:]
+        assert len(second) == 1
+        assert [metric['Name'] for metric in second[0]['_aws']['CloudWatchMetrics'][0]['Metrics']] == ['pages', 'lag_seconds']
+        assert second[0]['pages'] == 1
+
+    def test_values_are_split_by_line(self):
+        """A line carries at most EMF_MAX_VALUES values of a metric"""
+        registry = MetricsRegistry()
+        for i in range(EMF_MAX_VALUES * 2 + 1):
+            registry.observe('fetch_seconds', i)
+
+        lines = [json.loads(line) for line in registry.emf_lines()]
+
+        assert len(lines) == 3
+        assert lines[0]['fetch_seconds'] == list(range(EMF_MAX_VALUES))
+        assert lines[1]['fetch_seconds'] == list(range(EMF_MAX_VALUES, EMF_MAX_VALUES * 2))
+        assert lines[2]['fetch_seconds'] == EMF_MAX_VALUES * 2
+        assert registry.emf_lines() == []
+
+
+class TestPrometheus:
+    """Unit tests for the Prometheus text endpoint"""
+
+    def test_scrape(self, registry):
+        server = serve_prometheus(registry, 0)
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{server.server_address[1]}/metrics', timeout=5) as response:
+                content_type = response.headers['Content-Type']
+                lines        = response.read().decode().splitlines()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        assert content_type.startswith('text/plain')
+        assert 'nrt_pages_total{table="bets"} 3' in lines
+        assert 'nrt_lag_seconds{table="bets"} 12.5' in lines
+        assert 'nrt_fetch_seconds_bucket{table="bets",le="0.01"} 0' in lines
+        assert 'nrt_fetch_seconds_bucket{table="bets",le="0.025"} 1' in lines
+        assert 'nrt_fetch_seconds_bucket{table="bets",le="5"} 2' in lines
+        assert 'nrt_fetch_seconds_bucket{table="bets",le="+Inf"} 2' in lines
+        assert 'nrt_fetch_seconds_sum{table="bets"} 3.02' in lines
+        assert 'nrt_fetch_seconds_count{table="bets"} 2' in lines
+        assert 'nrt_flush_rows_bucket{le="1000"} 1' in lines
+        assert 'nrt_flush_rows_count 1' in lines
+
+    def test_counters_are_cumulative(self, registry):
+        """Unlike the EMF lines, the scrapes are not reset by an export"""
+        registry.emf_lines()
+        registry.incr('pages', table='bets')
+
+        assert 'nrt_pages_total{table="bets"} 4' in registry.prometheus_text().splitlines()
@@ -0,0 +1,166 @@
+import pytest
+import time
+from concurrent.futures import Future
+import sys
+import os
+
+# Add src/app to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
+
+from utils.pipeline import PageSource, PrefetchingPageSource, UploadStage, BackgroundUploadStage, UploadStageError
+
+
+def done_future(result=None, error=None) -> Future:
+    future = Future()
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+    return future
+
+
+def wait_until(condition, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+class FakeApi:
+    """Fetch function over numbered pages, that fails at `fail_at`"""
+
+    def __init__(self, fail_at: int = None):
+        self.fail_at = fail_at
+        self.calls   = []
+
+    def __call__(self, tstamp: str):
+        self.calls.append(tstamp)
+        cursor = int(tstamp, 16) + 1
+        if cursor == self.fail_at:
+            raise ConnectionError('API down')
+        return [cursor], f'0x{cursor:02X}'
+
+
+class TestPageSource:
+    """Unit tests for the sequential and prefetching page sources"""
+
+    def test_sequential_pages(self):
+        source = PageSource(FakeApi(), '0x00')
+
+        assert [source.next_page() for _ in range(3)] == [([1], '0x01'), ([2], '0x02'), ([3], '0x03')]
+        source.rewind('0x01')
+        assert source.next_page() == ([2], '0x02')
+
+    def test_prefetch_in_order(self):
+        api    = FakeApi()
+        source = PrefetchingPageSource(api, '0x00', max_pages_ahead=2)
+
+        assert [source.next_page() for _ in range(5)] == [([i], f'0x{i:02X}') for i in range(1, 6)]
+        assert source.tstamp == '0x05'
+        source.close()
+
+    def test_prefetch_depth_is_bounded(self):
+        """The fetcher reads at most max_pages_ahead pages, plus the one waiting to be queued"""
+        api    = FakeApi()
+        source = PrefetchingPageSource(api, '0x00', max_pages_ahead=2)
+
+        assert wait_until(lambda: len(api.calls) == 3)
+        time.sleep(0.1)
+        assert len(api.calls) == 3
+
+        source.next_page()
+        assert wait_until(lambda: len(api.calls) == 4)
+        time.sleep(0.1)
+        assert len(api.calls) == 4
+        source.close()
+
+    def test_fetch_error_is_raised_by_next_page(self):
+        """The pages before the error are returned, then next_page raises it"""
+        source = PrefetchingPageSource(FakeApi(fail_at=3), '0x00', max_pages_ahead=4)
+
+        assert source.next_page() == ([1], '0x01')
+        assert source.next_page() == ([2], '0x02')
+        with pytest.raises(RuntimeError, match='API down'):
+            source.next_page()
+        source.thread.join(1)
+        assert not source.thread.is_alive()
+
+    def test_close_stops_the_fetcher(self):
+        """The fetcher stops after close, also when it is blocked on the full queue"""
+        api    = FakeApi()
+        source = PrefetchingPageSource(api, '0x00', max_pages_ahead=1)
+        assert wait_until(lambda: len(api.calls) == 2)
+
+        source.close()
+
+        source.thread.join(2)
+        assert not source.thread.is_alive()
+        assert len(api.calls) == 2
+
+    def test_cannot_rewind(self):
+        source = PrefetchingPageSource(FakeApi(), '0x00')
+
+        with pytest.raises(RuntimeError):
+            source.rewind('0x00')
+        source.close()
+
+
+class TestUploadStage:
+    """Unit tests for the inline upload stage"""
+
+    def test_commit_after_the_uploads(self):
+        """The checkpoint moves once the futures of the job are done"""
+        committed = []
+        stage     = UploadStage(('0x01', None), committed.append)
+
+        stage.submit(lambda: [done_future('a'), 'b'], ('0x02', '2025-01-01T00:00:00.000'))
+
+        assert stage.committed == ('0x02', '2025-01-01T00:00:00.000')
+        assert committed == [('0x02', '2025-01-01T00:00:00.000')]
+
+    def test_failed_upload_is_not_committed(self):
+        committed = []
+        stage     = UploadStage(('0x01', None), committed.append)
+
+        with pytest.raises(OSError):
+            stage.submit(lambda: [done_future(error=OSError('denied'))], ('0x02', None))
+        assert stage.committed == ('0x01', None)
+        assert committed == []
+
+
+class TestBackgroundUploadStage:
+    """Unit tests for the background upload stage"""
+
+    def test_commits_in_order(self):
+        committed = []
+        stage     = BackgroundUploadStage(('0x00', None), 2, committed.append)
+
+        for i in range(1, 6):
+            stage.submit(lambda i=i: [done_future(i)], (f'0x{i:02d}', None))
+        stage.drain()
+
+        assert committed == [(f'0x{i:02d}', None) for i in range(1, 6)]
+        assert stage.committed == ('0x05', None)
+
+    def test_failure_is_fatal(self):
+        """After a failed flush nothing else is committed and every check raises"""
+        committed = []
+        stage     = BackgroundUploadStage(('0x00', None), 2, committed.append)
+
+        def failing():
+            raise OSError('denied')
+
+        stage.submit(lambda: [], ('0x01', None))
+        stage.submit(failing, ('0x02', None))
+        stage.jobs.join()
+
+        with pytest.raises(UploadStageError):
+            stage.check()
+        with pytest.raises(UploadStageError):
+            stage.submit(lambda: [], ('0x03', None))
+        with pytest.raises(UploadStageError):
+            stage.drain()
+        assert committed == [('0x01', None)]
+        assert stage.committed == ('0x01', None)
@@ -0,0 +1,76 @@
+import pytest
+import sys
+import os
+
+import polars as pl
+
+# Add src/app to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
+
+from utils.routing import route_by_day
+
+
+def bets(*dates) -> pl.DataFrame:
+    return pl.DataFrame({'transId': list(range(len(dates))), 'modifyDate': list(dates)}, schema={'transId': pl.Int64, 'modifyDate': pl.String})
+
+
+class TestRouteByDay:
+    """Unit tests for route_by_day"""
+
+    def test_single_day(self):
+        """A page of one day is a single route bounded by the flush dates"""
+        data = bets('2025-01-01T10:00:00.100', '2025-01-01T11:00:00')
+
+        routes = route_by_day(data, 'modifyDate', '2025-01-01T09:00:00.000', '2025-01-01T11:00:00.000')
+
+        assert len(routes) == 1
+        start, end, day_df = routes[0]
+        assert (start, end) == ('2025-01-01T09:00:00.000', '2025-01-01T11:00:00.000')
+        assert day_df.equals(data)
+
+    def test_multi_day_page(self):
+        """Every day gets its rows, and the days in the middle are bounded by the whole day"""
+        data = bets(
+            '2025-01-03T08:00:00.000',
+            '2025-01-01T23:00:00.000',
+            '2025-01-02T12:00:00',
+            '2025-01-03T01:00:00.500',
+            '2025-01-01T22:30:00.000',
+        )
+
+        routes = route_by_day(data, 'modifyDate', '2025-01-01T20:00:00.000', '2025-01-03T08:00:00.000')
+
+        assert [(start, end) for start, end, _ in routes] == [
+            ('2025-01-01T20:00:00.000', '2025-01-01T23:59:59.999'),
+            ('2025-01-02T00:00:00.000', '2025-01-02T23:59:59.999'),
+            ('2025-01-03T00:00:00.000', '2025-01-03T08:00:00.000'),
+        ]
+        assert [day_df['transId'].to_list() for _, _, day_df in routes] == [[1, 4], [2], [0, 3]]
+        assert all(day_df.columns == ['transId', 'modifyDate'] for _, _, day_df in routes)
+
+    def test_late_and_missing_dates_go_to_the_first_day(self):
+        """Rows before the first day or without date are routed to the first day"""
+        data = bets('2024-12-31T23:59:59.999', None, '2025-01-02T00:00:00.000')
+
+        routes = route_by_day(data, 'modifyDate', '2025-01-01T10:00:00.000', '2025-01-02T00:00:00.000')
+
+        assert [(start, end, day_df['transId'].to_list()) for start, end, day_df in routes] == [
+            ('2025-01-01T10:00:00.000', '2025-01-01T23:59:59.999', [0, 1]),
+            ('2025-01-02T00:00:00.000', '2025-01-02T00:00:00.000', [2]),
+        ]
+
+    def test_days_without_rows_are_skipped(self):
+        """A gap between days does not create an empty route"""
+        data = bets('2025-01-01T10:00:00.000', '2025-01-04T10:00:00.000')
+
+        routes = route_by_day(data, 'modifyDate', '2025-01-01T00:00:00.000', '2025-01-04T10:00:00.000')
+
+        assert [start[:10] for start, _, _ in routes] == ['2025-01-01', '2025-01-04']
+        assert routes[0][1] == '2025-01-01T23:59:59.999'
+
+    @pytest.mark.parametrize('start_date', ['2025-01-01T00:00:00.000', '2025-01-01T00:00:00'])
+    def test_start_date_formats(self, start_date):
+        """The first day is read from the date part of the start date"""
+        routes = route_by_day(bets('2025-01-01T05:00:00.000'), 'modifyDate', start_date, '2025-01-01T05:00:00.000')
+
+        assert [(start, end) for start, end, _ in routes] == [(start_date, '2025-01-01T05:00:00.000')]
@@ -0,0 +1,34 @@
+import pytest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+
+# Add src/app to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
+
+import aws.s3 as s3
+
+
+class TestDeleteKeys:
+    """Unit tests for the batched deletes of the compaction"""
+
+    def test_requests_of_1000_keys(self):
+        client = MagicMock()
+        client.delete_objects.return_value = {}
+        keys   = [f'zero/bets/part_{i}.snappy.parquet' for i in range(2500)]
+
+        with patch('aws.s3.get_client', return_value=client):
+            s3.delete_keys('bucket', keys)
+
+        requests = [call.kwargs['Delete']['Objects'] for call in client.delete_objects.call_args_list]
+        assert [len(objects) for objects in requests] == [1000, 1000, 500]
+        assert [obj['Key'] for objects in requests for obj in objects] == keys
+
+    def test_keys_not_deleted_are_raised(self):
+        """A denied delete is in the response of DeleteObjects, not an exception of the call"""
+        client = MagicMock()
+        client.delete_objects.return_value = {'Errors': [{'Key': 'zero/bets/part_1.snappy.parquet', 'Code': 'AccessDenied', 'Message': 'Access Denied'}]}
+
+        with patch('aws.s3.get_client', return_value=client):
+            with pytest.raises(PermissionError, match='AccessDenied'):
+                s3.delete_keys('bucket', ['zero/bets/part_1.snappy.parquet'])
@@ -0,0 +1,98 @@
+import pytest
+from unittest.mock import patch
+import sys
+import os
+
+# Add src/app to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
+
+from utils.scheduler import PollScheduler
+
+
+class TestPollScheduler:
+    """Unit tests for the poll scheduler decisions"""
+
+    def scheduler(self, **kwargs) -> PollScheduler:
+        return PollScheduler(**{'min_interval': 1.0, 'max_interval': 60.0, 'backoff_factor': 2.0, 'delay_margin': 1.0, **kwargs})
+
+    def test_data_polls_right_away(self):
+        scheduler = self.scheduler()
+
+        assert scheduler.on_data(10) == 0.0
+        assert scheduler.metrics()['decisions'] == {'data': 1}
+
+    def test_not_old_enough_waits_the_remaining_delay(self):
+        """The sleep is the remaining delay plus the margin, never below min_interval"""
+        scheduler = self.scheduler()
+
+        assert scheduler.on_not_old_enough(30.0) == 31.0
+        assert scheduler.on_not_old_enough(-5.0) == 1.0
+
+    def test_quiet_backoff(self):
+        """Consecutive empty polls double the sleep up to max_interval, and data resets it"""
+        scheduler = self.scheduler(max_interval=10.0)
+
+        assert [scheduler.on_no_data() for _ in range(5)] == [1.0, 2.0, 4.0, 8.0, 10.0]
+        scheduler.on_data(1)
+        assert scheduler.on_no_data() == 1.0
+
+    def test_quiet_backoff_starts_at_the_arrival_gap(self):
+        """The first empty poll waits the observed gap between pages with data"""
+        scheduler = self.scheduler()
+
+        with patch('utils.scheduler.time.monotonic', side_effect=[100.0, 105.0, 110.0]):
+            for _ in range(3):
+                scheduler.on_data(4)
+
+        assert scheduler.arrival_gap() == 5.0
+        assert scheduler.arrival_rate() == pytest.approx(8 / 10)
+        assert scheduler.on_no_data() == 5.0
+        assert scheduler.on_no_data() == 10.0
+
+    def test_error_backoff_is_capped_and_jittered(self):
+        """Every consecutive error doubles the cap of a random sleep, up to error_max"""
+        scheduler = self.scheduler(error_base=2.0, error_max=20.0)
+
+        with patch('utils.scheduler.random.uniform', side_effect=lambda low, high: high) as uniform:
+            sleeps = [scheduler.on_error() for _ in range(6)]
+
+        assert sleeps == [2.0, 4.0, 8.0, 16.0, 20.0, 20.0]
+        assert [call.args for call in uniform.call_args_list] == [(0, 2.0), (0, 4.0), (0, 8.0), (0, 16.0), (0, 20.0), (0, 20.0)]
+        assert scheduler.metrics()['errors'] == 6
+
+    def test_error_backoff_floor(self):
+        """A jittered sleep is never shorter than min_interval"""
+        scheduler = self.scheduler(min_interval=1.5, error_base=4.0)
+
+        with patch('utils.scheduler.random.uniform', return_value=0.1):
+            assert scheduler.on_error() == 1.5
+
+    @pytest.mark.parametrize('success', [
+        lambda scheduler: scheduler.on_data(1),
+        lambda scheduler: scheduler.on_no_data(),
+        lambda scheduler: scheduler.on_not_old_enough(10.0),
+    ])
+    def test_successful_poll_resets_the_error_backoff(self, success):
+        scheduler = self.scheduler(error_base=2.0, error_max=60.0)
+
+        with patch('utils.scheduler.random.uniform', side_effect=lambda low, high: high):
+            scheduler.on_error()
+            scheduler.on_error()
+            success(scheduler)
+            assert scheduler.metrics()['errors'] == 0
+            assert scheduler.on_error() == 2.0
+
+    def test_decisions_are_counted(self):
+        scheduler = self.scheduler()
+
+        scheduler.on_data(1)
+        scheduler.on_no_data()
+        scheduler.on_no_data()
+        scheduler.on_not_old_enough(3.0)
+        with patch('utils.scheduler.random.uniform', return_value=5.0):
+            scheduler.on_error()
+
+        summary = scheduler.metrics()
+        assert summary['decisions'] == {'data': 1, 'no_data': 2, 'delay': 1, 'error': 1}
+        assert summary['last_sleep'] == 5.0
+        assert summary['total_sleep'] == 0.0 + 1.0 + 2.0 + 4.0 + 5.0
@@ -0,0 +1,96 @@
+import pytest
+import sys
+import os
+
+import polars as pl
+
+# Add src/app to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
+
+from utils.spool import Spool
+
+SCHEMA = {'transId': pl.Int64, 'tstamp': pl.UInt64, 'modifyDate': pl.String}
+
+
+def page(*tstamps) -> pl.DataFrame:
+    return pl.DataFrame(
+        {'transId': list(tstamps), 'tstamp': list(tstamps), 'modifyDate': ['2025-01-01T10:00:00.000'] * len(tstamps)},
+        schema=SCHEMA,
+    )
+
+
+@pytest.fixture
+def spool(tmp_path) -> Spool:
+    spool = Spool(str(tmp_path / 'spool'), 'uncompressed')
+    spool.append(page(1, 2), '0x02', '2025-01-01T10:00:00.000')
+    spool.append(page(3), '0x03', '2025-01-01T10:01:00.000')
+    spool.append(page(4, 5, 6), '0x00000000000006', '2025-01-01T10:02:00.000')
+    return spool
+
+
+def files(spool: Spool) -> list:
+    return sorted(os.listdir(spool.directory))
+
+
+class TestSpool:
+    """Unit tests for the local spool of fetched pages"""
+
+    def test_replay_after_a_restart(self, spool):
+        """A new spool on the same folder replays the pages after the committed tstamp, in order"""
+        restarted = Spool(spool.directory, 'uncompressed')
+
+        pages = restarted.replay('0x02')
+
+        assert [(data_df['transId'].to_list(), tstamp, max_modify) for data_df, tstamp, max_modify in pages] == [
+            ([3], '0x03', '2025-01-01T10:01:00.000'),
+            ([4, 5, 6], '0x00000000000006', '2025-01-01T10:02:00.000'),
+        ]
+        assert pages[0][0].schema == SCHEMA
+        assert len(restarted) == 2
+        assert restarted.next_seq == 3
+
+    def test_truncate_removes_the_uploaded_segments(self, spool):
+        """tstamps are compared as numbers, whatever their padding"""
+        spool.truncate('0x0000000000000003')
+
+        assert len(spool) == 1
+        assert files(spool) == ['000000000002.arrow', '000000000002.json']
+
+        spool.truncate('0x06')
+        assert len(spool) == 0
+        assert files(spool) == []
+
+    def test_discard_after(self, spool):
+        spool.discard_after('0x02')
+
+        assert len(spool) == 1
+        assert files(spool) == ['000000000000.arrow', '000000000000.json']
+        assert spool.replay('0x01')[0][1] == '0x02'
+
+    def test_incomplete_segments_are_ignored(self, spool):
+        """A page without its sidecar is not replayed, and temporary files are removed"""
+        page(7).write_ipc(os.path.join(spool.directory, '000000000003.arrow'))
+        with open(os.path.join(spool.directory, '000000000004.json.tmp'), 'w') as f:
+            f.write('{"tstamp": ')
+
+        restarted = Spool(spool.directory, 'uncompressed')
+
+        assert [tstamp for _, tstamp, _ in restarted.replay('0x00')] == ['0x02', '0x03', '0x00000000000006']
+        assert '000000000004.json.tmp' not in files(restarted)
+
+    def test_replay_of_hex_tstamps(self, tmp_path):
+        """Segments written before the tstamp was UInt64 are read with a parsed tstamp"""
+        spool  = Spool(str(tmp_path / 'spool'))
+        legacy = pl.DataFrame({'transId': [1], 'tstamp': ['0x00000000000000FF'], 'modifyDate': ['2025-01-01T10:00:00.000']})
+        spool.append(legacy, '0x00000000000000FF', '2025-01-01T10:00:00.000')
+
+        data_df = spool.replay('0x00')[0][0]
+
+        assert data_df.schema['tstamp'] == pl.UInt64
+        assert data_df['tstamp'].to_list() == [255]
+
+    def test_empty_spool(self, tmp_path):
+        spool = Spool(str(tmp_path / 'spool'))
+
+        assert spool.replay('0x01') == []
+        assert spool.next_seq == 0
@@ -0,0 +1,43 @@
+import threading
+
+import boto3
+from botocore.config import Config
+
+import config
+
+_clients = {}
+_lock    = threading.Lock()
+
+
+def client_config() -> Config:
+    """
+    The botocore configuration of the clients:
+
+    - max_pool_connections: kept-alive connections of a client, at least the threads that share it.
+    - retries: the adaptive mode also rate limits the client when S3 throttles (503 SlowDown).
+    - connect_timeout / read_timeout: seconds, so a stalled connection fails and is retried.
+    """
+    return Config(
+        max_pool_connections=config.S3_MAX_POOL_CONNECTIONS,
+        retries={'mode': config.S3_RETRY_MODE, 'max_attempts': config.S3_MAX_ATTEMPTS},
+        connect_timeout=config.S3_CONNECT_TIMEOUT,
+        read_timeout=config.S3_READ_TIMEOUT,
+        tcp_keepalive=True,
+    )
+
+
+def get_client(service: str = 's3'):
+    """
+    Process-wide client of an AWS service, created on first use with `client_config`.
+
+    Building a client loads the endpoint and service data and resolves the credentials, which
+    costs far more than a request. The clients are thread safe, but their creation is not, so
+    they are created under a lock and from their own session.
+    """
+    client = _clients.get(service)
+    if client is None:
+        with _lock:
+            client = _clients.get(service)
+            if client is None:
+                client = _clients[service] = boto3.session.Session().client(service, config=client_config())
+    return client
@@ -4,4 +4,30 @@ SOURCE_BUCKET = os.getenv("SOURCE_BUCKET")
 SOURCE_DB     = os.getenv("SOURCE_DB")
 
 RAW_BUCKET    = os.getenv("RAW_BUCKET")
-RAW_DB        = os.getenv("RAW_DB")
\ No newline at end of file
+RAW_DB        = os.getenv("RAW_DB")
+
+# Writer profile of the raw files (snappy, write, archive or read), a table can set its own
+PARQUET_PROFILE = os.getenv("PARQUET_PROFILE", "snappy")
+
+# S3 clients (aws/session.py): connection pool, retries and timeouts
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", 32))  # at least WRITE_CONCURRENCY * MULTIPART_CONCURRENCY
+S3_RETRY_MODE           = os.getenv("S3_RETRY_MODE", "adaptive")          # legacy, standard or adaptive
+S3_MAX_ATTEMPTS         = int(os.getenv("S3_MAX_ATTEMPTS", 5))
+S3_CONNECT_TIMEOUT      = float(os.getenv("S3_CONNECT_TIMEOUT", 5))       # seconds
+S3_READ_TIMEOUT         = float(os.getenv("S3_READ_TIMEOUT", 60))         # seconds
+
+# Multipart uploads of the parquet files (aws/multipart.py): size of a part (at least 5 MB) and parts
+# uploading at the same time per file. A writer holds about MULTIPART_CONCURRENCY + 1 parts in memory
+MULTIPART_PART_SIZE_MB = int(os.getenv("MULTIPART_PART_SIZE_MB", 8))
+MULTIPART_CONCURRENCY  = int(os.getenv("MULTIPART_CONCURRENCY", 4))
+
+# Partitions encoded and uploaded at the same time by the writers of a day, 1 to write them one by one
+WRITE_CONCURRENCY = int(os.getenv("WRITE_CONCURRENCY", 4))
+
+# Stream the day from the zero files to the raw partitions, the memory is bounded by the partition_size
+# of the table instead of the size of the day. Opt-in, by default the whole day is loaded before writing it
+STREAMING_DAY   = os.getenv("STREAMING_DAY", "false").lower() == "true"
+
+# Sort the raw files by the cluster_by keys of the table, so the readers skip them by statistics. The
+# whole day is sorted in memory, or every batch when STREAMING_DAY (the memory is then the batch_size)
+CLUSTERED_RAW   = os.getenv("CLUSTERED_RAW", "false").lower() == "true"
\ No newline at end of file
@@ -30,6 +30,8 @@ def lambda_handler(event, context):
         # Configuration
         table_batch_size     = table_config['batch_size']
         table_partition_size = table_config['partition_size']
+        table_profile        = table_config.get('parquet_profile') or config.PARQUET_PROFILE
+        table_cluster_by     = table_config.get('cluster_by') if config.CLUSTERED_RAW else None
 
         # Control 
         #yugioh_s3_key = F"{config.RAW_DB}/control/{table_name}.csv"
@@ -40,25 +42,52 @@ def lambda_handler(event, context):
         source_partition_uri = f's3://{config.SOURCE_BUCKET}/{config.SOURCE_DB}/{table_name}/day={partition_day}/'
         print(f"[INFO] Day information: {source_partition_uri}")
 
-        raw_data_df  = (
-            pl.scan_parquet(source_partition_uri, schema=table_raw_schema)
-            .select(table_raw_schema.keys())
-            .cast(table_raw_schema)
-            .collect()
-        )
-        
-        print(f"[INFO] Saving Data in RAW Bucket")
-        print(f"[INFO] Number of rows: {raw_data_df.height}")
-        # Move information to Raw Layer
         raw_target_prefix = f'{config.RAW_DB}/{table_name}/day={partition_day}/'
-        
-        n_batches = dist.__write_information_bactches(
-            data_df       =raw_data_df,
-            bucket        =config.RAW_BUCKET,
-            data_prefix   =raw_target_prefix,
-            batch_size    =table_batch_size,
-            partition_size=table_partition_size
-        )
+
+        if config.STREAMING_DAY:
+            # Move information to Raw Layer, a partition at a time
+            print(f"[INFO] Streaming Data into RAW Bucket")
+            chunks = helpers.iter_parquet_partition(
+                source_partition_uri,
+                table_raw_schema,
+                chunk_size     =table_partition_size,
+                fields_datetime=table_config.get('fields_datetime'),
+                fields_date    =table_config.get('fields_date'),
+            )
+            n_batches, n_rows = dist.__write_information_stream(
+                chunks        =chunks,
+                bucket        =config.RAW_BUCKET,
+                data_prefix   =raw_target_prefix,
+                batch_size    =table_batch_size,
+                partition_size=table_partition_size,
+                profile       =table_profile,
+                cluster_by    =table_cluster_by
+            )
+            print(f"[INFO] Number of rows: {n_rows}")
+        else:
+            raw_data_df  = helpers.read_parquet_partition(
+                source_partition_uri,
+                table_raw_schema,
+                fields_datetime=table_config.get('fields_datetime'),
+                fields_date    =table_config.get('fields_date'),
+            )
+
+            if table_cluster_by:
+                print(f"[INFO] Clustering the day by {table_cluster_by}")
+                raw_data_df = helpers.cluster_frame(raw_data_df, table_cluster_by)
+
+            print(f"[INFO] Saving Data in RAW Bucket")
+            print(f"[INFO] Number of rows: {raw_data_df.height}")
+            # Move information to Raw Layer
+            n_batches = dist.__write_information_bactches(
+                data_df       =raw_data_df,
+                bucket        =config.RAW_BUCKET,
+                data_prefix   =raw_target_prefix,
+                batch_size    =table_batch_size,
+                partition_size=table_partition_size,
+                profile       =table_profile
+            )
+            del raw_data_df
         
         # Updating Control file
         #print(f"[INFO] Updating Control YuGiOh table of {table_name}")
@@ -74,8 +103,6 @@ def lambda_handler(event, context):
         }
         #control.schedule_master_next_execution(control_df, information, schema=master.CONTROL_SCHEMA, bucket=config.RAW_BUCKET, yugioh_key=yugioh_s3_key)
 
-        del raw_data_df
-
     return {
         'statusCode': 200,
         'status': 'OK',
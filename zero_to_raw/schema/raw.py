@@ -71,7 +71,7 @@ TABLES_INFORMATION_RAW = {
             "memberStatus"  : pl.Int32,      # Nuevos max 256
             "betPage"       : pl.Int16,  # tinyint
             "locationId"    : pl.Int32,     # Nuevos  - No hay datos en la tabla pero esta definido como int
-            "tstamp"        : pl.String, 
+            "tstamp"        : pl.UInt64, # rowversion
             "acceptingStatus": pl.Int32,    # Nuevos - min 0 max 5 int
             "rejectReason"  : pl.Int32,     # Nuevos - min 0 max 100 int
             "checkTime"     : pl.String,     # Nuevos - datetime
@@ -140,7 +140,13 @@ TABLES_INFORMATION_RAW = {
         },
         'configuration': {
             "batch_size"    : 400000,
-            "partition_size": 100000
+            "partition_size": 100000,
+            "parquet_profile": None, # None for config.PARQUET_PROFILE
+            # Date columns written as Datetime / Date by a typed zero layer (TYPED_ZERO_LAYER of source_to_zero)
+            "fields_datetime": ['transDate', 'checkTime', 'modifyDate', 'settledTime'],
+            "fields_date"    : ['winlostdate'],
+            # Clustering keys of the raw files when CLUSTERED_RAW, e.g. ['winlostdate'] for readers by date
+            "cluster_by"     : ['customer', 'transId'],
         }
     }
 }
\ No newline at end of file
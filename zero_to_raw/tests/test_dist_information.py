@@ -0,0 +1,127 @@
+import pytest
+from unittest.mock import patch
+import sys
+import os
+
+import polars as pl
+
+# Add the stage root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import utils.dist_information as dist
+
+write_batches = getattr(dist, '__write_information_bactches')
+write_stream  = getattr(dist, '__write_information_stream')
+
+EXTENSION = '.zstd.parquet'
+
+
+def day(n_rows: int) -> pl.DataFrame:
+    return pl.DataFrame({
+        'customer' : [f'c{(i * 7) % 5}' for i in range(n_rows)],
+        'transId'  : [(i * 13) % 11 for i in range(n_rows)],
+        'row'      : list(range(n_rows)),
+    })
+
+
+def chunks(data_df: pl.DataFrame, size: int) -> list:
+    return [data_df.slice(i, size) for i in range(0, data_df.height, size)]
+
+
+@pytest.fixture
+def written():
+    """The partitions sent to S3, by object key"""
+    written = {}
+
+    def write_parquet(partition, bucket, object_key, profile):
+        written[object_key] = partition
+        return object_key
+
+    with patch('utils.dist_information._write_parquet', write_parquet):
+        yield written
+
+
+def layout(written: dict) -> dict:
+    return {key[len('raw/day=20250101/'):]: written[key]['row'].to_list() for key in sorted(written)}
+
+
+class TestWriteInformationStream:
+    """Unit tests for the streaming day writer"""
+
+    @pytest.mark.parametrize('chunk_size', [1, 3, 7, 10, 25, 1000])
+    def test_same_layout_as_the_day_in_memory(self, written, chunk_size):
+        """Whatever the chunks, the batches and partitions are the ones of the whole day"""
+        data_df = day(57)
+
+        n_batches = write_batches(data_df, 'bucket', 'raw/day=20250101/', batch_size=25, partition_size=10, profile='archive')
+        expected  = layout(written)
+        written.clear()
+
+        assert write_stream(chunks(data_df, chunk_size), 'bucket', 'raw/day=20250101/', batch_size=25, partition_size=10, profile='archive') == (n_batches, 57)
+        assert layout(written) == expected
+        assert list(expected)[:4] == [
+            f'batch=000000000000/part_000000000000{EXTENSION}',
+            f'batch=000000000000/part_000000000001{EXTENSION}',
+            f'batch=000000000000/part_000000000002{EXTENSION}',
+            f'batch=000000000001/part_000000000000{EXTENSION}',
+        ]
+        assert expected[f'batch=000000000000/part_000000000002{EXTENSION}'] == list(range(20, 25))
+
+    def test_empty_day(self, written):
+        assert write_stream(iter([day(0), day(0)]), 'bucket', 'raw/day=20250101/', batch_size=25, partition_size=10) == (0, 0)
+        assert written == {}
+
+    def test_clustered_batches(self, written):
+        """Every batch is sorted by the keys before it is split, and keeps all its rows"""
+        data_df = day(57)
+
+        assert write_stream(chunks(data_df, 4), 'bucket', 'raw/day=20250101/', batch_size=25, partition_size=10, profile='archive', cluster_by=['customer', 'transId']) == (3, 57)
+
+        batches = {}
+        for key in sorted(written):
+            batches.setdefault(key.split('/')[-2], []).append(written[key])
+        assert [sum(partition.height for partition in partitions) for partitions in batches.values()] == [25, 25, 7]
+        for index, partitions in enumerate(batches.values()):
+            batch_df = pl.concat(partitions)
+            assert batch_df.equals(data_df.slice(index * 25, 25).sort(['customer', 'transId'], maintain_order=True))
+
+    def test_failed_write_is_raised(self, written):
+        with patch('utils.dist_information._write_parquet', side_effect=OSError('denied')):
+            with pytest.raises(OSError):
+                write_stream(chunks(day(30), 5), 'bucket', 'raw/day=20250101/', batch_size=25, partition_size=10)
+
+
+class TestPartitionWriter:
+    """Unit tests for the shared pool of the partition writers"""
+
+    @pytest.fixture(autouse=True)
+    def pool(self):
+        with patch.multiple('utils.dist_information', _executor=None, _executor_workers=0):
+            yield
+            if dist._executor is not None:
+                dist._executor.shutdown(wait=True)
+
+    def test_pool_is_reused(self):
+        dist.PartitionWriter('bucket', concurrency=4)
+        executor = dist._executor
+
+        dist.PartitionWriter('bucket', concurrency=2)
+        dist.PartitionWriter('bucket', concurrency=4)
+
+        assert dist._executor is executor
+        assert dist._executor_workers == 4
+
+    def test_larger_pool_shuts_down_the_previous_one(self, written):
+        """The previous pool finishes the writes submitted to it before it is replaced"""
+        writer   = dist.PartitionWriter('bucket', concurrency=2)
+        executor = dist._executor
+        for i in range(4):
+            writer.write(day(3), f'raw/day=20250101/part_{i:012d}{EXTENSION}')
+
+        dist.PartitionWriter('bucket', concurrency=8)
+
+        assert executor._shutdown
+        assert dist._executor is not executor
+        assert dist._executor_workers == 8
+        assert writer.wait() == 4
+        assert len(written) == 4
@@ -0,0 +1,84 @@
+import pytest
+from unittest.mock import patch
+import sys
+import os
+
+import polars as pl
+
+# Add the stage root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import config
+import lambda_function
+import utils.helpers as helpers
+
+CLUSTER_BY = ['customer', 'transId']
+SUB_BET    = pl.List(pl.Struct({'transId': pl.Int64, 'betteam': pl.String, 'odds': pl.Float64}))
+
+
+def day(n_rows: int) -> pl.DataFrame:
+    """Bets in arrival order, with repeated keys and null, empty and partial subBet lists"""
+    def sub_bet(i):
+        if i % 5 == 0:
+            return None
+        if i % 5 == 1:
+            return []
+        return [{'transId': i * 10 + j, 'betteam': None if j % 2 else f't{j}', 'odds': None if i % 3 == 0 else j / 2} for j in range(i % 4)] + ([None] if i % 7 == 0 else [])
+
+    return pl.DataFrame({
+        'customer': [None if i % 11 == 0 else f'c{(i * 7) % 5}' for i in range(n_rows)],
+        'transId' : [(i * 13) % 11 for i in range(n_rows)],
+        'row'     : list(range(n_rows)),
+        'subBet'  : [sub_bet(i) for i in range(n_rows)],
+        'teams'   : [{'home': f'h{i}', 'away': None if i % 2 else f'a{i}'} for i in range(n_rows)],
+    }, schema_overrides={'subBet': SUB_BET})
+
+
+class TestClusterFrame:
+    """Unit tests for the clustering of the raw files"""
+
+    def test_same_as_a_stable_sort(self):
+        """The nested columns gathered by pyarrow keep their values, nulls and types"""
+        data_df = day(200)
+
+        clustered_df = helpers.cluster_frame(data_df, CLUSTER_BY)
+
+        assert clustered_df.schema == data_df.schema
+        assert clustered_df.equals(data_df.sort(CLUSTER_BY, maintain_order=True))
+        assert clustered_df['subBet'].null_count() == data_df['subBet'].null_count()
+        assert (clustered_df['subBet'].list.len() == 0).sum() == (data_df['subBet'].list.len() == 0).sum()
+
+    def test_keys_not_in_the_data(self):
+        data_df = day(30)
+
+        assert helpers.cluster_frame(data_df, ['customer', 'missing']).equals(data_df.sort(['customer'], maintain_order=True))
+        assert helpers.cluster_frame(data_df, ['missing']).equals(data_df)
+
+    def test_empty_frame(self):
+        data_df = day(30).head(0)
+
+        assert helpers.cluster_frame(data_df, CLUSTER_BY).equals(data_df)
+
+
+class TestLambdaInMemory:
+    """Unit tests for the day loaded in memory by the lambda (STREAMING_DAY false)"""
+
+    @pytest.mark.parametrize('clustered', [True, False])
+    def test_day_is_written(self, clustered):
+        data_df = day(250)
+        written = {}
+
+        def write_parquet(partition, bucket, object_key, profile):
+            written[object_key] = partition
+            return object_key
+
+        with patch.multiple(config, STREAMING_DAY=False, CLUSTERED_RAW=clustered), \
+             patch('utils.helpers.read_parquet_partition', return_value=data_df), \
+             patch('utils.dist_information._write_parquet', write_parquet):
+            response = lambda_function.lambda_handler({'day': '20250101'}, None)
+
+        assert response['statusCode'] == 200
+        assert len(written) == 1
+        assert next(iter(written)).endswith('/bets/day=20250101/batch=000000000000/part_000000000000.snappy.parquet')
+        expected_df = data_df.sort(CLUSTER_BY, maintain_order=True) if clustered else data_df
+        assert next(iter(written.values())).equals(expected_df)
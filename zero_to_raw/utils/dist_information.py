@@ -1,31 +1,198 @@
+import time
 import polars as pl
+from concurrent.futures import ThreadPoolExecutor, wait, ALL_COMPLETED, FIRST_COMPLETED
+from typing import Iterable
 import aws.s3 as s3
+import aws.parquet_profiles as profiles
+import config
+import utils.helpers as helpers
 
+_executor, _executor_workers = None, 0
 
-def __write_information_into_partitions(data_df: pl.DataFrame, bucket: str, data_prefix:str, partition_size: int = 100000):
 
+def _write_parquet(partition: pl.DataFrame, bucket: str, object_key: str, profile: str) -> str:
+    s3.__write_parquet(partition, bucket, object_key, profile)
+    return object_key
+
+
+class PartitionWriter:
+    """
+    Encodes and uploads the partitions on a pool of `concurrency` threads, with the shared S3
+    client. The encode of polars and the upload release the GIL, so the partitions are written
+    in parallel. At most `concurrency` partitions are in flight, so the memory stays bounded.
+    With a concurrency of 1 every partition is written before `write` returns, as before.
+
+    Args:
+        bucket (str): The target bucket.
+        profile (str): The parquet writer profile.
+        concurrency (int): Maximum partitions encoded and uploaded at the same time.
+    """
+
+    def __init__(self, bucket: str, profile: str = config.PARQUET_PROFILE, concurrency: int = config.WRITE_CONCURRENCY):
+        global _executor, _executor_workers
+        self.bucket      = bucket
+        self.profile     = profile
+        self.concurrency = max(1, concurrency)
+        self.pending     = set()
+        self.written     = 0
+        self.start       = time.perf_counter()
+
+        # The pool is kept between the invocations of a warm Lambda. A larger concurrency replaces
+        # it, once the writes already submitted to it are over, so its threads are not leaked
+        if self.concurrency > 1 and _executor_workers < self.concurrency:
+            if _executor is not None:
+                _executor.shutdown(wait=True)
+            _executor         = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='raw-writer')
+            _executor_workers = self.concurrency
+
+    def write(self, partition: pl.DataFrame, object_key: str) -> None:
+        """
+        Write a partition, in background when the concurrency is over 1. The partition is owned by
+        the writer from then on: polars borrows it mutably while it is encoded.
+        """
+        if self.concurrency == 1:
+            _write_parquet(partition, self.bucket, object_key, self.profile)
+            self.written += 1
+            return
+
+        while len(self.pending) >= self.concurrency:
+            self._collect(FIRST_COMPLETED)
+        self.pending.add(_executor.submit(_write_parquet, partition, self.bucket, object_key, self.profile))
+
+    def _collect(self, return_when) -> None:
+        done, self.pending = wait(self.pending, return_when=return_when)
+        for future in done:
+            future.result()  # raises the error of a failed write
+            self.written += 1
+
+    def wait(self) -> int:
+        """
+        Wait for all the partitions in flight.
+
+        Returns:
+            int: The partitions written by this writer.
+        """
+        if self.pending:
+            self._collect(ALL_COMPLETED)
+        if self.concurrency > 1:
+            print(f'{self.written} partitions written in {time.perf_counter() - self.start:.2f}s by {self.concurrency} writers')
+        return self.written
+
+
+def __write_information_into_partitions(data_df: pl.DataFrame, bucket: str, data_prefix:str, partition_size: int = 100000, profile: str = config.PARQUET_PROFILE, writer: PartitionWriter = None):
+
+    own_writer      = writer is None
+    writer          = writer or PartitionWriter(bucket, profile)
     partition_index = 0
     for i in range(0, data_df.height, partition_size): 
         partition       = data_df.slice(i, partition_size)
-        object_key      = f'{data_prefix}part_{partition_index:012d}.snappy.parquet'
+        object_key      = f'{data_prefix}part_{partition_index:012d}{profiles.extension(profile)}'
         partition_index += 1
 
-        s3.__write_parquet(partition, bucket, object_key)
+        writer.write(partition, object_key)
         del partition
 
+    if own_writer:
+        writer.wait()
     return partition_index
 
 
-def __write_information_bactches(data_df: pl.DataFrame, bucket: str, data_prefix:str, batch_size: int = 400000, partition_size: int = 100000):
+def __write_information_bactches(data_df: pl.DataFrame, bucket: str, data_prefix:str, batch_size: int = 400000, partition_size: int = 100000, profile: str = config.PARQUET_PROFILE):
 
+    # One writer for the whole day, so the batches do not wait for each other
+    writer      = PartitionWriter(bucket, profile)
     batch_index = 0
     for i in range(0, data_df.height, batch_size): 
         batch_df     = data_df.slice(i, batch_size)
         _data_prefix = f'{data_prefix}batch={batch_index:012d}/'
         batch_index  += 1
         
-        __write_information_into_partitions(batch_df, bucket, _data_prefix, partition_size)
-        print(f'Batch {batch_index} on {_data_prefix} was written successfully')
+        __write_information_into_partitions(batch_df, bucket, _data_prefix, partition_size, profile, writer)
+        print(f'Batch {batch_index} on {_data_prefix} was {"written successfully" if writer.concurrency == 1 else "queued"}')
         del batch_df
 
-    return batch_index
\ No newline at end of file
+    writer.wait()
+    return batch_index
+
+
+def __write_information_stream(chunks: Iterable[pl.DataFrame], bucket: str, data_prefix:str, batch_size: int = 400000, partition_size: int = 100000, profile: str = config.PARQUET_PROFILE, cluster_by: list = None):
+    """
+    Streaming version of `__write_information_bactches`: the chunks of the day are buffered until
+    they fill a partition, which is written as soon as it is complete. The batches and partitions
+    are the same as with the whole day in memory, but only about one partition (plus the ones in
+    flight in the writer) is held at a time.
+
+    With `cluster_by` the chunks are buffered until they fill a batch instead, which is sorted by
+    the keys before it is split in partitions: the partitions of a batch cover disjoint ranges of
+    the keys, at the cost of holding a batch in memory.
+
+    The chunks are consumed once, so the source files of the day are listed a single time; see
+    `helpers.iter_parquet_partition` for the cost of reading every file in slices.
+
+    Returns:
+        (n_batches, n_rows): The batches written and the rows of the day.
+    """
+    writer                = PartitionWriter(bucket, profile)
+    pending, pending_rows = [], 0
+    batch_index, partition_index, batch_rows, n_rows = 0, 0, 0, 0
+
+    def flush(size):
+        nonlocal pending, pending_rows, batch_index, partition_index, batch_rows
+        data_df      = pl.concat(pending, how='vertical') if len(pending) > 1 else pending[0]
+        partition    = data_df.slice(0, size)
+        rest         = data_df.slice(size)
+        pending      = [rest] if rest.height else []
+        pending_rows = rest.height
+
+        object_key = f'{data_prefix}batch={batch_index:012d}/part_{partition_index:012d}{profiles.extension(profile)}'
+        partition_index += 1
+        batch_rows      += partition.height
+        writer.write(partition, object_key)
+        del data_df, partition, rest
+
+        if batch_rows >= batch_size:
+            close_batch()
+
+    def flush_batch(size):
+        nonlocal pending, pending_rows
+        data_df      = pl.concat(pending, how='vertical') if len(pending) > 1 else pending[0]
+        batch_df     = helpers.cluster_frame(data_df.slice(0, size), cluster_by)
+        rest         = data_df.slice(size)
+        pending      = [rest] if rest.height else []
+        pending_rows = rest.height
+        del data_df
+
+        __write_information_into_partitions(batch_df, bucket, f'{data_prefix}batch={batch_index:012d}/', partition_size, profile, writer)
+        del batch_df
+        close_batch()
+
+    def close_batch():
+        nonlocal batch_index, partition_index, batch_rows
+        print(f'Batch {batch_index + 1} on {data_prefix}batch={batch_index:012d}/ was {"written successfully" if writer.concurrency == 1 else "queued"}')
+        batch_index, partition_index, batch_rows = batch_index + 1, 0, 0
+
+    for chunk in chunks:
+        if not chunk.height:
+            continue
+        pending.append(chunk)
+        pending_rows += chunk.height
+        n_rows       += chunk.height
+
+        if cluster_by:
+            while pending_rows >= batch_size:
+                flush_batch(batch_size)
+            continue
+
+        # A partition never crosses the end of a batch, as when the day is sliced in memory
+        while pending_rows >= min(partition_size, batch_size - batch_rows):
+            flush(min(partition_size, batch_size - batch_rows))
+
+    if cluster_by and pending_rows:
+        flush_batch(pending_rows)
+    while pending_rows:
+        flush(min(partition_size, batch_size - batch_rows, pending_rows))
+    if batch_rows:
+        close_batch()
+
+    writer.wait()
+    return batch_index, n_rows
\ No newline at end of file
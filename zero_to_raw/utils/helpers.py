@@ -1,10 +1,11 @@
-from typing import Optional, List, Any
+from typing import Optional, List, Any, Union, Iterator
 import io
-import boto3
 import polars as pl
 from urllib.parse import urlparse
 
-s3 = boto3.client("s3")
+from aws.session import get_client
+
+s3 = get_client("s3")
 
 
 def format_date(date: Optional[str]) -> Optional[str]:
@@ -18,6 +19,87 @@ def format_date(date: Optional[str]) -> Optional[str]:
     return date if not date else f"{date}.000" if len(date) == 19 else date.ljust(23, "0")
 
 
+def format_date_expr(field: str) -> pl.Expr:
+    """
+    Vectorized version of `format_date` for a string column.
+    """
+    col = pl.col(field)
+    return pl.when(col.str.len_chars() == 19).then(col + ".000").otherwise(col.str.pad_end(23, "0"))
+
+
+def type_dates(data_df: pl.DataFrame, fields_datetime: list, fields_date: list) -> pl.DataFrame:
+    """
+    Parse the date columns that are still API strings into `pl.Datetime` (microseconds) and
+    `pl.Date`, as the typed zero layer writes them. The columns already typed are left as they are.
+
+    Args:
+        data_df (pl.DataFrame): The data.
+        fields_datetime (list): The datetime columns.
+        fields_date (list): The date columns.
+
+    Returns:
+        data_df (pl.DataFrame): The data with typed date columns.
+    """
+    def parse(field): return format_date_expr(field).str.to_datetime(format="%Y-%m-%dT%H:%M:%S%.f")
+
+    schema = data_df.schema
+    return data_df.with_columns(
+        [parse(field).cast(pl.Datetime("us")).alias(field) for field in fields_datetime if schema.get(field) == pl.String]
+        + [parse(field).dt.date().alias(field) for field in fields_date if schema.get(field) == pl.String]
+    )
+
+
+def typed_schema(schema: dict, fields_datetime: list, fields_date: list) -> dict:
+    """
+    The schema of a table in the typed zero layer.
+    """
+    return {
+        **schema,
+        **{field: pl.Datetime("us") for field in fields_datetime if field in schema},
+        **{field: pl.Date for field in fields_date if field in schema},
+    }
+
+
+def _take_nested(data_df: pl.DataFrame, order: pl.Series) -> pl.DataFrame:
+    """
+    `data_df[order]` for the nested columns, by pyarrow. The gathered table is converted back as a
+    whole: polars cannot import a single nested array with large strings inside (it panics, and
+    crashes when the array is cast to string views first).
+    """
+    return pl.from_arrow(data_df.to_arrow().take(order.to_arrow()))
+
+
+def cluster_frame(data_df: pl.DataFrame, cluster_by: list) -> pl.DataFrame:
+    """
+    Sort the rows by the clustering keys, so every partition of the raw layer (and every row group
+    in it) covers a narrow range of the keys, and its min/max statistics let the readers skip it.
+    The rows with the same keys keep their order, e.g. the versions of a bet stay in arrival order.
+
+    Args:
+        data_df (pl.DataFrame): The data.
+        cluster_by (list): The clustering keys, e.g. ['customer', 'transId'].
+
+    Returns:
+        data_df (pl.DataFrame): The sorted data.
+    """
+    keys = [field for field in cluster_by if field in data_df.columns]
+    if len(keys) < len(cluster_by):
+        print(f"[WARN] Clustering keys not in the data: {[field for field in cluster_by if field not in keys]}")
+    if not keys:
+        return data_df
+
+    order  = data_df.select(pl.arg_sort_by(keys, maintain_order=True)).to_series()
+    schema = data_df.schema
+
+    # polars gathers a list column (subBet) through a copy of its values for every row, about 10 KB
+    # a row for the bets, so the nested columns are gathered by pyarrow
+    nested   = [field for field, dtype in schema.items() if dtype.is_nested()]
+    gathered = data_df.select([pl.col(field).gather(order) for field in schema if field not in nested])
+    if nested:
+        gathered = gathered.hstack(_take_nested(data_df.select(nested), order))
+    return gathered.select(data_df.columns)
+
+
 def format_tstamp(tstamp: str) -> str:
     """
     To correct a timestamp
@@ -32,6 +114,38 @@ def format_tstamp(tstamp: str) -> str:
     return "0x" + tstamp.upper() if tstamp[:2] != '0x' and len(tstamp) == 16 else "0x" + tstamp[2:].upper()
 
 
+def parse_tstamp_expr(field: str) -> pl.Expr:
+    """
+    Parse a column of hex tstamps ('0x' + 16 hex digits) into UInt64, without Python calls per
+    row. The integer parser of polars is signed, so the high and low 32 bits are parsed apart.
+
+    Args:
+        field (str): The name of the column.
+
+    Returns:
+        pl.Expr: The rowversions as UInt64.
+    """
+    hexa = pl.col(field).str.strip_prefix("0x").str.strip_prefix("0X").str.zfill(16)
+    high = hexa.str.slice(0, 8).str.to_integer(base=16).cast(pl.UInt64)
+    low  = hexa.str.slice(8, 8).str.to_integer(base=16).cast(pl.UInt64)
+    return (high * pl.lit(1 << 32, dtype=pl.UInt64) + low).alias(field)
+
+
+def normalize_tstamp(data_df: Union[pl.DataFrame, pl.LazyFrame], field: str = 'tstamp') -> Union[pl.DataFrame, pl.LazyFrame]:
+    """
+    Parse the tstamp column when it is still a hex string (files written before it was UInt64).
+
+    Args:
+        data_df (pl.DataFrame | pl.LazyFrame): The data.
+        field (str): The name of the tstamp column.
+
+    Returns:
+        data_df (pl.DataFrame | pl.LazyFrame): The data with a UInt64 tstamp.
+    """
+    schema = data_df.collect_schema() if isinstance(data_df, pl.LazyFrame) else data_df.schema
+    return data_df.with_columns(parse_tstamp_expr(field)) if schema.get(field) == pl.String else data_df
+
+
 def remove_fields(record: dict, fields_to_keep: list) -> dict:
     """
     A function to remove useless fileds in the records
@@ -83,4 +197,117 @@ def read_csv_s3(uri: str, **kwargs) -> pl.DataFrame:
     key = p.path.lstrip("/")
     body = s3.get_object(Bucket=bucket, Key=key)["Body"]  # StreamingBody
     # Polars acepta cualquier file-like con .read(); lo envolvemos en BytesIO por seguridad
-    return pl.read_csv(io.BytesIO(body.read()), **kwargs)
\ No newline at end of file
+    return pl.read_csv(io.BytesIO(body.read()), **kwargs)
+
+
+def list_parquet_uris(uri: str) -> List[str]:
+    """
+    The URIs of the parquet files under an S3 prefix URI.
+    """
+    p      = urlparse(uri)
+    bucket = p.netloc
+    uris   = []
+    for page in s3.get_paginator("list_objects_v2").paginate(Bucket=bucket, Prefix=p.path.lstrip("/")):
+        uris.extend(f"s3://{bucket}/{obj['Key']}" for obj in page.get("Contents", []) if obj["Key"].endswith(".parquet"))
+    return uris
+
+
+def read_parquet_partition(
+    uri: str,
+    schema: dict,
+    tstamp_field: str = 'tstamp',
+    fields_datetime: Optional[list] = None,
+    fields_date: Optional[list] = None,
+) -> pl.DataFrame:
+    """
+    Read a partition with the schema of the table. The tstamp is a UInt64 since it is parsed at
+    ingestion, and the dates are Datetime / Date when the zero layer is typed.
+
+    A partition with the dates of the typed zero layer is read with the typed schema, so they
+    stay typed in the raw layer. A partition that mixes files (legacy hex string tstamp, or
+    typed and string dates) is read file by file: the tstamps are parsed, and the string dates
+    are parsed when any file is typed.
+
+    Args:
+        uri (str): The S3 URI of the partition.
+        schema (dict): The polars schema of the table.
+        tstamp_field (str): The name of the tstamp column.
+        fields_datetime (list): The datetime columns of the typed zero layer.
+        fields_date (list): The date columns of the typed zero layer.
+
+    Returns:
+        data (pl.DataFrame): The data of the partition.
+    """
+    fields_datetime = fields_datetime or []
+    fields_date     = fields_date or []
+    typed           = typed_schema(schema, fields_datetime, fields_date)
+
+    errors = []
+    for table_schema in ([schema, typed] if typed != schema else [schema]):
+        try:
+            return pl.scan_parquet(uri, schema=table_schema).select(table_schema.keys()).cast(table_schema).collect()
+        except pl.exceptions.SchemaError as e:
+            errors.append(e)
+    print(f"[WARN] {errors[0]}. Reading {uri} file by file to parse the legacy {tstamp_field} and the dates")
+
+    frames = [normalize_tstamp(pl.scan_parquet(file_uri).collect(), tstamp_field) for file_uri in list_parquet_uris(uri)]
+    if not frames:
+        return pl.DataFrame(schema=schema)
+
+    if any(frame.schema.get(field, pl.String) != pl.String for frame in frames for field in fields_datetime + fields_date):
+        frames, schema = [type_dates(frame, fields_datetime, fields_date) for frame in frames], typed
+    return pl.concat([frame.select(schema.keys()).cast(schema) for frame in frames], how='vertical')
+
+
+def iter_parquet_partition(
+    uri: str,
+    schema: dict,
+    chunk_size: int,
+    tstamp_field: str = 'tstamp',
+    fields_datetime: Optional[list] = None,
+    fields_date: Optional[list] = None,
+) -> Iterator[pl.DataFrame]:
+    """
+    Streaming version of `read_parquet_partition`: the files of the partition are read in order,
+    in slices of at most `chunk_size` rows, so only one slice is in memory at a time. The slices
+    of a file only read its row groups that hold them.
+
+    The files are listed once per day, but every slice is a new read of its file: the footer is
+    fetched again, and a row group larger than `chunk_size` is downloaded once per slice that
+    overlaps it. The zero files written by the poller have a single row group of up to
+    FLUSH_MAX_ROWS rows, read once while `chunk_size` (the partition_size) is not smaller; the
+    large compacted files cost about row_group_size / chunk_size reads of every row group.
+
+    The schemas of the files are read first (footers only), so every slice gets the same types:
+    the dates are typed when any file is typed, and the legacy string tstamps are parsed.
+
+    Args:
+        uri (str): The S3 URI of the partition.
+        schema (dict): The polars schema of the table.
+        chunk_size (int): Maximum rows of a slice.
+        tstamp_field (str): The name of the tstamp column.
+        fields_datetime (list): The datetime columns of the typed zero layer.
+        fields_date (list): The date columns of the typed zero layer.
+
+    Yields:
+        data (pl.DataFrame): The slices of the partition.
+    """
+    fields_datetime = fields_datetime or []
+    fields_date     = fields_date or []
+
+    files = [(file_uri, pl.scan_parquet(file_uri).collect_schema()) for file_uri in list_parquet_uris(uri)]
+    typed = any(file_schema.get(field, pl.String) != pl.String for _, file_schema in files for field in fields_datetime + fields_date)
+    if typed:
+        schema = typed_schema(schema, fields_datetime, fields_date)
+
+    for file_uri, file_schema in files:
+        if file_schema.get(tstamp_field) == pl.String:
+            print(f"[WARN] {file_uri} has the legacy string {tstamp_field}, it is parsed into UInt64")
+
+        data_lf = pl.scan_parquet(file_uri)
+        n_rows  = data_lf.select(pl.len()).collect().item()
+        for offset in range(0, n_rows, chunk_size):
+            chunk = normalize_tstamp(data_lf.slice(offset, chunk_size).collect(), tstamp_field)
+            if typed:
+                chunk = type_dates(chunk, fields_datetime, fields_date)
+            yield chunk.select(schema.keys()).cast(schema)